@@ -0,0 +1,86 @@
+"""
+Fixtures shared by the benchmarks. Molecules are built from the properties bundled with the package
+(olfactometer/data/molecule_seed.jsonl) and the DAQ is the simulated nidaqmx backend, so no benchmark
+touches PubChem or hardware.
+"""
+import numpy as np
+import pytest
+
+from olfactometer import molecule_cache
+from olfactometer.clock import VirtualClock
+from olfactometer.molecule_cache import MoleculeCache
+from olfactometer.my_equipment import MyOlfactometer
+
+SEED_CIDS = (7410, 7439, 702)   # acetophenone, carvone, ethanol
+DILUTIONS = (10, 10, 10)
+ODOR_TABLE_ROWS = 20000
+
+
+@pytest.fixture
+def seeded_cache(tmp_path, monkeypatch):
+    """The shared MoleculeCache, holding only the bundled seed, in a temporary directory."""
+    cache = MoleculeCache(str(tmp_path / 'molecule_cache.jsonl'))
+    monkeypatch.setattr(molecule_cache, '_default_cache', cache)
+    return cache
+
+
+def make_odor_table(path, n_rows=ODOR_TABLE_ROWS, n_odorants=len(SEED_CIDS), n_jars=MyOlfactometer.n_jars, seed=0):
+    """
+    Pickle a look-up table laid out like the ones SmellController.kdtree_lookup reads:
+    one row of vapor concentrations per machine configuration, indexed by
+    (fMFC_A_High, fMFC_B_Low, the A valve fractions, then the B valve fractions).
+    The configurations are random, only the size and layout of the table matter here.
+
+    Returns:
+        str: path
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    configurations = rng.uniform(0, 1, (n_rows, 2 + 2 * n_jars))
+    concentrations = 10 ** rng.uniform(-12, -6, (n_rows, n_odorants))
+    index = pd.MultiIndex.from_arrays(configurations.T)
+    pd.DataFrame(concentrations, index=index).to_pickle(path)
+    return path
+
+
+def make_smell_engine(look_up_table_path=None, clock=None):
+    """
+    A SmellEngine for the SEED_CIDS odorants on the simulated DAQ, set up as the
+    SmellEngineCommunicator does after a handshake.
+    """
+    from olfactometer.smell_engine import SmellEngine
+
+    smell_engine = SmellEngine(n_odorants=len(SEED_CIDS), debug_mode=True, look_up_table_path=look_up_table_path,
+                               clock=clock if clock is not None else VirtualClock())
+    smell_engine.set_odorant_molecule_ids(list(SEED_CIDS))
+    smell_engine.set_odorant_molecule_dilutions(list(DILUTIONS))
+    smell_engine.initialize_smell_engine_system()
+    return smell_engine
+
+
+@pytest.fixture
+def smell_engine(seeded_cache):
+    """SmellEngine solving with linear then non-linear least squares."""
+    smell_engine = make_smell_engine()
+    yield smell_engine
+    smell_engine.smell_controller.valve_driver.close_tasks()
+
+
+@pytest.fixture
+def odor_table(tmp_path):
+    return make_odor_table(str(tmp_path / 'odor_table.pkl'))
+
+
+@pytest.fixture
+def kdtree_smell_engine(seeded_cache, odor_table):
+    """SmellEngine looking its schedules up in a KD-tree over odor_table."""
+    smell_engine = make_smell_engine(look_up_table_path=odor_table)
+    yield smell_engine
+    smell_engine.smell_controller.valve_driver.close_tasks()
+
+
+def targets(n_targets=8, n_odorants=len(SEED_CIDS), seed=0):
+    """Distinct molar target vectors, so that no solve is skipped as unchanged."""
+    rng = np.random.default_rng(seed)
+    return list(10 ** rng.uniform(-10, -7, (n_targets, n_odorants)))
@@ -0,0 +1,76 @@
+"""
+Benchmarks of the frame writes the valve driver makes on the simulated DAQ, in writes per second (OPS).
+
+    PYTHONPATH=nidaqmx python -m pytest benchmarks/test_daq_write.py --benchmark-only
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('nidaqmx.simulation')
+
+import nidaqmx
+from nidaqmx.constants import AcquisitionType, LineGrouping
+from nidaqmx.simulation import SimulatedBackend
+
+from olfactometer.clock import VirtualClock
+from olfactometer.frame_writer import FrameWriter
+
+SAMPLES_PER_FRAME = 50
+N_ANALOG = 4
+
+
+@pytest.fixture
+def tasks():
+    backend = SimulatedBackend(VirtualClock())
+    digital = nidaqmx.Task('DigitalTask', backend)
+    digital.add_task_channel(digital.do_channels.add_do_chan(
+        'Dev1/port0/line0:31', name_to_assign_to_lines='digital_channel',
+        line_grouping=LineGrouping.CHAN_FOR_ALL_LINES))
+    analog = nidaqmx.Task('AnalogTask', backend)
+    for i in range(N_ANALOG):
+        analog.add_task_channel(analog.ao_channels.add_ao_voltage_chan('Dev1/ao%d' % i, 'analog_channel%d' % i))
+    for task in (digital, analog):
+        task.timing.cfg_samp_clk_timing(50, sample_mode=AcquisitionType.CONTINUOUS, samps_per_chan=SAMPLES_PER_FRAME)
+    yield digital, analog
+    digital.close()
+    analog.close()
+
+
+def write_frame(digital, analog, digital_values, analog_values, inspect_channels=False):
+    """One cycle of ValveDriver.write_output. inspect_channels drops the cached channel metadata first, as before it was cached."""
+    digital.stop()
+    analog.stop()
+    if inspect_channels:
+        digital._channel_cache.clear()
+        analog._channel_cache.clear()
+    digital.write(digital_values, auto_start=True)
+    analog.write(analog_values, auto_start=True)
+
+
+def test_write_frame_inspect_channels(benchmark, tasks):
+    digital_values = np.arange(SAMPLES_PER_FRAME, dtype=np.uint32)
+    analog_values = np.full((N_ANALOG, SAMPLES_PER_FRAME), 2.5)
+    benchmark(write_frame, *tasks, digital_values, analog_values, inspect_channels=True)
+
+
+def test_write_frame_cached(benchmark, tasks):
+    digital_values = np.arange(SAMPLES_PER_FRAME, dtype=np.uint32)
+    analog_values = np.full((N_ANALOG, SAMPLES_PER_FRAME), 2.5)
+    benchmark(write_frame, *tasks, digital_values, analog_values)
+    assert tasks[1].channels is tasks[1].channels
+
+
+def test_write_frame_writers(benchmark, tasks):
+    digital, analog = tasks
+    digital_writer = FrameWriter(digital, (SAMPLES_PER_FRAME,), np.uint32)
+    analog_writer = FrameWriter(analog, (N_ANALOG, SAMPLES_PER_FRAME), np.float64)
+    digital_values = np.arange(SAMPLES_PER_FRAME, dtype=np.uint32)
+    analog_values = np.full((N_ANALOG, SAMPLES_PER_FRAME), 2.5)
+
+    def write_frame_writers():
+        digital.stop()
+        analog.stop()
+        digital_writer.write(digital_values)
+        analog_writer.write(analog_values)
+    benchmark(write_frame_writers)
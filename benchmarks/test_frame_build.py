@@ -0,0 +1,38 @@
+"""
+Benchmarks of the valve driver turning an olfactometer schedule into digital and analog frames.
+
+    PYTHONPATH=nidaqmx python -m pytest benchmarks/test_frame_build.py --benchmark-only
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('nidaqmx.simulation')
+
+from olfactometer import valve_driver as valve_driver_module
+from benchmarks.fixtures import smell_engine, seeded_cache, targets
+
+
+@pytest.fixture
+def schedule(smell_engine):
+    """(valve_driver, valve_mfc_values) of one solve of the smell_engine."""
+    controller = smell_engine.smell_controller
+    controller.optimize_vector(targets()[0], smell_engine.total_flow_rate)
+    return controller.valve_driver, controller.clean_valve_mfc_values()
+
+
+@pytest.mark.parametrize('samples_per_frame', [50, 250, 1000])
+def test_generate_digital_frame_writes(benchmark, schedule, monkeypatch, samples_per_frame):
+    valve_driver, valve_mfc_values = schedule
+    monkeypatch.setattr(valve_driver_module, 'SAMPLES_PER_FRAME', samples_per_frame)
+    frame = benchmark(valve_driver.generate_digital_frame_writes, valve_driver.valve_durations)
+    assert frame.shape == (samples_per_frame,) and frame.dtype == np.uint32
+
+
+def test_issue_odorants(benchmark, schedule):
+    valve_driver, valve_mfc_values = schedule
+    # issue_odorants pairs the valves in place, so every round gets a fresh copy of the valve list
+    def setup():
+        return (dict(valve_mfc_values, valves=list(valve_mfc_values['valves'])),), {}
+    benchmark.pedantic(valve_driver.issue_odorants, setup=setup, rounds=200)
+    assert valve_driver.valve_duty_cycles.shape == (valve_driver_module.SAMPLES_PER_FRAME,)
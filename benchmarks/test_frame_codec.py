@@ -0,0 +1,61 @@
+"""
+Benchmarks of the per-frame decoding the SmellEngineCommunicator does between reading a frame
+from the socket and handing the concentrations to the Smell Engine. The decode and antilog of a
+frame and the struct path it replaced are grouped by frame size, so each group compares the two;
+a session typically sends 3 odorants.
+
+    python -m pytest benchmarks/test_frame_codec.py --benchmark-only
+"""
+import struct
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from olfactometer.frame_codec import decode_frame, antilog
+
+
+@pytest.mark.parametrize('n_odorants', [3, 16, 64])
+def test_decode_frame(benchmark, n_odorants):
+    data = np.linspace(-12, -6, n_odorants).tobytes()
+    frame = benchmark(decode_frame, data, n_odorants)
+    assert len(frame) == n_odorants
+
+
+@pytest.mark.parametrize('n_odorants', [1, 3, 16, 64])
+def test_decode_antilog(benchmark, n_odorants):
+    benchmark.group = 'antilog-%d' % n_odorants
+    data = np.linspace(-12, -6, n_odorants).tobytes()
+    out = np.empty(n_odorants)
+    concentrations = benchmark(lambda: antilog(decode_frame(data, n_odorants), out=out))
+    assert concentrations[-1] == pytest.approx(10 ** np.frombuffer(data)[-1])
+
+
+@pytest.mark.parametrize('n_odorants', [1, 3, 16, 64])
+def test_antilog(benchmark, n_odorants):
+    benchmark.group = 'antilog-%d' % n_odorants
+    frame = decode_frame(np.linspace(-12, -6, n_odorants).tobytes(), n_odorants)
+    out = np.empty(n_odorants)
+    concentrations = benchmark(antilog, frame, out)
+    assert concentrations[-1] == pytest.approx(10 ** frame[-1])
+
+
+def struct_path(unpacker, data):
+    """Decoding and antilog as done before decode_frame: struct.unpack and a Python loop."""
+    antilogs = []
+    for concentration in list(unpacker.unpack(data)):
+        if abs(10**concentration) == float('inf'):
+            antilogs.append(0)
+        else:
+            antilogs.append(10**concentration)
+    return antilogs
+
+
+@pytest.mark.parametrize('n_odorants', [1, 3, 16, 64])
+def test_struct_antilog(benchmark, n_odorants):
+    benchmark.group = 'antilog-%d' % n_odorants
+    unpacker = struct.Struct('<%dd' % n_odorants)
+    data = np.linspace(-12, -6, n_odorants).tobytes()
+    concentrations = benchmark(struct_path, unpacker, data)
+    np.testing.assert_allclose(concentrations, antilog(decode_frame(data, n_odorants)))
@@ -0,0 +1,23 @@
+"""
+Benchmarks of OdorTableLookup.query over a look-up table split into one or several KD-trees.
+
+    python -m pytest benchmarks/test_odor_table.py --benchmark-only
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pd = pytest.importorskip('pandas')
+
+from olfactometer.odor_table_look_up import OdorTableLookup
+from benchmarks.fixtures import odor_table, targets
+
+
+@pytest.mark.parametrize('split_num', [0, 4])
+def test_query(benchmark, odor_table, split_num):
+    lookup = OdorTableLookup(pd.read_pickle(odor_table), split_num=split_num)
+    next_target = itertools.cycle(targets()).__next__
+    distance, (tree, index) = benchmark(lambda: lookup.query(next_target()))
+    assert np.isfinite(distance)
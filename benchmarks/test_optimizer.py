@@ -0,0 +1,48 @@
+"""
+Benchmarks of one solve of the SmellController, from the target concentrations to the frames
+handed to the valve driver, with the optimizer (LLS then NLLS) and with the KD-tree look-up table.
+
+    PYTHONPATH=nidaqmx python -m pytest benchmarks/test_optimizer.py --benchmark-only
+"""
+import itertools
+
+import quantities as pq
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('nidaqmx.simulation')
+
+from benchmarks.fixtures import smell_engine, kdtree_smell_engine, seeded_cache, odor_table, targets
+
+TOTAL_FLOW_RATE = 4000  # cc/min, as in SmellEngine
+
+
+def target_dicts(molecules):
+    return [{m: c * pq.M for m, c in zip(molecules, target)} for target in targets()]
+
+
+def test_optimize_lls(benchmark, smell_engine):
+    controller = smell_engine.smell_controller
+    next_target = itertools.cycle(target_dicts(smell_engine.olfactometer.loaded_molecules)).__next__
+    benchmark(lambda: controller.optimize(next_target(), TOTAL_FLOW_RATE * pq.cc / pq.min))
+    assert controller.valve_driver.valve_durations
+
+
+def test_optimize_vector_lls(benchmark, smell_engine):
+    controller = smell_engine.smell_controller
+    next_target = itertools.cycle(targets()).__next__
+    benchmark(lambda: controller.optimize_vector(next_target(), TOTAL_FLOW_RATE))
+
+
+def test_optimize_kdtree(benchmark, kdtree_smell_engine):
+    controller = kdtree_smell_engine.smell_controller
+    assert controller.kdtree_flag
+    next_target = itertools.cycle(target_dicts(kdtree_smell_engine.olfactometer.loaded_molecules)).__next__
+    benchmark(lambda: controller.optimize(next_target(), TOTAL_FLOW_RATE * pq.cc / pq.min))
+    assert controller.valve_driver.valve_durations
+
+
+def test_optimize_vector_kdtree(benchmark, kdtree_smell_engine):
+    controller = kdtree_smell_engine.smell_controller
+    next_target = itertools.cycle(targets()).__next__
+    benchmark(lambda: controller.optimize_vector(next_target(), TOTAL_FLOW_RATE))
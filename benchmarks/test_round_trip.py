@@ -0,0 +1,78 @@
+"""
+Benchmark of a full round trip on the simulated DAQ: a client playing Unity sends a target frame over
+the socket, the SmellEngineCommunicator decodes, gates and solves it, and the valve driver writes the
+resulting frames to the DAQ. The per-stage latencies of the tracer are saved with the results.
+
+    PYTHONPATH=nidaqmx python -m pytest benchmarks/test_round_trip.py --benchmark-only --benchmark-autosave
+"""
+import asyncio
+import itertools
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('nidaqmx.simulation')
+
+from olfactometer.clock import VirtualClock
+from olfactometer.frame_codec import FRAME_DTYPE
+from olfactometer.smell_engine_communicator import SmellEngineCommunicator
+from benchmarks.fixtures import seeded_cache, targets, SEED_CIDS, DILUTIONS
+
+TIMEOUT = 30.0
+
+
+def wait_for(condition, timeout=TIMEOUT):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            raise Exception("Timed out waiting for the Smell Engine")
+        time.sleep(0)
+
+
+@pytest.fixture
+def session(seeded_cache):
+    """(communicator, connected client socket) once the client's handshake has initialized the Smell Engine."""
+    communicator = SmellEngineCommunicator(debug_mode=True, port=0, clock=VirtualClock())
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    serving = asyncio.run_coroutine_threadsafe(communicator.serve(), loop)
+    wait_for(lambda: communicator.server is not None and communicator.server.sockets)
+    client = socket.create_connection(communicator.server.sockets[0].getsockname()[:2])
+    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    n_odorants = len(SEED_CIDS)
+    client.sendall(struct.pack('i', n_odorants) + struct.pack(n_odorants * 'i', *SEED_CIDS)
+                   + struct.pack(n_odorants * 'i', *DILUTIONS))
+    wait_for(lambda: communicator.initialized)
+    yield communicator, client
+    client.close()
+    loop.call_soon_threadsafe(serving.cancel)
+    wait_for(serving.done)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(TIMEOUT)
+    communicator.smell_engine.smell_controller.valve_driver.close_tasks()
+    communicator.executor.shutdown()
+
+
+def test_round_trip(benchmark, session):
+    communicator, client = session
+    valve_driver = communicator.smell_engine.smell_controller.valve_driver
+    backend = valve_driver.backend
+    frames = itertools.cycle([np.log10(target).astype(FRAME_DTYPE).tobytes() for target in targets()])
+
+    def round_trip():
+        """Send a frame, wait for its solve, then write the next DAQ frame."""
+        solved = valve_driver.mixtures[-1] if valve_driver.mixtures else None
+        client.sendall(next(frames))
+        wait_for(lambda: valve_driver.mixtures and valve_driver.mixtures[-1] is not solved)
+        valve_driver.run_for(valve_driver.timer_interval)
+
+    benchmark(round_trip)
+    assert len(backend['DigitalTask'].times) > 0
+    assert communicator.gate.skipped_deadband == 0
+    benchmark.extra_info['stages'] = communicator.tracer.stats()
@@ -0,0 +1,53 @@
+"""
+Benchmarks of the vapor concentration matrix handed to the optimizer.
+
+    python -m pytest benchmarks --benchmark-only
+"""
+import numpy as np
+import pytest
+import quantities as pq
+
+pytest.importorskip('pytest_benchmark')
+
+from olfactometer.smell_controller import SmellController
+from olfactometer.tests.fixtures import make_molecules, make_olfactometer, STAND_IN_COMPOUNDS
+
+
+@pytest.fixture(scope='module')
+def controller():
+    molecules = make_molecules(list(STAND_IN_COMPOUNDS))
+    return SmellController(make_olfactometer(molecules, n_jars=16))
+
+
+def legacy_vapor_concs_dense(olfactometer):
+    """get_vapor_concs_dense as it was before the per-jar vapor cache, for comparison."""
+    n_odorants = len(olfactometer.loaded_molecules)
+    n_jars = len(olfactometer.jars)
+    J = np.zeros((n_odorants, n_jars))*pq.M
+    for j, jar in olfactometer.jars.items():
+        for m, c in jar.contents.vapor_concentrations.items():
+            c_ = c.rescale(pq.M)
+            i = olfactometer.loaded_molecules.index(m)
+            J[i, j-1] = c_
+    return J
+
+
+def invalidate_jars(olfactometer):
+    for jar in olfactometer.jars.values():
+        jar.contents.invalidate()
+
+
+def test_vapor_concs_dense_legacy(benchmark, controller):
+    J = benchmark(legacy_vapor_concs_dense, controller.olfactometer)
+    np.testing.assert_allclose(J.magnitude, controller.get_vapor_concs_dense(None).magnitude)
+
+
+def test_vapor_concs_dense_cold(benchmark, controller):
+    olfactometer = controller.olfactometer
+    benchmark.pedantic(controller.get_vapor_concs_dense, args=(None,),
+                       setup=lambda: invalidate_jars(olfactometer), rounds=50)
+
+
+def test_vapor_concs_dense_warm(benchmark, controller):
+    controller.get_vapor_concs_dense(None)
+    benchmark(controller.get_vapor_concs_dense, None)
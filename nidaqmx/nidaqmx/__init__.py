@@ -3,9 +3,47 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import importlib
+import sys
+
 from nidaqmx.errors import DaqError, DaqWarning, DaqResourceWarning
-from nidaqmx.scale import Scale
-from nidaqmx.task import Task
-from nidaqmx._task_modules.read_functions import CtrFreq, CtrTick, CtrTime
 
 __all__ = ['errors', 'scale', 'stream_readers', 'stream_writers', 'task']
+
+# Names exported by the package, imported on first access. Importing the task
+# and channel modules takes most of the import time of the package.
+_LAZY_ATTRIBUTES = {
+    'Scale': 'nidaqmx.scale',
+    'Task': 'nidaqmx.task',
+    'CtrFreq': 'nidaqmx._task_modules.read_functions',
+    'CtrTick': 'nidaqmx._task_modules.read_functions',
+    'CtrTime': 'nidaqmx._task_modules.read_functions',
+}
+
+_LAZY_SUBMODULES = (
+    'constants', 'error_codes', 'scale', 'simulation', 'stream_readers',
+    'stream_writers', 'system', 'task', 'types', 'utils')
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module('nidaqmx.' + name)
+    else:
+        raise AttributeError(
+            "module 'nidaqmx' has no attribute '{0}'".format(name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) |
+                  set(_LAZY_SUBMODULES))
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ (PEP 562) is not available, import everything now.
+    from nidaqmx.scale import Scale
+    from nidaqmx.task import Task
+    from nidaqmx._task_modules.read_functions import CtrFreq, CtrTick, CtrTime
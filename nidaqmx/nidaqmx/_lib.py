@@ -5,6 +5,7 @@ from __future__ import unicode_literals
 
 from ctypes.util import find_library
 import ctypes
+import numpy
 from numpy.ctypeslib import ndpointer
 import platform
 import six
@@ -149,6 +150,91 @@ class DaqFunctionImporter(object):
                 'version of NI-DAQmx.'.format(function))
 
 
+class DaqFunctionTable(object):
+    """
+    Prebound NI-DAQmx functions for the calls made on every read, write
+    and state change of a task.
+
+    A function is looked up and its argtypes are set the first time it is
+    used. It is then stored as an attribute of the table, so later calls
+    skip the library lookup and the argtypes check under its arglock.
+    """
+
+    def __init__(self, importer, prototypes):
+        """
+        Args:
+            importer (DaqLibImporter): Specifies the importer of the
+                library the functions are taken from.
+            prototypes (dict): Maps the name of each function to a callable
+                that returns its argtypes, given the importer.
+        """
+        self._importer = importer
+        self._prototypes = prototypes
+
+    def __getattr__(self, function):
+        try:
+            argtypes = self._prototypes[function]
+        except KeyError:
+            raise AttributeError(
+                'The NI-DAQmx function "{0}" has no prototype in the '
+                'function table.'.format(function))
+
+        cfunc = getattr(self._importer.windll, function)
+        with cfunc.arglock:
+            if cfunc.argtypes is None:
+                cfunc.argtypes = argtypes(self._importer)
+        setattr(self, function, cfunc)
+        return cfunc
+
+
+def _task_handle_prototype(*argtypes):
+    return lambda importer: [importer.task_handle] + list(argtypes)
+
+
+def _array_prototype(before, dtype, after):
+    return lambda importer: (
+        [importer.task_handle] + before +
+        [wrapped_ndpointer(dtype=dtype, flags=('C', 'W'))] + after)
+
+
+# Functions called by the task on every cycle of a generation or
+# acquisition loop, see DaqLibImporter.functions.
+TASK_FUNCTION_PROTOTYPES = {
+    'DAQmxGetTaskName': _task_handle_prototype(ctypes.c_char_p, ctypes.c_uint),
+    'DAQmxGetTaskChannels': _task_handle_prototype(
+        ctypes.c_char_p, ctypes.c_uint),
+    'DAQmxGetTaskNumChans': _task_handle_prototype(
+        ctypes.POINTER(ctypes.c_uint)),
+    'DAQmxGetChanType': _task_handle_prototype(
+        ctypes_byte_str, ctypes.POINTER(ctypes.c_int)),
+    'DAQmxGetWriteDigitalLinesBytesPerChan': _task_handle_prototype(
+        ctypes.POINTER(ctypes.c_uint)),
+    'DAQmxIsTaskDone': _task_handle_prototype(ctypes.POINTER(c_bool32)),
+    'DAQmxStartTask': _task_handle_prototype(),
+    'DAQmxStopTask': _task_handle_prototype(),
+    'DAQmxClearTask': _task_handle_prototype(),
+    'DAQmxTaskControl': _task_handle_prototype(ctypes.c_int),
+    'DAQmxWaitUntilTaskDone': _task_handle_prototype(ctypes.c_double),
+    'DAQmxWriteAnalogF64': _array_prototype(
+        [ctypes.c_int, c_bool32, ctypes.c_double, ctypes.c_int],
+        numpy.float64,
+        [ctypes.POINTER(ctypes.c_int), ctypes.POINTER(c_bool32)]),
+    'DAQmxWriteDigitalU32': _array_prototype(
+        [ctypes.c_int, c_bool32, ctypes.c_double, ctypes.c_int],
+        numpy.uint32,
+        [ctypes.POINTER(ctypes.c_int), ctypes.POINTER(c_bool32)]),
+    'DAQmxWriteDigitalLines': _array_prototype(
+        [ctypes.c_int, c_bool32, ctypes.c_double, ctypes.c_int],
+        numpy.bool_,
+        [ctypes.POINTER(ctypes.c_int), ctypes.POINTER(c_bool32)]),
+    'DAQmxReadAnalogF64': _array_prototype(
+        [ctypes.c_int, ctypes.c_double, c_bool32],
+        numpy.float64,
+        [ctypes.c_uint, ctypes.POINTER(ctypes.c_int),
+         ctypes.POINTER(c_bool32)]),
+}
+
+
 class DaqLibImporter(object):
     """
     Encapsulates NI-DAQmx library importing and handle type parsing logic.
@@ -159,6 +245,7 @@ class DaqLibImporter(object):
         self._cdll = None
         self._cal_handle = None
         self._task_handle = None
+        self._functions = None
 
     @property
     def windll(self):
@@ -172,6 +259,17 @@ class DaqLibImporter(object):
             self._import_lib()
         return self._cdll
 
+    @property
+    def functions(self):
+        """
+        DaqFunctionTable: Indicates the prebound functions of
+            TASK_FUNCTION_PROTOTYPES, created on first use.
+        """
+        if self._functions is None:
+            self._functions = DaqFunctionTable(
+                self, TASK_FUNCTION_PROTOTYPES)
+        return self._functions
+
     @property
     def task_handle(self):
         if self._task_handle is None:
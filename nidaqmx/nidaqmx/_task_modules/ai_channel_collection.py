@@ -9,7 +9,6 @@ import numpy
 from nidaqmx._lib import (
     lib_importer, wrapped_ndpointer, ctypes_byte_str, c_bool32)
 from nidaqmx.errors import check_for_error
-from nidaqmx._task_modules.channels.ai_channel import AIChannel
 from nidaqmx._task_modules.channel_collection import ChannelCollection
 from nidaqmx.utils import unflatten_channel_string
 from nidaqmx.constants import (
@@ -48,6 +47,8 @@ class AIChannelCollection(ChannelCollection):
             
             Specifies the newly created AIChannel object.
         """
+        self._channels_changed()
+
         if name_to_assign_to_channel:
             num_channels = len(unflatten_channel_string(physical_channel))
 
@@ -59,6 +60,8 @@ class AIChannelCollection(ChannelCollection):
         else:
             name = physical_channel
 
+        # Imported here, the channel module is slow to import.
+        from nidaqmx._task_modules.channels.ai_channel import AIChannel
         return AIChannel(self._handle, name)
 
     def add_ai_accel_4_wire_dc_voltage_chan(
@@ -66,6 +66,8 @@ class AOChannelCollection(ChannelCollection):
             
             Specifies the newly created AOChannel object.
         """
+        self._channels_changed()
+
         if not self.debug_mode:
             if name_to_assign_to_channel:
                 num_channels = len(unflatten_channel_string(physical_channel))
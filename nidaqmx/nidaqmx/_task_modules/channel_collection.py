@@ -5,7 +5,10 @@ from __future__ import unicode_literals
 
 import ctypes
 import six
-from collections import Sequence
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
 from nidaqmx._lib import lib_importer, ctypes_byte_str
 from nidaqmx._task_modules.channels.channel import Channel
@@ -25,6 +28,9 @@ class ChannelCollection(Sequence):
     def __init__(self, task_handle, debug_mode=False):
         self._handle = task_handle
         self.debug_mode = debug_mode
+        # Channel metadata cached by the task, shared with every
+        # collection of the task, see Task._channel_info.
+        self._channel_cache = None
 
     def __contains__(self, item):
         channel_names = self.channel_names
@@ -36,6 +42,14 @@ class ChannelCollection(Sequence):
 
         return all([item in channel_names for item in items])
 
+    def _channels_changed(self):
+        """
+        Drops the channel metadata cached by the task after a channel is
+        added through this collection.
+        """
+        if self._channel_cache is not None:
+            self._channel_cache.clear()
+
     def __eq__(self, other):
         if isinstance(other, self.__class__):
             return self._handle == other._handle
@@ -117,13 +131,7 @@ class ChannelCollection(Sequence):
             channel collection.
         """
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxGetTaskChannels
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle, ctypes.c_char_p,
-                            ctypes.c_uint]
+            cfunc = lib_importer.functions.DAQmxGetTaskChannels
 
             temp_size = 0
             while True:
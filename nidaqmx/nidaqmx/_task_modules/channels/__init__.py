@@ -8,10 +8,37 @@ __author__ = 'National Instruments'
 __all__ = ['channel']
 
 
+import importlib
+import sys
+
 from nidaqmx._task_modules.channels.channel import Channel
-from nidaqmx._task_modules.channels.ai_channel import AIChannel
-from nidaqmx._task_modules.channels.ao_channel import AOChannel
-from nidaqmx._task_modules.channels.ci_channel import CIChannel
-from nidaqmx._task_modules.channels.co_channel import COChannel
-from nidaqmx._task_modules.channels.di_channel import DIChannel
-from nidaqmx._task_modules.channels.do_channel import DOChannel
\ No newline at end of file
+
+# The channel classes are large, each is imported when first used.
+_LAZY_CHANNELS = {
+    'AIChannel': 'ai_channel',
+    'AOChannel': 'ao_channel',
+    'CIChannel': 'ci_channel',
+    'COChannel': 'co_channel',
+    'DIChannel': 'di_channel',
+    'DOChannel': 'do_channel',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_CHANNELS:
+        raise AttributeError(
+            "module '{0}' has no attribute '{1}'".format(__name__, name))
+    module = importlib.import_module(
+        'nidaqmx._task_modules.channels.' + _LAZY_CHANNELS[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info < (3, 7):
+    from nidaqmx._task_modules.channels.ai_channel import AIChannel
+    from nidaqmx._task_modules.channels.ao_channel import AOChannel
+    from nidaqmx._task_modules.channels.ci_channel import CIChannel
+    from nidaqmx._task_modules.channels.co_channel import COChannel
+    from nidaqmx._task_modules.channels.di_channel import DIChannel
+    from nidaqmx._task_modules.channels.do_channel import DOChannel
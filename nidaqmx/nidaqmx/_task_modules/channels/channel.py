@@ -143,13 +143,7 @@ class Channel(object):
         if not debug_mode:
             chan_type = ctypes.c_int()
 
-            cfunc = lib_importer.windll.DAQmxGetChanType
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle, ctypes_byte_str,
-                            ctypes.POINTER(ctypes.c_int)]
+            cfunc = lib_importer.functions.DAQmxGetChanType
 
             error_code = cfunc(
                 task_handle, virtual_or_physical_name, ctypes.byref(chan_type))
@@ -215,12 +209,7 @@ class Channel(object):
         str: Specifies the flattened names of all the virtual channels in
             the task.
         """
-        cfunc = lib_importer.windll.DAQmxGetTaskChannels
-        if cfunc.argtypes is None:
-            with cfunc.arglock:
-                if cfunc.argtypes is None:
-                    cfunc.argtypes = [
-                        lib_importer.task_handle, ctypes.c_char_p, ctypes.c_uint]
+        cfunc = lib_importer.functions.DAQmxGetTaskChannels
 
         temp_size = 0
         while True:
@@ -250,13 +239,7 @@ class Channel(object):
         """
         val = ctypes.c_int()
 
-        cfunc = lib_importer.windll.DAQmxGetChanType
-        if cfunc.argtypes is None:
-            with cfunc.arglock:
-                if cfunc.argtypes is None:
-                    cfunc.argtypes = [
-                        lib_importer.task_handle, ctypes_byte_str,
-                        ctypes.POINTER(ctypes.c_int)]
+        cfunc = lib_importer.functions.DAQmxGetChanType
 
         error_code = cfunc(
             self._handle, self._name, ctypes.byref(val))
@@ -8,7 +8,6 @@ import numpy
 
 from nidaqmx._lib import lib_importer, ctypes_byte_str, c_bool32
 from nidaqmx.errors import check_for_error
-from nidaqmx._task_modules.channels.ci_channel import CIChannel
 from nidaqmx._task_modules.channel_collection import ChannelCollection
 from nidaqmx.utils import unflatten_channel_string
 from nidaqmx.constants import (
@@ -38,6 +37,8 @@ class CIChannelCollection(ChannelCollection):
             
             Specifies the newly created CIChannel object.
         """
+        self._channels_changed()
+
         if name_to_assign_to_channel:
             num_counters = len(unflatten_channel_string(counter))
 
@@ -49,6 +50,8 @@ class CIChannelCollection(ChannelCollection):
         else:
             name = counter
 
+        # Imported here, the channel module is slow to import.
+        from nidaqmx._task_modules.channels.ci_channel import CIChannel
         return CIChannel(self._handle, name)
 
     def add_ci_ang_encoder_chan(
@@ -8,7 +8,6 @@ import numpy
 
 from nidaqmx._lib import lib_importer, ctypes_byte_str
 from nidaqmx.errors import check_for_error
-from nidaqmx._task_modules.channels.co_channel import COChannel
 from nidaqmx._task_modules.channel_collection import ChannelCollection
 from nidaqmx.utils import unflatten_channel_string
 from nidaqmx.constants import (
@@ -36,6 +35,8 @@ class COChannelCollection(ChannelCollection):
             
             Specifies the newly created COChannel object.
         """
+        self._channels_changed()
+
         if name_to_assign_to_channel:
             num_counters = len(unflatten_channel_string(counter))
 
@@ -47,6 +48,8 @@ class COChannelCollection(ChannelCollection):
         else:
             name = counter
 
+        # Imported here, the channel module is slow to import.
+        from nidaqmx._task_modules.channels.co_channel import COChannel
         return COChannel(self._handle, name)
 
     def add_co_pulse_chan_freq(
@@ -8,7 +8,6 @@ import numpy
 
 from nidaqmx._lib import lib_importer, ctypes_byte_str
 from nidaqmx.errors import check_for_error
-from nidaqmx._task_modules.channels.di_channel import DIChannel
 from nidaqmx._task_modules.channel_collection import ChannelCollection
 from nidaqmx.utils import unflatten_channel_string
 from nidaqmx.constants import (
@@ -39,6 +38,8 @@ class DIChannelCollection(ChannelCollection):
             
             Specifies the newly created DIChannel object.
         """
+        self._channels_changed()
+
         unflattened_lines = unflatten_channel_string(lines)
         num_lines = len(unflattened_lines)
         
@@ -57,6 +58,8 @@ class DIChannelCollection(ChannelCollection):
             else:
                 name = lines
 
+        # Imported here, the channel module is slow to import.
+        from nidaqmx._task_modules.channels.di_channel import DIChannel
         return DIChannel(self._handle, name)
 
     def add_di_chan(
@@ -73,6 +73,8 @@ class DOChannelCollection(ChannelCollection):
             
             Specifies the newly created DOChannel object.
         """
+        self._channels_changed()
+
         if not self.debug_mode:
             unflattened_lines = unflatten_channel_string(lines)
             num_lines = len(unflattened_lines)
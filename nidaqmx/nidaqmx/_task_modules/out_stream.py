@@ -198,13 +198,7 @@ class OutStream(object):
         if not self.debug_mode:
             val = ctypes.c_uint()
 
-            cfunc = lib_importer.windll.DAQmxGetWriteDigitalLinesBytesPerChan
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle,
-                            ctypes.POINTER(ctypes.c_uint)]
+            cfunc = lib_importer.functions.DAQmxGetWriteDigitalLinesBytesPerChan
 
             error_code = cfunc(
                 self._handle, ctypes.byref(val))
@@ -785,6 +779,9 @@ class OutStream(object):
         :class:`nidaqmx.constants.RegenerationMode`: Specifies whether
             to allow NI-DAQmx to generate the same data multiple times.
         """
+        if self.debug_mode:
+            return self._task._simulated.regen_mode
+
         val = ctypes.c_int()
 
         cfunc = lib_importer.windll.DAQmxGetWriteRegenMode
@@ -802,6 +799,10 @@ class OutStream(object):
 
     @regen_mode.setter
     def regen_mode(self, val):
+        if self.debug_mode:
+            self._task._simulated.regen_mode = val
+            return
+
         val = val.value
         cfunc = lib_importer.windll.DAQmxSetWriteRegenMode
         if cfunc.argtypes is None:
@@ -816,6 +817,11 @@ class OutStream(object):
 
     @regen_mode.deleter
     def regen_mode(self):
+        if self.debug_mode:
+            self._task._simulated.regen_mode = (
+                RegenerationMode.ALLOW_REGENERATION)
+            return
+
         cfunc = lib_importer.windll.DAQmxResetWriteRegenMode
         if cfunc.argtypes is None:
             with cfunc.arglock:
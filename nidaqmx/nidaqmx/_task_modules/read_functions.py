@@ -17,16 +17,7 @@ def _read_analog_f_64(
         fill_mode=FillMode.GROUP_BY_CHANNEL):
     samps_per_chan_read = ctypes.c_int()
 
-    cfunc = lib_importer.windll.DAQmxReadAnalogF64
-    if cfunc.argtypes is None:
-        with cfunc.arglock:
-            if cfunc.argtypes is None:
-                cfunc.argtypes = [
-                    lib_importer.task_handle, ctypes.c_int, ctypes.c_double,
-                    c_bool32,
-                    wrapped_ndpointer(dtype=numpy.float64, flags=('C', 'W')),
-                    ctypes.c_uint, ctypes.POINTER(ctypes.c_int),
-                    ctypes.POINTER(c_bool32)]
+    cfunc = lib_importer.functions.DAQmxReadAnalogF64
 
     error_code = cfunc(
         task_handle, num_samps_per_chan, timeout, fill_mode.value,
@@ -262,7 +253,7 @@ def _read_digital_lines(
                 cfunc.argtypes = [
                     lib_importer.task_handle, ctypes.c_int, ctypes.c_double,
                     ctypes.c_int,
-                    wrapped_ndpointer(dtype=numpy.bool, flags=('C', 'W')),
+                    wrapped_ndpointer(dtype=numpy.bool_, flags=('C', 'W')),
                     ctypes.c_uint, ctypes.POINTER(ctypes.c_int),
                     ctypes.POINTER(ctypes.c_int), ctypes.POINTER(c_bool32)]
 
@@ -30,9 +30,10 @@ class Timing(object):
     """
     Represents the timing configurations for a DAQmx task.
     """
-    def __init__(self, task_handle, debug_mode = False):
+    def __init__(self, task_handle, debug_mode = False, simulated=None):
         self.debug_mode = debug_mode
         self._handle = task_handle
+        self._simulated = simulated
 
     @property
     def ai_conv_active_edge(self):
@@ -3022,8 +3023,8 @@ class Timing(object):
                 print("User did not specify sampling rate.")
                 return -1
             else:
-                # TODO: Determine optimal means of simulating sample clock behaviour 
-                # Perhaps using a separate thread that executes a list of samples per sampling_rate
-                # print("timing - Clock rate configures successfully.")
+                if self._simulated is not None:
+                    self._simulated.configure_timing(
+                        rate, sample_mode, samps_per_chan)
                 return 0    
 
@@ -20,8 +20,10 @@ class StartTrigger(object):
     """
     Represents the start trigger configurations for a DAQmx task.
     """
-    def __init__(self, task_handle):
+    def __init__(self, task_handle, debug_mode=False, simulated=None):
         self._handle = task_handle
+        self._debug_mode = debug_mode
+        self._simulated = simulated
 
     @property
     def anlg_edge_coupling(self):
@@ -1488,6 +1490,9 @@ class StartTrigger(object):
         str: Specifies the name of a terminal where there is a digital
             signal to use as the source of the Start Trigger.
         """
+        if self._debug_mode:
+            return self._simulated.trigger_source or ''
+
         cfunc = lib_importer.windll.DAQmxGetDigEdgeStartTrigSrc
         if cfunc.argtypes is None:
             with cfunc.arglock:
@@ -1774,6 +1779,9 @@ class StartTrigger(object):
             for the task. This property does not return the name of the
             trigger source terminal.
         """
+        if self._debug_mode:
+            return self._simulated.start_trigger_term
+
         cfunc = lib_importer.windll.DAQmxGetStartTrigTerm
         if cfunc.argtypes is None:
             with cfunc.arglock:
@@ -1808,6 +1816,11 @@ class StartTrigger(object):
         :class:`nidaqmx.constants.TriggerType`: Specifies the type of
             trigger to use to start a task.
         """
+        if self._debug_mode:
+            if self._simulated.trigger_source is None:
+                return TriggerType.NONE
+            return TriggerType.DIGITAL_EDGE
+
         val = ctypes.c_int()
 
         cfunc = lib_importer.windll.DAQmxGetStartTrigType
@@ -1933,6 +1946,10 @@ class StartTrigger(object):
                 on which edge of the digital signal to start acquiring
                 or generating samples.
         """
+        if self._debug_mode:
+            self._simulated.cfg_start_trigger(trigger_source)
+            return
+
         cfunc = lib_importer.windll.DAQmxCfgDigEdgeStartTrig
         if cfunc.argtypes is None:
             with cfunc.arglock:
@@ -1980,6 +1997,10 @@ class StartTrigger(object):
         Configures the task to start acquiring or generating samples
         immediately upon starting the task.
         """
+        if self._debug_mode:
+            self._simulated.cfg_start_trigger(None)
+            return
+
         cfunc = lib_importer.windll.DAQmxDisableStartTrig
         if cfunc.argtypes is None:
             with cfunc.arglock:
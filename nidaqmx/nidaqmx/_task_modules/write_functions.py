@@ -15,15 +15,7 @@ def _write_analog_f_64(
         data_layout=FillMode.GROUP_BY_CHANNEL):
     samps_per_chan_written = ctypes.c_int()
 
-    cfunc = lib_importer.windll.DAQmxWriteAnalogF64
-    if cfunc.argtypes is None:
-        with cfunc.arglock:
-            if cfunc.argtypes is None:
-                cfunc.argtypes = [
-                    lib_importer.task_handle, ctypes.c_int, c_bool32,
-                    ctypes.c_double, ctypes.c_int,
-                    wrapped_ndpointer(dtype=numpy.float64, flags=('C', 'W')),
-                    ctypes.POINTER(ctypes.c_int), ctypes.POINTER(c_bool32)]
+    cfunc = lib_importer.functions.DAQmxWriteAnalogF64
 
     error_code = cfunc(
         task_handle, num_samps_per_chan, auto_start, timeout,
@@ -197,15 +189,7 @@ def _write_digital_u_32(
         data_layout=FillMode.GROUP_BY_CHANNEL):
     samps_per_chan_written = ctypes.c_int()
 
-    cfunc = lib_importer.windll.DAQmxWriteDigitalU32
-    if cfunc.argtypes is None:
-        with cfunc.arglock:
-            if cfunc.argtypes is None:
-                cfunc.argtypes = [
-                    lib_importer.task_handle, ctypes.c_int, c_bool32,
-                    ctypes.c_double, ctypes.c_int,
-                    wrapped_ndpointer(dtype=numpy.uint32, flags=('C', 'W')),
-                    ctypes.POINTER(ctypes.c_int), ctypes.POINTER(c_bool32)]
+    cfunc = lib_importer.functions.DAQmxWriteDigitalU32
 
     error_code = cfunc(
         task_handle, num_samps_per_chan, auto_start, timeout,
@@ -235,15 +219,7 @@ def _write_digital_lines(
         data_layout=FillMode.GROUP_BY_CHANNEL):
     samps_per_chan_written = ctypes.c_int()
 
-    cfunc = lib_importer.windll.DAQmxWriteDigitalLines
-    if cfunc.argtypes is None:
-        with cfunc.arglock:
-            if cfunc.argtypes is None:
-                cfunc.argtypes = [
-                    lib_importer.task_handle, ctypes.c_int, c_bool32,
-                    ctypes.c_double, ctypes.c_int,
-                    wrapped_ndpointer(dtype=numpy.bool, flags=('C', 'W')),
-                    ctypes.POINTER(ctypes.c_int), ctypes.POINTER(c_bool32)]
+    cfunc = lib_importer.functions.DAQmxWriteDigitalLines
 
     error_code = cfunc(
         task_handle, num_samps_per_chan, auto_start, timeout,
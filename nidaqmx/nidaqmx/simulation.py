@@ -0,0 +1,344 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import threading
+import time
+
+import numpy
+
+from nidaqmx.constants import AcquisitionType, RegenerationMode
+from nidaqmx.error_codes import DAQmxErrors
+from nidaqmx.errors import DaqError
+
+__all__ = ['SimulatedBackend', 'SimulatedStream', 'MonotonicClock',
+           'backend_for', 'default_backend']
+
+
+class MonotonicClock(object):
+    """
+    Wall-clock time source of the simulated backend.
+    """
+    def time(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class SimulatedStream(object):
+    """
+    Output stream of one simulated task.
+
+    Written samples are queued in a buffer and generated against a virtual
+    sample clock: sample n of a generation started at t0 is output at
+    t0 + n / rate. Generated samples are recorded with their timestamps.
+
+    Finite generations stop after samps_per_chan samples. Continuous
+    generations run until stopped; when the buffer runs dry they either
+    regenerate the last written block (RegenerationMode.ALLOW_REGENERATION)
+    or underflow, which stops the generation and is reported by the next
+    write or is_done call, as the driver does.
+
+    A stream with a digital edge start trigger is armed when it is started
+    and begins generating when the stream whose start_trigger_term it
+    listens to starts, on the same sample clock edge. A trigger that fired
+    before the stream was armed is missed, as on hardware.
+    """
+    def __init__(self, name, backend):
+        self.name = name
+        self.backend = backend
+        self.rate = None
+        self.sample_mode = AcquisitionType.FINITE
+        self.samps_per_chan = 1000
+        self.regen_mode = RegenerationMode.ALLOW_REGENERATION
+        self.running = False
+        self.armed = False
+        self.trigger_source = None
+        self.start_time = None
+        self.starts = []
+        self.underflows = []
+        self.writes = 0
+        self.samples_written = 0
+        self.samples_dropped = 0
+        self._error = None
+        self._pending = collections.deque()
+        self._pending_samples = 0
+        self._last_block = None
+        self._generated = 0
+        self._times = []
+        self._samples = []
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return 'SimulatedStream(name={0})'.format(self.name)
+
+    def configure_timing(self, rate, sample_mode=AcquisitionType.FINITE,
+                         samps_per_chan=1000):
+        with self._lock:
+            self.rate = float(rate)
+            self.sample_mode = sample_mode
+            self.samps_per_chan = samps_per_chan
+
+    @property
+    def start_trigger_term(self):
+        """
+        str: Terminal of the start trigger of this stream.
+        """
+        return '/{0}/StartTrigger'.format(self.name)
+
+    def cfg_start_trigger(self, trigger_source):
+        """
+        Start generating on the start of the stream whose start_trigger_term
+        is trigger_source instead of on start(); None disables the trigger.
+        """
+        with self._lock:
+            self.trigger_source = trigger_source
+
+    def start(self):
+        with self._lock:
+            self.update()
+            if self.running:
+                return
+            self._error = None
+            self.running = True
+            self._generated = 0
+            if self.trigger_source is not None:
+                self.armed = True
+                self.start_time = None
+            else:
+                self._begin(self.backend.now())
+
+    def _begin(self, start_time):
+        with self._lock:
+            self.armed = False
+            self.start_time = start_time
+            self.starts.append(start_time)
+        self.backend.fire(self.start_trigger_term, start_time)
+
+    def stop(self):
+        """
+        Stop generating. Samples still in the buffer are discarded.
+        """
+        with self._lock:
+            self.update()
+            self.running = False
+            self.armed = False
+            self.samples_dropped += self._pending_samples
+            self._pending.clear()
+            self._pending_samples = 0
+
+    def write(self, data, auto_start=False):
+        """
+        Queue samples for generation.
+
+        Args:
+            data (numpy.ndarray): (number of channels, samples per channel).
+            auto_start (bool): Start the generation if it is not running.
+        Returns:
+            int: Number of samples per channel written.
+        """
+        with self._lock:
+            self.update()
+            self._raise_error()
+            data = numpy.array(data, ndmin=2, copy=True)
+            self._pending.append(data)
+            self._pending_samples += data.shape[1]
+            self._last_block = data
+            self.writes += 1
+            self.samples_written += data.shape[1]
+            if auto_start and not self.running:
+                self.start()
+            return data.shape[1]
+
+    def is_done(self):
+        with self._lock:
+            self.update()
+            self._raise_error()
+            return not self.running or (
+                self.sample_mode == AcquisitionType.FINITE and
+                self._generated >= self.samps_per_chan)
+
+    def update(self, now=None):
+        """
+        Generate every sample that is due at time now.
+        """
+        with self._lock:
+            if not self.running or self.armed or not self.rate:
+                return
+            if now is None:
+                now = self.backend.now()
+            due = int(numpy.floor((now - self.start_time) * self.rate + 1e-9)) + 1
+            if self.sample_mode == AcquisitionType.FINITE:
+                due = min(due, self.samps_per_chan)
+            while self._generated < due:
+                if not self._pending:
+                    if (self.regen_mode == RegenerationMode.ALLOW_REGENERATION and
+                            self._last_block is not None):
+                        self._pending.append(self._last_block)
+                        self._pending_samples += self._last_block.shape[1]
+                        continue
+                    self._underflow()
+                    break
+                block = self._pending[0]
+                n = min(block.shape[1], due - self._generated)
+                if n == block.shape[1]:
+                    self._pending.popleft()
+                else:
+                    self._pending[0] = block[:, n:]
+                    block = block[:, :n]
+                self._pending_samples -= n
+                self._samples.append(block)
+                self._times.append(
+                    self.start_time +
+                    (self._generated + numpy.arange(n)) / self.rate)
+                self._generated += n
+
+    def _underflow(self):
+        time_of_underflow = self.start_time + self._generated / self.rate
+        self.underflows.append(time_of_underflow)
+        self.running = False
+        if self.backend.raise_on_underflow:
+            self._error = DaqError(
+                'The generation has stopped to prevent the regeneration of '
+                'old samples. Your application was unable to write samples to '
+                'the background buffer fast enough to prevent old samples '
+                'from being regenerated.\n\nTime: {0}'.format(time_of_underflow),
+                DAQmxErrors.GEN_STOPPED_TO_PREVENT_REGEN_OF_OLD_SAMPLES.value,
+                task_name=self.name)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    @property
+    def times(self):
+        """
+        numpy.ndarray: Time at which each recorded sample was generated.
+        """
+        with self._lock:
+            self.update()
+            if not self._times:
+                return numpy.zeros(0)
+            self._times = [numpy.concatenate(self._times)]
+            return self._times[0]
+
+    @property
+    def samples(self):
+        """
+        numpy.ndarray: Recorded samples, (number of channels, samples).
+        """
+        with self._lock:
+            self.update()
+            if not self._samples:
+                return numpy.zeros((0, 0))
+            self._samples = [numpy.concatenate(self._samples, axis=1)]
+            return self._samples[0]
+
+    def clear_record(self):
+        with self._lock:
+            self._times = []
+            self._samples = []
+
+
+class SimulatedBackend(object):
+    """
+    Simulated NI-DAQmx driver. Pass an instance as a task's debug_mode to
+    record what the task generates; debug_mode=True uses the shared
+    default_backend().
+
+    Attributes:
+        clock: Time source, any object with time() and sleep(seconds).
+        raise_on_underflow (bool): Report buffer underflows with a DaqError.
+        streams: Stream of each task, by task name.
+    """
+    def __init__(self, clock=None, raise_on_underflow=True):
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.raise_on_underflow = raise_on_underflow
+        self.streams = collections.OrderedDict()
+
+    def __bool__(self):
+        return True
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return 'SimulatedBackend(clock={0!r})'.format(self.clock)
+
+    def __getitem__(self, task_name):
+        return self.streams[task_name]
+
+    def now(self):
+        return self.clock.time()
+
+    def sleep(self, seconds):
+        self.clock.sleep(seconds)
+
+    def create_stream(self, task_name):
+        """
+        Create the stream of a new task, replacing any earlier task of the same name.
+        """
+        stream = SimulatedStream(task_name, self)
+        self.streams[task_name] = stream
+        return stream
+
+    def fire(self, trigger_term, time):
+        """
+        Start the streams armed on trigger_term, at time.
+        """
+        for stream in list(self.streams.values()):
+            if stream.armed and stream.trigger_source == trigger_term:
+                stream._begin(time)
+
+    def start_skew(self, reference, task_name):
+        """
+        Delay of each start of a task after the matching start of a
+        reference task, in seconds. Zero when both generations began on
+        the same sample clock edge.
+
+        Args:
+            reference (str): Name of the reference task.
+            task_name (str): Name of the task.
+        Returns:
+            numpy.ndarray: Skew of each pair of starts.
+        """
+        reference_starts = self.streams[reference].starts
+        starts = self.streams[task_name].starts
+        n = min(len(reference_starts), len(starts))
+        return numpy.subtract(starts[:n], reference_starts[:n])
+
+    def update(self):
+        """
+        Generate the samples that are due on every stream.
+        """
+        now = self.now()
+        for stream in self.streams.values():
+            stream.update(now)
+
+
+_default_backend = None
+_default_lock = threading.Lock()
+
+
+def default_backend():
+    """
+    The backend shared by tasks created with debug_mode=True.
+    """
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            _default_backend = SimulatedBackend()
+    return _default_backend
+
+
+def backend_for(debug_mode):
+    """
+    The SimulatedBackend a task created with this debug_mode runs on.
+    """
+    if isinstance(debug_mode, SimulatedBackend):
+        return debug_mode
+    return default_backend()
@@ -237,6 +237,9 @@ class AnalogSingleChannelWriter(ChannelWriterBase):
         auto_start = (self._auto_start if self._auto_start is not 
                       AUTO_START_UNSET else False)
 
+        if self._task.debug_mode:
+            return self._task._simulated.write(data, auto_start)
+
         return _write_analog_f_64(
             self._handle, data, data.shape[0], auto_start, timeout)
 
@@ -320,6 +323,9 @@ class AnalogMultiChannelWriter(ChannelWriterBase):
         auto_start = (self._auto_start if self._auto_start is not 
                       AUTO_START_UNSET else False)
 
+        if self._task.debug_mode:
+            return self._task._simulated.write(data, auto_start)
+
         return _write_analog_f_64(
             self._handle, data, data.shape[1], auto_start, timeout)
 
@@ -933,6 +939,9 @@ class DigitalSingleChannelWriter(ChannelWriterBase):
         auto_start = (self._auto_start if self._auto_start is not 
                       AUTO_START_UNSET else False)
 
+        if self._task.debug_mode:
+            return self._task._simulated.write(data, auto_start)
+
         return _write_digital_u_32(
             self._handle, data, data.shape[0], auto_start, timeout)
 
@@ -990,7 +999,7 @@ class DigitalSingleChannelWriter(ChannelWriterBase):
         auto_start = (self._auto_start if self._auto_start is not 
                       AUTO_START_UNSET else True)
         
-        numpy_array = numpy.asarray([data], dtype=numpy.bool)
+        numpy_array = numpy.asarray([data], dtype=numpy.bool_)
 
         return _write_digital_lines(
             self._handle, numpy_array, 1, auto_start, timeout)
@@ -1234,6 +1243,9 @@ class DigitalMultiChannelWriter(ChannelWriterBase):
         auto_start = (self._auto_start if self._auto_start is not 
                       AUTO_START_UNSET else False)
 
+        if self._task.debug_mode:
+            return self._task._simulated.write(data, auto_start)
+
         return _write_digital_u_32(
             self._handle, data, data.shape[1], auto_start, timeout)
 
@@ -5,7 +5,10 @@ from __future__ import unicode_literals
 
 import ctypes
 import six
-from collections import Sequence
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
 from nidaqmx._lib import lib_importer, ctypes_byte_str
 from nidaqmx.errors import (
@@ -44,6 +44,7 @@ from nidaqmx.errors import (
     check_for_error, is_string_buffer_too_small, DaqError, DaqResourceWarning)
 from nidaqmx.system.device import Device
 from nidaqmx.types import CtrFreq, CtrTick, CtrTime
+from nidaqmx.simulation import backend_for
 from nidaqmx.utils import unflatten_channel_string, flatten_channel_string
 
 __all__ = ['Task']
@@ -82,10 +83,17 @@ class Task(object):
                 after you are finished with the task. Otherwise, NI-DAQmx
                 attempts to create multiple tasks with the same name, which
                 results in an error.
+            debug_mode (Optional[bool]): Run the task on a simulated
+                driver instead of NI-DAQmx. Pass a
+                nidaqmx.simulation.SimulatedBackend to choose the backend
+                that records the samples the task generates.
         """
         self.debug_mode = debug_mode
+        self._channel_cache = {}
         self.task_channels = []
         self._duty_cycle = None
+        self._simulated = None
+        self._queried_name = None
         if not self.debug_mode:
             if not (len(new_task_name)  > 0):
                 new_task_name = "Task"
@@ -115,6 +123,7 @@ class Task(object):
                 self._name = new_task_name
             self._handle = ctypes.c_uint
             Channel.debug_mode = self.debug_mode
+            self._simulated = backend_for(debug_mode).create_stream(self._name)
             # print("Handle", self._handle)
             self._initialize(self._handle)
             error_code = 0
@@ -167,9 +176,11 @@ class Task(object):
     @task_channels.setter
     def task_channels(self, x):
         self._task_channels = x
+        self._channel_cache.clear()
 
     def add_task_channel(self, channel):
         self.task_channels.append(channel)
+        self._channel_cache.clear()
         # print("Added task channel:\t" + str(channel) + "\n")
 
     @property
@@ -178,32 +189,11 @@ class Task(object):
         str: Indicates the name of the task.
         """
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxGetTaskName
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle, ctypes.c_char_p,
-                            ctypes.c_uint]
-
-            temp_size = 0
-            while True:
-                val = ctypes.create_string_buffer(temp_size)
-
-                size_or_code = cfunc(
-                    self._handle, val, temp_size)
-
-                if is_string_buffer_too_small(size_or_code):
-                    # Buffer size must have changed between calls; check again.
-                    temp_size = 0
-                elif size_or_code > 0 and temp_size == 0:
-                    # Buffer size obtained, use to retrieve data.
-                    temp_size = size_or_code
-                else:
-                    break
-            check_for_error(size_or_code)
-
-            return val.value.decode('ascii')    # Expects string generated of char bytes array.
+            # The name of a task cannot change once it is created.
+            if self._queried_name is None:
+                self._queried_name = self._get_string(
+                    lib_importer.functions.DAQmxGetTaskName)
+            return self._queried_name
         else:
             # print("Task.name in debug mode:\t" + self._name)
             return self._name
@@ -220,31 +210,7 @@ class Task(object):
             a channel object that represents the entire list of virtual 
             channels in this task.
         """
-        if not self.debug_mode:
-            return Channel._factory(
-                self._handle, flatten_channel_string(self.channel_names))
-        else:
-            channels = ""
-            if (len(self.channel_names) > 1):
-                for channel in self.channel_names:
-                    channels += str(channel)
-                    channels += ","
-            else:
-                # print("task.channels - default 0 index channel obj\n" + \
-                #     str(datetime.now()))
-                channels = str(self.channel_names[0])
-            # print("\ntask.channels - channel factory entry\n" + \
-            #     str(datetime.now()))
-            if (self.do_channels.num_channels > 0):
-                Channel.channel_type = self.do_channels.channel_type
-                return Channel._factory(
-                    self._handle, channels, self.debug_mode, self.do_channels.channel_type)
-            elif (self.ao_channels.num_channels > 0):
-                Channel.channel_type = self.ao_channels.channel_type
-                # print("ANALOG:\t" + str(Channel.channel_type))
-                return Channel._factory(
-                    self._handle, channels, self.debug_mode, self.ao_channels.channel_type)
-            # return channels
+        return self._channel_info()['channels']
 
     @property
     def channel_names(self):
@@ -252,33 +218,7 @@ class Task(object):
         List[str]: Indicates the names of all virtual channels in the task.
         """
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxGetTaskChannels
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle, ctypes.c_char_p,
-                            ctypes.c_uint]
-
-            temp_size = 0
-            while True:
-                val = ctypes.create_string_buffer(temp_size)
-
-                size_or_code = cfunc(
-                    self._handle, val, temp_size)
-
-                if is_string_buffer_too_small(size_or_code):
-                    # Buffer size must have changed between calls; check again.
-                    temp_size = 0
-                elif size_or_code > 0 and temp_size == 0:
-                    # Buffer size obtained, use to retrieve data.
-                    temp_size = size_or_code
-                else:
-                    break
-
-            check_for_error(size_or_code)
-
-            return unflatten_channel_string(val.value.decode('ascii'))
+            return list(self._channel_info()['names'])
         else:
             # print("task.channel_names - about to print tasks added manually")
             channels = []
@@ -301,12 +241,7 @@ class Task(object):
         if not self.debug_mode:
             val = ctypes.c_uint()
 
-            cfunc = lib_importer.windll.DAQmxGetTaskNumChans
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle, ctypes.POINTER(ctypes.c_uint)]
+            cfunc = lib_importer.functions.DAQmxGetTaskNumChans
 
             error_code = cfunc(
                 self._handle, ctypes.byref(val))
@@ -479,12 +414,17 @@ class Task(object):
         self._co_channels = COChannelCollection(task_handle)
         self._di_channels = DIChannelCollection(task_handle)
         self._do_channels = DOChannelCollection(task_handle, self.debug_mode, ChannelType.DIGITAL_OUTPUT)
+        for collection in (self._ai_channels, self._ao_channels,
+                           self._ci_channels, self._co_channels,
+                           self._di_channels, self._do_channels):
+            collection._channel_cache = self._channel_cache
         # if (self.debug_mode):
         #     self.do_channels.debug_mode = self.debug_mode
         self._export_signals = ExportSignals(task_handle)
         self._in_stream = InStream(self)
-        self._timing = Timing(task_handle, self.debug_mode)
-        self._triggers = Triggers(task_handle)
+        self._timing = Timing(task_handle, self.debug_mode, self._simulated)
+        self._triggers = Triggers(
+            task_handle, self.debug_mode, self._simulated)
         self._out_stream = OutStream(self, self.debug_mode)
 
         # These lists keep C callback objects in memory as ctypes doesn't.
@@ -495,6 +435,93 @@ class Task(object):
         self._every_n_acquired_event_callbacks = []
         self._signal_event_callbacks = []
 
+    def _get_string(self, cfunc):
+        """
+        Queries a string property of the task from NI-DAQmx.
+
+        Args:
+            cfunc: Specifies the DAQmx getter, which takes the task
+                handle, a string buffer and the size of the buffer.
+        Returns:
+            str: Indicates the value of the property.
+        """
+        temp_size = 0
+        while True:
+            val = ctypes.create_string_buffer(temp_size)
+
+            size_or_code = cfunc(
+                self._handle, val, temp_size)
+
+            if is_string_buffer_too_small(size_or_code):
+                # Buffer size must have changed between calls; check again.
+                temp_size = 0
+            elif size_or_code > 0 and temp_size == 0:
+                # Buffer size obtained, use to retrieve data.
+                temp_size = size_or_code
+            else:
+                break
+
+        check_for_error(size_or_code)
+
+        return val.value.decode('ascii')
+
+    def _debug_channels(self, channel_names):
+        """
+        Creates the Channel object of the channels added to the task in
+        debug mode.
+
+        Args:
+            channel_names (List): Specifies the channels added with
+                add_task_channel.
+        Returns:
+            nidaqmx._task_modules.channels.channel.Channel:
+
+            Indicates an object that represents the channels.
+        """
+        if len(channel_names) > 1:
+            channels = ",".join(str(channel) for channel in channel_names) + ","
+        else:
+            channels = str(channel_names[0])
+        if self.do_channels.num_channels > 0:
+            Channel.channel_type = self.do_channels.channel_type
+            return Channel._factory(
+                self._handle, channels, self.debug_mode, self.do_channels.channel_type)
+        elif self.ao_channels.num_channels > 0:
+            Channel.channel_type = self.ao_channels.channel_type
+            return Channel._factory(
+                self._handle, channels, self.debug_mode, self.ao_channels.channel_type)
+
+    def _channel_info(self):
+        """
+        Returns the names and type of the virtual channels in the task,
+        inspected once per set of channels.
+
+        The cache is shared with the channel collections of the task and
+        cleared whenever a channel is added, so writes reuse it instead
+        of inspecting the channels again. It also holds values derived
+        from the channels, such as the number of booleans per channel of
+        a digital write.
+
+        Returns:
+            dict: Indicates the number of channels, the channel names,
+            the Channel object representing all of them and its type.
+        """
+        info = self._channel_cache
+        if not info:
+            if not self.debug_mode:
+                names = unflatten_channel_string(self._get_string(
+                    lib_importer.functions.DAQmxGetTaskChannels))
+                channels = Channel._factory(
+                    self._handle, flatten_channel_string(names))
+                chan_type = channels.chan_type
+            else:
+                names = list(self.task_channels)
+                channels = self._debug_channels(names) if names else None
+                chan_type = getattr(channels, 'channel_type', None)
+            info.update(number_of_channels=len(names), names=names,
+                        channels=channels, chan_type=chan_type)
+        return info
+
     def _calculate_num_samps_per_chan(self, num_samps_per_chan):
         """
         Calculates the actual number of samples per channel to read.
@@ -546,6 +573,7 @@ class Task(object):
             error_code = cfunc(
                 self._handle, channels)
             check_for_error(error_code)
+            self._channel_cache.clear()
         else:
             return "channel1,channel2"
 
@@ -567,12 +595,7 @@ class Task(object):
                 'already closed.'.format(self._saved_name), DaqResourceWarning)
             return
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxClearTask
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle]
+            cfunc = lib_importer.functions.DAQmxClearTask
 
             error_code = cfunc(
                 self._handle)
@@ -580,6 +603,7 @@ class Task(object):
 
             self._handle = None
         else:
+            self._simulated.stop()
             print("Task is closed.")
             return 0
 
@@ -592,12 +616,7 @@ class Task(object):
                 the task state.
         """
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxTaskControl
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle, ctypes.c_int]
+            cfunc = lib_importer.functions.DAQmxTaskControl
 
             error_code = cfunc(
                 self._handle, action.value)
@@ -619,24 +638,14 @@ class Task(object):
         """
         if not self.debug_mode:
             is_task_done = c_bool32()
-            cfunc = lib_importer.windll.DAQmxIsTaskDone
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [
-                            lib_importer.task_handle, ctypes.POINTER(c_bool32)]
+            cfunc = lib_importer.functions.DAQmxIsTaskDone
 
             error_code = cfunc(
                 self._handle, ctypes.byref(is_task_done))
             check_for_error(error_code)
             return is_task_done.value
         else:
-            # TODO: Add additional safe-checks to verify a user instantiated a task object correctly.
-            if (len(self.channels)>0):
-                time.sleep(self.duty_cycle) # Stall execution for 10ms to reflect valve state switching.
-                return True
-            else:
-                return False
+            return self._simulated.is_done()
 
     def read(self, number_of_samples_per_channel=NUM_SAMPLES_UNSET,
              timeout=10.0):
@@ -749,7 +758,7 @@ class Task(object):
         elif (read_chan_type == ChannelType.DIGITAL_INPUT or
                 read_chan_type == ChannelType.DIGITAL_OUTPUT):
             if self.in_stream.di_num_booleans_per_chan == 1:
-                data = numpy.zeros(array_shape, dtype=numpy.bool)
+                data = numpy.zeros(array_shape, dtype=numpy.bool_)
                 samples_read = _read_digital_lines(
                     self._handle, data, number_of_samples_per_channel, timeout
                     ).samps_per_chan_read
@@ -1137,15 +1146,12 @@ class Task(object):
         performance of the application.
         """
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxStartTask
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [lib_importer.task_handle]
+            cfunc = lib_importer.functions.DAQmxStartTask
 
             error_code = cfunc(self._handle)
             check_for_error(error_code)
         else:
+            self._simulated.start()
             return 0
 
     def stop(self):
@@ -1161,17 +1167,13 @@ class Task(object):
         performance of the application.
         """
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxStopTask
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [lib_importer.task_handle]
+            cfunc = lib_importer.functions.DAQmxStopTask
 
             error_code = cfunc(self._handle)
             check_for_error(error_code)
         else:
-            if (self.is_task_done()):
-                return 0
+            self._simulated.stop()
+            return 0
 
     def wait_until_done(self, timeout=10.0):
         """
@@ -1190,11 +1192,7 @@ class Task(object):
                 an error if the measurement or generation is not done.
         """
         if not self.debug_mode:
-            cfunc = lib_importer.windll.DAQmxWaitUntilTaskDone
-            if cfunc.argtypes is None:
-                with cfunc.arglock:
-                    if cfunc.argtypes is None:
-                        cfunc.argtypes = [lib_importer.task_handle, ctypes.c_double]
+            cfunc = lib_importer.functions.DAQmxWaitUntilTaskDone
 
             error_code = cfunc(self._handle, timeout)
             check_for_error(error_code)
@@ -1298,9 +1296,10 @@ class Task(object):
         """
         if not self.debug_mode:
             # print("task.write() ABOUT TO WRITE")
-            channels_to_write = self.channels
-            number_of_channels = len(channels_to_write.channel_names)
-            write_chan_type = channels_to_write.chan_type
+            channel_info = self._channel_info()
+            channels_to_write = channel_info['channels']
+            number_of_channels = channel_info['number_of_channels']
+            write_chan_type = channel_info['chan_type']
 
             element = None
             if number_of_channels == 1:
@@ -1368,7 +1367,10 @@ class Task(object):
 
             # Digital Input
             elif write_chan_type == ChannelType.DIGITAL_OUTPUT:
-                if self.out_stream.do_num_booleans_per_chan == 1:
+                if 'do_num_booleans_per_chan' not in channel_info:
+                    channel_info['do_num_booleans_per_chan'] = (
+                        self.out_stream.do_num_booleans_per_chan)
+                if channel_info['do_num_booleans_per_chan'] == 1:
                     if (not isinstance(element, bool) and
                             not isinstance(element, numpy.bool_)):
                         raise DaqError(
@@ -1378,7 +1380,7 @@ class Task(object):
                             'Requested sample type: {0}'.format(type(element)),
                             DAQmxErrors.UNKNOWN.value, task_name=self._name)
 
-                    data = numpy.asarray(data, dtype=numpy.bool)
+                    data = numpy.asarray(data, dtype=numpy.bool_)
                     return _write_digital_lines(
                         self._handle, data, number_of_samples_per_channel,
                         auto_start, timeout)
@@ -1452,13 +1454,16 @@ class Task(object):
                     DAQmxErrors.WRITE_NO_OUTPUT_CHANS_IN_TASK.value,
                     task_name=self._name)
         else:
-            channels_to_write = self.channels
-            number_of_channels = len(channels_to_write.channel_names)
-            write_chan_type = channels_to_write.channel_type
+            channel_info = self._channel_info()
+            number_of_channels = channel_info['number_of_channels']
+            write_chan_type = channel_info['chan_type']
             # print("task.write.write_chan_type:\t" + str(write_chan_type))
             element = None
             # print("Number of data:\t" + str(len(data)))
             number_of_samples_per_channel = len(data)
+            if number_of_channels > 1 and number_of_samples_per_channel > 0:
+                # One row of samples per channel
+                number_of_samples_per_channel = numpy.size(data[0])
             if (number_of_samples_per_channel > 0):
                 # print("task.write num_samples > 0")
                 element = data[0]
@@ -1470,7 +1475,10 @@ class Task(object):
                 if write_chan_type == ChannelType.DIGITAL_OUTPUT:
                     # print("Attempt to write digital output")
                     # print(self.out_stream)
-                    if self.out_stream.do_num_booleans_per_chan == 1:
+                    if 'do_num_booleans_per_chan' not in channel_info:
+                        channel_info['do_num_booleans_per_chan'] = (
+                            self.out_stream.do_num_booleans_per_chan)
+                    if channel_info['do_num_booleans_per_chan'] == 1:
                         if (not isinstance(element, bool) and
                                 not isinstance(element, numpy.bool_)):
                             raise DaqError(
@@ -1479,7 +1487,7 @@ class Task(object):
                                 'channel in a task.\n\n'
                                 'Requested sample type: {0}'.format(type(element)),
                                 DAQmxErrors.UNKNOWN.value, task_name=self._name)
-                        data = numpy.asarray(data, dtype=numpy.bool)
+                        data = numpy.asarray(data, dtype=numpy.bool_)
                         # print("write_digital_lines")
                         # return _write_digital_lines(
                             # self._handle, data, number_of_samples_per_channel,
@@ -1505,4 +1513,8 @@ class Task(object):
                 # print("ANALOG DATA received & written:\n", data)
                 # return _write_analog_f_64(
                 #     self._handle, data, number_of_samples_per_channel, auto_start,
-                #     timeout)
\ No newline at end of file
+                #     timeout)
+            if auto_start is AUTO_START_UNSET:
+                auto_start = number_of_samples_per_channel <= 1
+            return self._simulated.write(
+                numpy.reshape(data, (number_of_channels, -1)), auto_start)
@@ -0,0 +1,58 @@
+import ctypes
+import ctypes.util
+
+import pytest
+
+from nidaqmx._lib import (
+    DaqFunctionImporter, DaqFunctionTable, DaqLibImporter,
+    TASK_FUNCTION_PROTOTYPES)
+
+
+@pytest.fixture
+def importer():
+    """
+    Importer of the C library in place of NI-DAQmx.
+    """
+    libc = ctypes.util.find_library('c')
+    if libc is None:
+        pytest.skip('The C library could not be found.')
+    importer = DaqLibImporter()
+    importer._windll = DaqFunctionImporter(ctypes.CDLL(libc))
+    importer._task_handle = ctypes.c_void_p
+    return importer
+
+
+class TestDaqFunctionTable(object):
+    """
+    Contains a collection of pytest tests that validate the table of
+    prebound NI-DAQmx functions.
+    """
+
+    def test_function_bound_once(self, importer):
+        calls = []
+
+        def labs_prototype(lib):
+            calls.append(lib)
+            return [ctypes.c_long]
+
+        table = DaqFunctionTable(importer, {'labs': labs_prototype})
+        cfunc = table.labs
+        cfunc.restype = ctypes.c_long
+
+        assert cfunc.argtypes == [ctypes.c_long]
+        assert 'labs' in vars(table)
+        assert table.labs is cfunc
+        assert table.labs(-5) == 5
+        assert calls == [importer]
+
+    def test_function_without_prototype(self, importer):
+        table = DaqFunctionTable(importer, {})
+
+        with pytest.raises(AttributeError):
+            table.labs
+
+    def test_task_function_prototypes(self, importer):
+        for function, prototype in TASK_FUNCTION_PROTOTYPES.items():
+            argtypes = prototype(importer)
+            assert argtypes[0] is ctypes.c_void_p, function
+            assert all(a is not None for a in argtypes), function
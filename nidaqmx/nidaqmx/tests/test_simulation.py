@@ -0,0 +1,171 @@
+import numpy
+import pytest
+
+import nidaqmx
+from nidaqmx.constants import (
+    AcquisitionType, LineGrouping, RegenerationMode, TriggerType)
+from nidaqmx.error_codes import DAQmxErrors
+from nidaqmx.simulation import SimulatedBackend
+
+
+class ManualClock(object):
+    """
+    Clock that only advances when sleep is called.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def backend():
+    return SimulatedBackend(clock=ManualClock())
+
+
+class TestSimulatedBackend(object):
+    """
+    Contains a collection of pytest tests that validate the simulated
+    driver backend used by tasks in debug mode.
+    """
+
+    def test_finite_generation(self, backend):
+        stream = backend.create_stream('Finite')
+        stream.configure_timing(50, AcquisitionType.FINITE, 50)
+        stream.write(numpy.arange(50, dtype=numpy.uint32), auto_start=True)
+
+        backend.sleep(0.5)
+        assert stream.samples.shape == (1, 26)
+        assert not stream.is_done()
+        numpy.testing.assert_allclose(stream.times, numpy.arange(26) / 50)
+
+        backend.sleep(10)
+        assert stream.is_done()
+        numpy.testing.assert_array_equal(stream.samples[0], numpy.arange(50))
+        assert stream.underflows == []
+
+    def test_continuous_generation_regenerates(self, backend):
+        stream = backend.create_stream('Continuous')
+        stream.configure_timing(10, AcquisitionType.CONTINUOUS, 10)
+        stream.write(numpy.arange(10.0), auto_start=True)
+
+        backend.sleep(2.5)
+        assert not stream.is_done()
+        numpy.testing.assert_array_equal(
+            stream.samples[0], numpy.arange(26) % 10)
+        assert stream.underflows == []
+
+    def test_underflow(self, backend):
+        stream = backend.create_stream('Underflow')
+        stream.configure_timing(10, AcquisitionType.CONTINUOUS, 10)
+        stream.regen_mode = RegenerationMode.DONT_ALLOW_REGENERATION
+        stream.write(numpy.arange(10.0), auto_start=True)
+
+        backend.sleep(0.95)
+        assert not stream.is_done()
+        backend.sleep(0.1)
+        with pytest.raises(nidaqmx.DaqError) as e:
+            stream.write(numpy.arange(10.0))
+        assert (e.value.error_type ==
+                DAQmxErrors.GEN_STOPPED_TO_PREVENT_REGEN_OF_OLD_SAMPLES)
+        assert stream.underflows == [pytest.approx(1.0)]
+        assert stream.samples.shape == (1, 10)
+        assert stream.is_done()
+
+    def test_stop_drops_pending_samples(self, backend):
+        stream = backend.create_stream('Stop')
+        stream.configure_timing(10, AcquisitionType.FINITE, 100)
+        stream.write(numpy.arange(100.0), auto_start=True)
+
+        backend.sleep(0.45)
+        stream.stop()
+        assert stream.samples.shape == (1, 5)
+        assert stream.samples_dropped == 95
+        assert stream.is_done()
+
+    def test_task_records_samples(self, backend):
+        with nidaqmx.Task('DigitalTask', backend) as digital, \
+                nidaqmx.Task('AnalogTask', backend) as analog:
+            digital.add_task_channel(digital.do_channels.add_do_chan(
+                'Dev1/port0', name_to_assign_to_lines='digital_channel',
+                line_grouping=LineGrouping.CHAN_FOR_ALL_LINES))
+            for i in range(2):
+                analog.add_task_channel(analog.ao_channels.add_ao_voltage_chan(
+                    'Dev1/ao{0}'.format(i), 'analog_channel{0}'.format(i)))
+            for task in (digital, analog):
+                task.timing.cfg_samp_clk_timing(
+                    50, sample_mode=AcquisitionType.FINITE, samps_per_chan=50)
+                task.out_stream.regen_mode = (
+                    RegenerationMode.DONT_ALLOW_REGENERATION)
+
+            digital_values = numpy.arange(50, dtype=numpy.uint32)
+            analog_values = numpy.vstack([numpy.full(50, 1.0),
+                                          numpy.full(50, 2.0)])
+            assert digital.write(digital_values, auto_start=True) == 50
+            assert analog.write(analog_values, auto_start=True) == 50
+
+            backend.sleep(1)
+            assert digital.is_task_done() and analog.is_task_done()
+            numpy.testing.assert_array_equal(
+                backend['DigitalTask'].samples, digital_values[numpy.newaxis])
+            numpy.testing.assert_array_equal(
+                backend['AnalogTask'].samples, analog_values)
+            assert (backend['AnalogTask'].regen_mode ==
+                    RegenerationMode.DONT_ALLOW_REGENERATION)
+
+    def test_channel_metadata_cached_until_channel_added(self, backend):
+        with nidaqmx.Task('AnalogTask', backend) as analog:
+            analog.add_task_channel(analog.ao_channels.add_ao_voltage_chan(
+                'Dev1/ao0', 'analog_channel0'))
+            channels = analog.channels
+            assert analog.channels is channels
+            assert analog.write(numpy.full(10, 1.0), auto_start=True) == 10
+
+            analog.add_task_channel(analog.ao_channels.add_ao_voltage_chan(
+                'Dev1/ao1', 'analog_channel1'))
+            assert analog.channels is not channels
+            assert analog.write(numpy.ones((2, 10)), auto_start=True) == 10
+            assert backend['AnalogTask'].writes == 2
+
+    def test_start_trigger(self, backend):
+        with nidaqmx.Task('DigitalTask', backend) as digital, \
+                nidaqmx.Task('AnalogTask', backend) as analog:
+            digital.add_task_channel(digital.do_channels.add_do_chan(
+                'Dev1/port0', name_to_assign_to_lines='digital_channel'))
+            analog.add_task_channel(analog.ao_channels.add_ao_voltage_chan(
+                'Dev1/ao0', 'analog_channel0'))
+            for task in (digital, analog):
+                task.timing.cfg_samp_clk_timing(
+                    50, sample_mode=AcquisitionType.FINITE, samps_per_chan=50)
+            start_trigger = analog.triggers.start_trigger
+            start_trigger.cfg_dig_edge_start_trig(
+                digital.triggers.start_trigger.term)
+            assert start_trigger.trig_type == TriggerType.DIGITAL_EDGE
+            assert start_trigger.dig_edge_src == '/DigitalTask/StartTrigger'
+
+            # Armed, the analog task waits for the digital task to start
+            analog.write(numpy.full(50, 1.0), auto_start=True)
+            backend.sleep(0.5)
+            assert backend['AnalogTask'].starts == []
+            assert not analog.is_task_done()
+            digital.write(numpy.arange(50, dtype=numpy.uint32), auto_start=True)
+            backend.sleep(1)
+            numpy.testing.assert_array_equal(
+                backend.start_skew('DigitalTask', 'AnalogTask'), [0.0])
+            numpy.testing.assert_array_equal(
+                backend['AnalogTask'].times, backend['DigitalTask'].times)
+
+            # Without the trigger each task starts on its own write
+            start_trigger.disable_start_trig()
+            assert start_trigger.trig_type == TriggerType.NONE
+            for task in (digital, analog):
+                task.stop()
+            digital.write(numpy.arange(50, dtype=numpy.uint32), auto_start=True)
+            backend.sleep(0.25)
+            analog.write(numpy.full(50, 1.0), auto_start=True)
+            numpy.testing.assert_allclose(
+                backend.start_skew('DigitalTask', 'AnalogTask'), [0.0, 0.25])
@@ -1,4 +1,7 @@
-import collections
+try:
+    import collections.abc as collections
+except ImportError:
+    import collections
 import pytest
 import six
 
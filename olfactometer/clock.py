@@ -0,0 +1,74 @@
+"""Time sources for the olfactometer, so simulated sessions can run faster than real time."""
+
+import asyncio
+import threading
+import time
+
+
+class SystemClock:
+    """
+    Wall-clock time, used on hardware and for real-time simulations.
+
+    Attributes:
+        realtime (bool): Sleeping blocks for the requested time.
+    """
+    realtime = True
+
+    def time(self):
+        """Seconds on a monotonic clock."""
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        """Coroutine version of sleep, for the communicator's event loop."""
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated time that only advances when something sleeps on it or advance is called,
+    so a replay of an hour-long session produces the same sample streams in seconds.
+    Shared by the ValveDriver, the simulated nidaqmx backend (it has the same time/sleep
+    interface as nidaqmx.simulation.MonotonicClock) and the communicator.
+
+    A VirtualClock advances as fast as its callers sleep, so it should be driven from one
+    place, e.g. ValveDriver.run_for, rather than from free-running threads.
+
+    Attributes:
+        realtime (bool): Sleeping returns immediately.
+        sleeps: Number of sleep calls so far.
+    """
+    realtime = False
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+        self._lock = threading.Lock()
+        self.sleeps = 0
+
+    def __repr__(self):
+        return 'VirtualClock(%r)' % self._now
+
+    def time(self):
+        return self._now
+
+    def advance(self, seconds):
+        """Move time forward by seconds, returns the new time."""
+        if seconds < 0:
+            raise ValueError("Cannot move a clock backwards")
+        with self._lock:
+            self._now += seconds
+            return self._now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps += 1
+            if seconds > 0:
+                self._now += seconds
+
+    async def sleep_async(self, seconds):
+        # Yield to the event loop once so other tasks still get to run
+        self.sleep(seconds)
+        await asyncio.sleep(0)
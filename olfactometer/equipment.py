@@ -1,17 +1,20 @@
-from functools import lru_cache
 import math
-from numba import jit
 from pprint import pprint
 import numpy as np
-import pandas as pd
 import quantities as pq
+from olfactometer.lazy import lazy_jit
 from olfactometer.odorants import Molecule, GAS_MOLAR_DENSITY, fix_concs
 
 
 
 
 class Olfactometer:
-    """The whole olfactometer"""
+    """The whole olfactometer
+
+    Keeps a registry of the molecules loaded into its jars: an ordered tuple (the rows of
+    the optimizer's matrices) and a dict from molecule to row. It is built when jars are
+    connected and updated whenever a jar is refilled or its Solution changes.
+    """
     def __init__(self, jars, mfcs, data_container=None):
         """
         manifold: An equipment.Manifold instance
@@ -19,7 +22,6 @@ class Olfactometer:
         """                       
         self.connect_jars(jars)
         self.mfcs = mfcs               
-        self._loaded_cids = {}                        
         
     mfcs = None
     host = None
@@ -32,7 +34,42 @@ class Olfactometer:
     def connect_jars(self, jars):
         if isinstance(jars, list):
             jars = {i+1: jar for i, jar in enumerate(jars)}
+        for jar in getattr(self, 'jars', {}).values():
+            jar.remove_listener(self.jar_changed)
         self.jars = jars   
+        self._jar_molecules = {}
+        for station, jar in jars.items():
+            jar.add_listener(self.jar_changed)
+            self._jar_molecules[station] = self.jar_vapor_molecules(jar)
+        self.merge_loaded_molecules()
+
+    @staticmethod
+    def jar_vapor_molecules(jar):
+        """Molecules of a jar that have a vapor phase, in the order of its contents"""
+        if jar.contents is None:
+            return ()
+        return tuple(m for m in jar.contents.molecules if m.vapor_pressure)
+
+    def jar_changed(self, jar):
+        """Jar listener, re-merges the registry only if the jar's molecules changed."""
+        for station, connected in self.jars.items():
+            if connected is jar:
+                molecules = self.jar_vapor_molecules(jar)
+                if molecules != self._jar_molecules.get(station):
+                    self._jar_molecules[station] = molecules
+                    self.merge_loaded_molecules()
+
+    def merge_loaded_molecules(self):
+        """Rebuild the ordered molecule tuple and the row index from the per-jar molecules"""
+        rows = {}
+        for station in self.jars:
+            for molecule in self._jar_molecules[station]:
+                if molecule not in rows:
+                    rows[molecule] = len(rows)
+        self._loaded_molecules = tuple(rows)
+        self._molecule_rows = rows
+        self._cid_molecules = {molecule.cid: molecule for molecule in rows}
+        self._cid_rows = {molecule.cid: i for molecule, i in rows.items()}
     
     def mfc_flat_list(self, mfcs=None):
         if mfcs is None:
@@ -47,40 +84,45 @@ class Olfactometer:
 
     # Search through manifold jars by odorant id.
     def find_odorant_id_by_index(self, m_index):
-        return self.loaded_molecules[m_index]
+        return self._loaded_molecules[m_index]
     
     
     @property
     def loaded_molecules(self):
-        """Provide a list of molecules loaded into this olfactometer"""
-        res = [] #set()
-        for jar in self.jars.values():
-            for molecule in jar.contents.molecules:
-                if molecule.vapor_pressure:
-                    res.append(molecule)
-                    # print(f"Molecule:{molecule}")
-                    # if (molecule.cid not in self._loaded_cids):
-                        # self._loaded_cids[molecule.cid] = molecule            
-        # print("loaded_molecules", list(result))
-        results = []
-        [results.append(x) for x in res if x not in results]
-        return results
+        """Provide a tuple of molecules loaded into this olfactometer"""
+        return self._loaded_molecules
+
+    @property
+    def molecule_rows(self):
+        """Dict from each loaded molecule to its index in loaded_molecules"""
+        return self._molecule_rows
+
+    @property
+    def cid_rows(self):
+        """Dict from the CID of each loaded molecule to its index in loaded_molecules"""
+        return self._cid_rows
+
+    def molecule_index(self, molecule):
+        return self._molecule_rows[molecule]
 
     def cid_to_molecule(self, cid):
-        try:            
-            return self._loaded_cids[cid]
-        except AttributeError:            
-            for m in self.loaded_molecules:
-                if m.cid == cid:
-                    self._loaded_cids[cid] = m
-                    return m
-        raise Exception("CID %d not in loaded molecules" % cid)
+        try:
+            return self._cid_molecules[cid]
+        except KeyError:
+            raise Exception("CID %d not in loaded molecules" % cid)
+
+    def cid_index(self, cid):
+        """Row of the molecule with PubChem ID cid in loaded_molecules"""
+        try:
+            return self._cid_rows[cid]
+        except KeyError:
+            raise Exception("CID %d not in loaded molecules" % cid)
 
 
-@jit
+@lazy_jit
 def calc_conc_jit(variables, n_jars, max_flow_rates, A):
-    wA = variables[2:12]        # first 2 are MFCs, proceeding 10 are wAs
-    wB = variables[12:22]
+    wA = variables[2:2+n_jars]  # first 2 are MFCs, proceeding n_jars are wAs
+    wB = variables[2+n_jars:2+2*n_jars]
     fA = variables[0]
     fB = variables[1]
     fA = fA * max_flow_rates[0]
@@ -130,8 +172,13 @@ class Pneumatic:
 
 
 class Jar:
+    """
+    A jar holding one Solution. The vapor state of the headspace is cached per jar
+    and cleared whenever the contents are replaced or the Solution itself changes.
+    """
     def __init__(self, label):
         self.liquid_volume = 0 * pq.mL        
+        self._listeners = []
     vendor = None
     height = 0 * pq.cm
     diameter = 0 * pq.cm
@@ -139,6 +186,9 @@ class Jar:
     mixture = None
     liquid_volume = None
     _contents = None
+    # Cached vapor state, see vapor_concs
+    _vapor_concs = None
+    _vapor_concs_molar = None
 
     @property
     def contents(self):
@@ -146,8 +196,28 @@ class Jar:
     
     @contents.setter
     def contents(self, contents):
+        if self._contents is not None and hasattr(self._contents, 'remove_listener'):
+            self._contents.remove_listener(self.contents_changed)
         self._contents = contents
+        if hasattr(contents, 'add_listener'):
+            contents.add_listener(self.contents_changed)
         # Clear all pre-computed values once contents of jar change        
+        self.contents_changed(contents)
+
+    def contents_changed(self, contents=None):
+        """Clear the cached vapor state, called when the contents are replaced or modified."""
+        self._vapor_concs = None
+        self._vapor_concs_molar = None
+        for listener in list(self._listeners):
+            listener(self)
+
+    def add_listener(self, listener):
+        """Call listener(jar) whenever the contents of this jar change."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
     
     @property
     def density(self):
@@ -173,8 +243,9 @@ class Jar:
         """Rates of evaporation if vapor is cleared (e.g. by strong air flow)
         This is just the max evaporation rate for each molecule times its mole
         fraction in the solution"""
-        return {m: m.molar_evaporation_rate*mole_fraction*self.area.simplified
-                for m, mole_fraction in self.contents.mole_fractions.items()}
+        area = self.area.simplified
+        return {m: rate*area
+                for m, rate in self.contents.molar_evaporation_rates.items()}
 
     @property
     def max_vapor_flow_rates(self):
@@ -192,9 +263,17 @@ class Jar:
         return self.contents.vapor_fractions
     
     @property
-    @lru_cache(maxsize=16)
     def vapor_concs(self):
-        return self.contents.vapor_concentrations
+        if self._vapor_concs is None:
+            self._vapor_concs = self.contents.vapor_concentrations
+        return self._vapor_concs
+
+    @property
+    def vapor_concs_molar(self):
+        """Vapor concentrations of the headspace as plain floats in molar"""
+        if self._vapor_concs_molar is None:
+            self._vapor_concs_molar = self.contents.vapor_concentrations_molar
+        return self._vapor_concs_molar
     
     @property
     def vapor_molecules(self):
@@ -0,0 +1,96 @@
+import asyncio
+import numpy as np
+
+POLICIES = ('latest', 'merge')
+
+
+class FrameCoalescer:
+    """
+    Input stage between the socket readers and the optimizer.
+    Frames are pushed as soon as they are received; the optimizer pulls whenever it is
+    free and always gets the freshest target, so a slow solve never builds a backlog.
+
+    Policies:
+        latest: a new frame replaces the pending one, older frames are dropped.
+        merge: the most recent finite value is kept per odorant, so a frame may
+               carry NaN for odorants it does not want to change.
+
+    Attributes:
+        policy: One of POLICIES.
+        frames_received: Frames pushed into the coalescer.
+        frames_coalesced: Frames superseded before the optimizer consumed them.
+        frames_consumed: Frames handed to the optimizer.
+    """
+    def __init__(self, policy='latest'):
+        if policy not in POLICIES:
+            raise ValueError("Unknown coalescing policy '%s', expected one of %s" % (policy, POLICIES))
+        self.policy = policy
+        self.frames_received = 0
+        self.frames_coalesced = 0
+        self.frames_consumed = 0
+        self._pending = None
+        self._target = None
+        self._ready = asyncio.Event()
+
+    def put(self, frame):
+        """
+        Push a frame of log concentrations, superseding any frame not yet consumed.
+
+        Args:
+            frame (:obj:`numpy.ndarray`): One value per odorant.
+        """
+        self.frames_received += 1
+        if self._pending is not None:
+            self.frames_coalesced += 1
+        if self.policy == 'merge':
+            if self._target is None or len(self._target) != len(frame):
+                self._target = np.array(frame, dtype=float)
+            else:
+                updated = ~np.isnan(frame)
+                self._target[updated] = np.asarray(frame)[updated]
+            frame = self._target.copy()
+        self._pending = frame
+        self._ready.set()
+
+    async def get(self):
+        """
+        Wait for the next frame and consume it.
+
+        Returns:
+            :obj:`numpy.ndarray`: The freshest target.
+        """
+        await self._ready.wait()
+        return self.take()
+
+    def take(self, default=None):
+        """
+        Consume the pending frame without waiting.
+
+        Args:
+            default: Returned if no frame is pending.
+        """
+        frame = self._pending
+        if frame is None:
+            return default
+        self._pending = None
+        self._ready.clear()
+        self.frames_consumed += 1
+        return frame
+
+    def clear(self):
+        """
+        Drop the pending frame, and the merged target, without handing them to the optimizer.
+        """
+        self._pending = None
+        self._target = None
+        self._ready.clear()
+
+    @property
+    def pending(self):
+        return self._pending is not None
+
+    def stats(self):
+        return {'policy': self.policy,
+                'frames_received': self.frames_received,
+                'frames_coalesced': self.frames_coalesced,
+                'frames_consumed': self.frames_consumed}
@@ -0,0 +1,61 @@
+"""
+Decoding of the concentration frames sent by Unity.
+A frame is one little-endian double (log10 molar concentration) per odorant.
+"""
+import math
+import sys
+
+import numpy as np
+
+FRAME_DTYPE = np.dtype('<f8')
+MAX_EXPONENT = math.log10(sys.float_info.max)   # 10**x overflows from here on
+SCALAR_ANTILOG_LIMIT = 16   # Frames up to this size are converted value by value, see antilog
+
+
+def frame_size(n_odorants):
+    """Size in bytes of a frame carrying n_odorants concentrations."""
+    return n_odorants * FRAME_DTYPE.itemsize
+
+
+def decode_frame(data, n_odorants):
+    """
+    View a received frame as an array without copying or unpacking it.
+
+    Args:
+        data (bytes): Raw frame as read from the socket.
+        n_odorants (int): Number of odorants negotiated in the handshake.
+    Returns:
+        :obj:`numpy.ndarray`: Read-only view of the log10 concentrations.
+    """
+    return np.frombuffer(data, dtype=FRAME_DTYPE, count=n_odorants)
+
+
+def antilog(concentration_mixtures, out=None):
+    """
+    Convert log10 concentrations to molar concentrations.
+    Values that overflow (or are not finite to begin with) are masked to 0.
+
+    A frame of a handful of odorants is converted with Python floats: the fixed cost of the
+    numpy calls (and of entering np.errstate) is several times that of the arithmetic there.
+    Larger frames go through numpy.
+
+    Args:
+        concentration_mixtures: Log10 concentrations.
+        out (:obj:`numpy.ndarray`, optional): Preallocated output array.
+    Returns:
+        :obj:`numpy.ndarray`: Concentrations in molar.
+    """
+    if not isinstance(concentration_mixtures, np.ndarray):
+        concentration_mixtures = np.asarray(concentration_mixtures, dtype=float)
+    if concentration_mixtures.ndim == 1 and len(concentration_mixtures) <= SCALAR_ANTILOG_LIMIT:
+        # NaN fails the comparison, so it is masked along with overflows and inf
+        concentrations = [10.0 ** c if c < MAX_EXPONENT else 0.0 for c in concentration_mixtures.tolist()]
+        if out is None:
+            return np.array(concentrations)
+        out[:] = concentrations
+        return out
+    with np.errstate(over='ignore', invalid='ignore'):
+        concentrations = np.power(10.0, concentration_mixtures, out=out)
+    concentrations[~np.isfinite(concentrations)] = 0
+    return concentrations
+
@@ -0,0 +1,113 @@
+import numpy as np
+
+from olfactometer.clock import SystemClock
+
+
+class FrameGate:
+    """
+    Decides whether a target frame is worth re-optimizing for.
+    Sits between the FrameCoalescer and the optimizer: a solve is held back until
+    min_interval seconds have passed since the previous one, and skipped entirely if
+    no odorant moved by more than the dead-band since the last solved frame.
+    The hardware cannot physically resolve tiny concentration changes, so those solves
+    would only cost optimizer time and valve chatter.
+
+    Attributes:
+        min_interval (float): Minimum time between two solves, in seconds.
+        deadband (float): Per-odorant change (in log10 concentration) below which a frame is skipped.
+        frames_checked: Frames offered to the gate.
+        solves_admitted: Frames passed on to the optimizer.
+        skipped_deadband: Frames dropped because no odorant left the dead-band.
+        deferred_rate_limit: Frames held back to respect min_interval.
+        clock: Time source, see olfactometer.clock.
+    """
+    def __init__(self, min_interval=0.0, deadband=0.0, clock=None):
+        if min_interval < 0 or deadband < 0:
+            raise ValueError("min_interval and deadband must be non-negative")
+        self.min_interval = min_interval
+        self.deadband = deadband
+        self.frames_checked = 0
+        self.solves_admitted = 0
+        self.skipped_deadband = 0
+        self.deferred_rate_limit = 0
+        self.last_frame = None
+        self.last_solve_time = None
+        self.clock = clock if clock is not None else SystemClock()
+
+    def time_until_open(self, now=None):
+        """
+        Seconds left before the next solve is allowed.
+
+        Args:
+            now (float): Timestamp from clock, read if not given.
+        """
+        if self.last_solve_time is None or self.min_interval == 0:
+            return 0.0
+        if now is None:
+            now = self.clock.time()
+        return max(0.0, self.last_solve_time + self.min_interval - now)
+
+    def defer(self, now=None):
+        """
+        Check the rate limit for a frame about to be offered, counting it as deferred if it must wait.
+
+        Args:
+            now (float): Timestamp from clock, read if not given.
+        Returns:
+            float: Seconds to wait before offering the frame to admit.
+        """
+        wait = self.time_until_open(now)
+        if wait > 0:
+            self.deferred_rate_limit += 1
+        return wait
+
+    def within_deadband(self, frame):
+        """
+        True if every odorant of frame is within the dead-band of the last solved frame.
+        NaN and infinite entries count as unchanged when they match the last frame exactly.
+
+        Args:
+            frame (:obj:`numpy.ndarray`): Log10 concentrations, one per odorant.
+        """
+        if self.last_frame is None or self.last_frame.shape != frame.shape:
+            return False
+        with np.errstate(invalid='ignore'):
+            unchanged = np.abs(frame - self.last_frame) <= self.deadband
+        unchanged |= (frame == self.last_frame) | (np.isnan(frame) & np.isnan(self.last_frame))
+        return bool(unchanged.all())
+
+    def admit(self, frame, now=None):
+        """
+        Offer a frame to the gate. If admitted, it becomes the reference for the dead-band.
+
+        Args:
+            frame: Log10 concentrations, one per odorant.
+            now (float): Timestamp from clock, read if not given.
+        Returns:
+            bool: True if the optimizer should solve for this frame.
+        """
+        frame = np.asarray(frame, dtype=float)
+        self.frames_checked += 1
+        if self.within_deadband(frame):
+            self.skipped_deadband += 1
+            return False
+        if now is None:
+            now = self.clock.time()
+        self.last_frame = frame.copy()
+        self.last_solve_time = now
+        self.solves_admitted += 1
+        return True
+
+    def reset(self):
+        """Forget the last solved frame, e.g. after the valves were closed."""
+        self.last_frame = None
+        self.last_solve_time = None
+
+    def stats(self):
+        return {'min_interval': self.min_interval,
+                'deadband': self.deadband,
+                'frames_checked': self.frames_checked,
+                'solves_admitted': self.solves_admitted,
+                'solves_avoided': self.frames_checked - self.solves_admitted,
+                'skipped_deadband': self.skipped_deadband,
+                'deferred_rate_limit': self.deferred_rate_limit}
@@ -0,0 +1,77 @@
+import numpy as np
+from nidaqmx.stream_writers import AnalogMultiChannelWriter, DigitalSingleChannelWriter
+
+
+class FrameWriter:
+    """
+    Preconfigured writer of fixed-shape frames to a task: the valve states of the digital task
+    (uint32, one channel) or the MFC setpoints of the analog task (float64, one row per channel).
+    Task.write works out the channel type, sample type and shape of the data on every call; the
+    ValveDriver always writes the same kind of frame, so the stream writer is chosen and the frame
+    shape checked against the task's channels once, here. Writes then only convert the frame to a
+    C-contiguous array of the frame dtype (without copying it when it already is one) and hand it
+    to the driver without inspecting the task or the shape again.
+
+    Attributes:
+        task: nidaqmx.task.Task written to.
+        shape (tuple): (samples,) for a digital frame, (channels, samples) for an analog frame.
+        dtype: numpy.uint32 for a digital frame, numpy.float64 for an analog frame.
+        writer: The nidaqmx.stream_writers writer of the task.
+        timeout (float): Seconds to wait for room in the output buffer.
+        writes (int): Frames written.
+    """
+    def __init__(self, task, shape, dtype, auto_start=True, timeout=10.0):
+        self.task = task
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.timeout = timeout
+        self.writes = 0
+        if self.dtype == np.uint32 and len(self.shape) == 1:
+            n_channels, writer_type = 1, DigitalSingleChannelWriter
+        elif self.dtype == np.float64 and len(self.shape) == 2:
+            n_channels, writer_type = self.shape[0], AnalogMultiChannelWriter
+        else:
+            raise TypeError("No stream writer for %s frames of shape %s" % (self.dtype, self.shape))
+        if self.shape[-1] < 1:
+            raise ValueError("Frames need at least one sample per channel, got shape %s" % (self.shape,))
+        task_channels = len(task.channel_names)
+        if n_channels != task_channels:
+            raise ValueError("Frames of %d channels for %s, which has %d" % (n_channels, task.name, task_channels))
+        self.writer = writer_type(task.out_stream, auto_start)
+        self.writer.verify_array_shape = False      # Checked above, once
+        if writer_type is DigitalSingleChannelWriter:
+            self._write = self.writer.write_many_sample_port_uint32
+        else:
+            self._write = self.writer.write_many_sample
+
+    def __repr__(self):
+        return 'FrameWriter(%r, shape=%r, dtype=%s)' % (self.task, self.shape, self.dtype)
+
+    def frame(self, values):
+        """
+        Values as a frame that can be handed to the driver. The shape is not checked again,
+        values must have the shape the writer was created with.
+
+        Args:
+            values: Array-like of the frame's shape.
+        Returns:
+            :obj:`numpy.ndarray`: values itself if it is a C-contiguous, writeable array of the frame
+            dtype, otherwise a converted copy.
+        """
+        frame = np.ascontiguousarray(values, dtype=self.dtype)
+        if not frame.flags.writeable:   # The driver's array arguments must be writeable
+            frame = frame.copy()
+        return frame
+
+    def write(self, values):
+        """
+        Write one frame.
+
+        Args:
+            values: Array-like of the frame's shape.
+        Returns:
+            int: Samples written per channel.
+        """
+        samples = self._write(self.frame(values), timeout=self.timeout)
+        self.writes += 1
+        return samples
@@ -0,0 +1,133 @@
+"""Array-native evaporation and headspace model for all jars of an olfactometer."""
+
+import numpy as np
+import quantities as pq
+
+from olfactometer.odorants import GAS_MOLAR_DENSITY
+from olfactometer.physics import mackay_rates
+
+ATMOSPHERE = float(pq.atm.rescale(pq.Pa))                   # Pa
+GAS_MOLARITY = float(GAS_MOLAR_DENSITY.rescale(pq.M))       # mol/L of an ideal gas
+MAX_STEP = 60.0     # Longest depletion step in seconds, mole fractions are re-evaluated after each
+
+
+class HeadspaceModel:
+    """
+    Liquid and vapor state of every molecule in every jar, held as (molecules x jars) arrays so
+    evaporation rates, vapor flow rates and depletion of the whole olfactometer are each a
+    single NumPy expression. The model takes a snapshot of the jars' contents and then evolves
+    on its own; the Solutions in the jars are not modified.
+
+    Quantities are plain floats in fixed units: moles in mol, areas in m**2, vapor pressures in Pa,
+    evaporation rates in mol/s, vapor flow rates in L/s and vapor concentrations in molar.
+
+    Attributes:
+        molecules: Molecules in row order, solvents included.
+        jars: Jars in column order.
+        moles: (n_molecules, n_jars) moles of each molecule in the liquid of each jar.
+        areas: (n_jars,) liquid surface area of each jar.
+        vapor_pressures: (n_molecules,) pure vapor pressure of each molecule.
+        max_rates: (n_molecules,) Mackay evaporation rate of each pure molecule, mol/(m**2 s).
+        elapsed: Seconds the model has been depleted for.
+    """
+    def __init__(self, jars, molecules=None):
+        """
+        Args:
+            jars: Jars to model, in column order.
+            molecules: Molecules to put in the first rows, in this order.
+        """
+        self.jars = list(jars)
+        # Rows start with the given molecules (e.g. Olfactometer.loaded_molecules), solvents and
+        # any other molecules of the jars follow since they count towards the mole fractions
+        rows = dict.fromkeys(molecules or ())
+        for jar in self.jars:
+            if jar.contents is not None:
+                rows.update(dict.fromkeys(jar.contents.molecules))
+        self.molecules = list(rows)
+        index = {m: i for i, m in enumerate(self.molecules)}
+        self.moles = np.zeros((len(self.molecules), len(self.jars)))
+        for j, jar in enumerate(self.jars):
+            if jar.contents is None:
+                continue
+            # The Solution's moles are for its total volume, the jar only holds part of it
+            fraction = float((jar.liquid_volume / jar.contents.total_volume).simplified)
+            for m, moles in jar.contents.molecules.items():
+                self.moles[index[m], j] = float(moles.rescale(pq.mol)) * fraction
+        self.areas = np.array([float(jar.area.simplified) for jar in self.jars])
+        self.vapor_pressures = np.array([m.vapor_pressure_pa for m in self.molecules])
+        self.max_rates = mackay_rates(self.vapor_pressures)
+        self.elapsed = 0.0
+
+    @classmethod
+    def from_olfactometer(cls, olfactometer, molecules=None):
+        """Model of the jars of an olfactometer, in station order."""
+        return cls([olfactometer.jars[station] for station in sorted(olfactometer.jars)], molecules)
+
+    @property
+    def mole_fractions(self):
+        """(n_molecules, n_jars) mole fraction of each molecule in each jar, 0 in empty jars."""
+        total = self.moles.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, self.moles / total, 0.0)
+
+    def evaporation_rates(self, clearance=1.0):
+        """
+        Evaporation rate of each molecule in each jar (Jar.max_evaporation_rates for the whole olfactometer).
+
+        Args:
+            clearance: Fraction of the maximum rate reached, i.e. how well the headspace is
+                cleared by the air flow. A scalar or one value per jar.
+        Returns:
+            :obj:`numpy.ndarray`: (n_molecules, n_jars) rates in mol/s.
+        """
+        return self.mole_fractions * self.max_rates[:, None] * (self.areas * clearance)
+
+    def vapor_flow_rates(self, clearance=1.0):
+        """(n_molecules, n_jars) volume of vapor produced per second in L/s, see evaporation_rates."""
+        return self.evaporation_rates(clearance) / GAS_MOLARITY
+
+    def vapor_concentrations(self):
+        """(n_molecules, n_jars) steady state headspace concentrations in molar (Raoult's law)."""
+        return self.mole_fractions * (self.vapor_pressures / ATMOSPHERE)[:, None] * GAS_MOLARITY
+
+    def deplete(self, duration, clearance=1.0, max_step=MAX_STEP):
+        """
+        Evaporate molecules out of every jar for duration seconds.
+
+        Args:
+            duration (float): Seconds to deplete for.
+            clearance: See evaporation_rates.
+            max_step (float): Longest step in seconds; rates follow the changing mole fractions between steps.
+        Returns:
+            :obj:`numpy.ndarray`: (n_molecules, n_jars) moles evaporated.
+        """
+        start = self.moles.copy()
+        n_steps = max(1, int(np.ceil(duration / max_step)))
+        dt = duration / n_steps
+        for _ in range(n_steps):
+            self.moles -= np.minimum(self.evaporation_rates(clearance) * dt, self.moles)
+        self.elapsed += duration
+        return start - self.moles
+
+    def simulate(self, durations, clearances=1.0, max_step=MAX_STEP):
+        """
+        Deplete over a sequence of periods, e.g. the frames of a session.
+
+        Args:
+            durations: Seconds of each period.
+            clearances: Clearance of each period, a scalar, one value per period or
+                an (n_periods, n_jars) array.
+            max_step (float): See deplete.
+        Returns:
+            :obj:`numpy.ndarray`: (n_periods + 1, n_molecules, n_jars) moles at the start and after each period.
+        """
+        durations = np.asarray(durations, dtype=float)
+        clearances = np.asarray(clearances, dtype=float)
+        if clearances.ndim < 2:
+            clearances = np.broadcast_to(clearances, (len(self.jars), len(durations))).T
+        history = np.empty((len(durations) + 1,) + self.moles.shape)
+        history[0] = self.moles
+        for i, duration in enumerate(durations):
+            self.deplete(duration, clearances[i], max_step)
+            history[i + 1] = self.moles
+        return history
@@ -0,0 +1,225 @@
+"""Time-stepped simulation of jar depletion and headspace dynamics under the actual valve schedule."""
+
+import numpy as np
+import quantities as pq
+
+from olfactometer.headspace import HeadspaceModel, ATMOSPHERE, GAS_MOLARITY, MAX_STEP
+
+MIN_HEADSPACE = 1e-6    # L, floor for the headspace of a (nearly) full jar
+SYNC_RTOL = 1e-3        # Relative change of the vapor matrix that is pushed to the optimizer
+
+
+def molar_volume(molecule):
+    """Liquid volume of one mole of molecule in L, 0 if its molecular weight is unknown."""
+    if not molecule.molecular_weight or not molecule.density:
+        return 0.0
+    density = molecule.density
+    if not isinstance(density, pq.Quantity):
+        density = density * pq.g / pq.cc
+    return float((molecule.molecular_weight / density).rescale(pq.L / pq.mol))
+
+
+def decode_valve_frame(digital_samples, n_jars):
+    """
+    Duty cycles of every valve in a digital frame written by ValveDriver (see ValveDriver.format_bits).
+
+    Args:
+        digital_samples: uint32 samples of one frame.
+        n_jars (int): Number of valves.
+    Returns:
+        tuple: (wA, wB) arrays, the fraction of the frame each valve spends in state A and B.
+    """
+    samples = np.asarray(digital_samples, dtype=np.uint32)
+    bits = (samples[:, None] >> np.arange(32, dtype=np.uint32)) & 1
+    duty = bits.mean(axis=0)
+    return duty[16:16+n_jars], duty[:n_jars]
+
+
+def mfc_flows(analog_samples, mfcs, channels):
+    """
+    Flow rate of MFCs at every sample of analog samples written by ValveDriver.
+
+    Args:
+        analog_samples: (n_channels, n_samples) voltages.
+        mfcs: MFCs to decode.
+        channels: ao_channel of each row, i.e. ValveDriver.DAQ_analog_channels.
+    Returns:
+        :obj:`numpy.ndarray`: (n_mfcs, n_samples) flow rates in L/s.
+    """
+    analog_samples = np.asarray(analog_samples, dtype=float)
+    flows = np.empty((len(mfcs), analog_samples.shape[1]))
+    for i, mfc in enumerate(mfcs):
+        voltage = analog_samples[channels.index(mfc.ao_channel)]
+        v_min = float(mfc.voltage_min.rescale(pq.V))
+        v_max = float(mfc.voltage_max.rescale(pq.V))
+        max_flow = float(mfc.max_flow_rate.rescale(pq.L / pq.s))
+        flows[i] = np.maximum(voltage - v_min, 0.0) / (v_max - v_min) * max_flow
+    return flows
+
+
+def decode_mfc_frame(analog_samples, mfcs, channels):
+    """
+    Flow rates of MFCs from an analog frame written by ValveDriver.
+
+    Args:
+        analog_samples: (n_channels, samples_per_frame) voltages.
+        mfcs: MFCs to decode.
+        channels: ao_channel of each row, i.e. ValveDriver.DAQ_analog_channels.
+    Returns:
+        :obj:`numpy.ndarray`: Mean flow rate of each MFC over the frame in L/s.
+    """
+    return mfc_flows(analog_samples, mfcs, channels).mean(axis=1)
+
+
+def jar_flows(wA, wB, fA, fB):
+    """
+    Air flow through each jar, split between the jars open to each mixing MFC as in calc_conc_jit.
+
+    Args:
+        wA, wB: Duty cycles of each valve in state A and B.
+        fA, fB: Flow rates of the mixing MFCs A and B.
+    Returns:
+        :obj:`numpy.ndarray`: Flow rate through each jar, in the units of fA and fB.
+    """
+    wA = np.asarray(wA, dtype=float)
+    wB = np.asarray(wB, dtype=float)
+    n_A = max(np.count_nonzero(wA > 0), 1)
+    n_B = max(np.count_nonzero(wB > 0), 1)
+    return fA*wA/n_A + fB*wB/n_B
+
+
+class JarSimulator:
+    """
+    Integrates evaporation out of the liquid, exchange with the headspace and flushing of the
+    headspace by the air flowing through each jar. All molecules in all jars are advanced together.
+
+    Within a step the mole fractions of the liquid and the flows are held constant. The headspace
+    concentration c of every molecule in every jar then follows
+        V dc/dt = k (c_eq - c) - Q c
+    with V the headspace volume, Q the flow through the jar, c_eq the Raoult's law equilibrium and
+    k the mass transfer conductance of the liquid surface. k is chosen so a cleared headspace
+    evaporates at the Mackay rate. This is integrated exactly, so steps can be as long as the
+    frames of a session. Evaporated and flushed moles are the exact integrals over the step.
+
+    Attributes:
+        olfactometer: The simulated olfactometer.
+        model: HeadspaceModel holding the liquid moles of each molecule in each jar.
+        headspace: (n_molecules, n_jars) headspace concentrations in molar, in model.molecules order.
+        conductances: (n_molecules, n_jars) mass transfer conductances in L/s.
+        evaporated: (n_molecules, n_jars) moles that evaporated so far.
+        delivered: (n_molecules, n_jars) moles flushed out of the jars so far.
+        elapsed: Simulated seconds.
+    """
+    def __init__(self, olfactometer, max_step=MAX_STEP):
+        self.olfactometer = olfactometer
+        self.max_step = max_step
+        self.model = HeadspaceModel.from_olfactometer(olfactometer, olfactometer.loaded_molecules)
+        self.n_loaded = len(olfactometer.loaded_molecules)
+        self.jar_volumes = np.array([float(jar.max_volume.rescale(pq.L)) for jar in self.model.jars])
+        self.molar_volumes = np.array([molar_volume(m) for m in self.model.molecules])
+        pure_concentrations = self.model.vapor_pressures / ATMOSPHERE * GAS_MOLARITY
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_area = np.where(pure_concentrations > 0, self.model.max_rates / pure_concentrations, 0.0)
+        self.conductances = per_area[:, None] * self.model.areas
+        # Jars start out at equilibrium
+        self.headspace = self.model.vapor_concentrations()
+        self.evaporated = np.zeros_like(self.headspace)
+        self.delivered = np.zeros_like(self.headspace)
+        self.elapsed = 0.0
+        self._pushed = None
+
+    @property
+    def liquid_volumes(self):
+        """Liquid volume left in each jar in L."""
+        return (self.model.moles * self.molar_volumes[:, None]).sum(axis=0)
+
+    @property
+    def headspace_volumes(self):
+        """Gas volume above the liquid of each jar in L."""
+        return np.maximum(self.jar_volumes - self.liquid_volumes, MIN_HEADSPACE)
+
+    @property
+    def vapor_matrix(self):
+        """(n_loaded_molecules, n_jars) headspace concentrations in molar, the optimizer's vapor matrix."""
+        return self.headspace[:self.n_loaded]
+
+    def step(self, duration, flows):
+        """
+        Advance the simulation.
+
+        Args:
+            duration (float): Seconds to advance by.
+            flows: Air flow through each jar in L/s, a scalar or one value per jar.
+        """
+        flows = np.broadcast_to(np.asarray(flows, dtype=float), (len(self.model.jars),))
+        n_steps = max(1, int(np.ceil(duration / self.max_step)))
+        dt = duration / n_steps
+        k = self.conductances
+        for _ in range(n_steps):
+            c = self.headspace
+            c_eq = self.model.vapor_concentrations()
+            exchange = k + flows
+            rate = exchange / self.headspace_volumes
+            with np.errstate(divide='ignore', invalid='ignore'):
+                c_inf = np.where(exchange > 0, k * c_eq / exchange, c)
+                # Integral over the step of exp(-rate t), dt where nothing is exchanged
+                gain = np.where(rate > 0, -np.expm1(-rate * dt) / rate, dt)
+            integral = c_inf*dt + (c - c_inf)*gain
+            evaporated = np.minimum(k * (c_eq*dt - integral), self.model.moles)
+            self.model.moles -= evaporated
+            self.evaporated += evaporated
+            self.delivered += integral * flows
+            self.headspace = c_inf + (c - c_inf)*(1 - rate*gain)
+        self.model.elapsed += duration
+        self.elapsed += duration
+
+    def run_frame(self, valve_driver, duration=1.0):
+        """
+        Advance by one frame of the schedule ValveDriver is currently writing.
+
+        Args:
+            valve_driver: ValveDriver whose valve_duty_cycles and mfc_setpoints are decoded.
+            duration (float): Length of a frame in seconds, 1/FRAMES_PER_S.
+        """
+        wA, wB = decode_valve_frame(valve_driver.valve_duty_cycles, len(self.model.jars))
+        fA, fB = decode_mfc_frame(valve_driver.mfc_setpoints, self.olfactometer.mfcs[0],
+                                  valve_driver.DAQ_analog_channels)
+        self.step(duration, jar_flows(wA, wB, fA, fB))
+
+    def simulate(self, wA, wB, fA, fB, frame_duration=1.0):
+        """
+        Replay a session of frames.
+
+        Args:
+            wA, wB: (n_frames, n_jars) duty cycles of the valves in state A and B.
+            fA, fB: (n_frames,) flow rates of the mixing MFCs in L/s.
+            frame_duration (float): Seconds per frame.
+        Returns:
+            :obj:`numpy.ndarray`: (n_frames + 1, n_loaded_molecules, n_jars) vapor matrix at the start and after each frame.
+        """
+        wA, wB = np.atleast_2d(wA), np.atleast_2d(wB)
+        fA = np.broadcast_to(fA, len(wA))
+        fB = np.broadcast_to(fB, len(wA))
+        history = np.empty((len(wA) + 1,) + self.vapor_matrix.shape)
+        history[0] = self.vapor_matrix
+        for i in range(len(wA)):
+            self.step(frame_duration, jar_flows(wA[i], wB[i], fA[i], fB[i]))
+            history[i + 1] = self.vapor_matrix
+        return history
+
+    def sync(self, smell_controller, rtol=SYNC_RTOL):
+        """
+        Push the vapor matrix to the optimizer if it drifted by more than rtol since the last push,
+        and write the remaining liquid volumes back to the jars.
+
+        Returns:
+            bool: True if the matrix was pushed.
+        """
+        J = self.vapor_matrix
+        if self._pushed is not None and np.abs(J - self._pushed).max() <= rtol * np.abs(self._pushed).max():
+            return False
+        self._pushed = J.copy()
+        smell_controller.set_vapor_matrix(self._pushed)
+        for jar, volume in zip(self.model.jars, self.liquid_volumes):
+            jar.liquid_volume = (volume * pq.L).rescale(pq.mL)
+        return True
@@ -0,0 +1,24 @@
+"""Deferred imports of heavy dependencies, to keep the import of the package (and server cold start) fast."""
+
+import functools
+
+
+def lazy_jit(func):
+    """
+    numba.jit func on its first call instead of at import, so importing a module does not import numba.
+
+    Args:
+        func: Function to compile.
+    Returns:
+        function: Wrapper calling the compiled function.
+    """
+    compiled = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal compiled
+        if compiled is None:
+            from numba import jit
+            compiled = jit(func)
+        return compiled(*args, **kwargs)
+    return wrapper
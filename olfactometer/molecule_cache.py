@@ -0,0 +1,97 @@
+"""On-disk cache of the molecule properties otherwise fetched from PubChem."""
+
+import json
+import os
+import threading
+
+SEED_PATH = os.path.join(os.path.dirname(__file__), 'data', 'molecule_seed.jsonl')
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.olfactometer', 'molecule_cache.jsonl')
+# Overrides DEFAULT_CACHE_PATH for the shared cache, an empty value keeps it in memory only
+CACHE_PATH_VARIABLE = 'OLFACTOMETER_MOLECULE_CACHE'
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+class MoleculeCache:
+    """
+    Molecule properties keyed by PubChem CID, stored as JSON lines.
+    The bundled seed file is read first, then the user cache; later lines update
+    earlier ones, so a refreshed record simply gets appended.
+
+    Records hold plain numbers in the units PubChem reports them in:
+    molecular_weight (g/mol), vapor_pressure (mmHg), density (g/cc).
+
+    Attributes:
+        path: JSON-lines file new records are appended to.
+        seed_path: Read-only file of records shipped with the package.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, seed_path=SEED_PATH):
+        self.path = path
+        self.seed_path = seed_path
+        self.records = {}
+        self._lock = threading.Lock()
+        for p in (seed_path, path):
+            if p and os.path.exists(p):
+                self.load(p)
+
+    def load(self, path):
+        """Read the records of a JSON-lines file into memory."""
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print("Skipping unreadable molecule cache line in %s" % path)
+                    continue
+                self.records.setdefault(int(record['cid']), {}).update(record)
+
+    def get(self, cid):
+        """
+        Returns:
+            dict: Cached properties of the molecule, empty if it is not cached.
+        """
+        return dict(self.records.get(int(cid), {}))
+
+    def put(self, cid, properties):
+        """
+        Merge properties into the record of a molecule and persist them.
+
+        Args:
+            cid (int): PubChem CID.
+            properties (dict): JSON-serializable properties.
+        """
+        cid = int(cid)
+        record = dict(properties, cid=cid)
+        with self._lock:
+            self.records.setdefault(cid, {}).update(record)
+            if not self.path:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                print("Could not write molecule cache %s: %s" % (self.path, e))
+
+    def __contains__(self, cid):
+        return int(cid) in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+
+def default_cache():
+    """
+    The cache shared by all Molecules that are not given one explicitly.
+    It is stored in DEFAULT_CACHE_PATH, or in the file named by the
+    OLFACTOMETER_MOLECULE_CACHE environment variable if it is set.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = MoleculeCache(os.environ.get(CACHE_PATH_VARIABLE, DEFAULT_CACHE_PATH))
+    return _default_cache
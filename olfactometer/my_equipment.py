@@ -8,7 +8,23 @@ STUB_LENGTH = 4.0 * pq.cm
 
 
 class MyOlfactometer(Olfactometer):
-    pass
+    """
+    The olfactometer in use: jars (one valve each) on the manifold, the first half holding
+    odorants, each paired with a clean air jar from the second half, and the MFCs feeding them.
+    The jars are connected empty, the olfactometer picks up their molecules once they are filled.
+
+    Attributes:
+        n_jars (int): Jars on the manifold, unless the constructor is given another count.
+    """
+    n_jars = 10
+
+    def __init__(self, n_jars=None, data_container=None):
+        if n_jars is None:
+            n_jars = self.n_jars
+        jars = [MyJar('Jar #%d' % (i+1)) for i in range(n_jars)]
+        mfcs = [(MyMediumMFC('MFC_A_High'), MyLowMFC('MFC_B_Low')), MyHighMFC('MFC_Carrier')]
+        super().__init__(jars, mfcs, data_container)
+        self.n_jars = n_jars
 
 class MyMFC(MFC):
 
@@ -4,20 +4,43 @@ from datetime import datetime
 import json
 import random
 import re
+import weakref
 import urllib.request
 from urllib.request import urlopen
 from urllib.error import HTTPError
+import numpy as np
 import quantities as pq
 
-from olfactometer.physics import mackay
+from olfactometer.physics import mackay, mackay_rates
+from olfactometer.molecule_cache import default_cache
 
 ROOM_TEMP = 22 * pq.Celsius
 GAS_MOLAR_DENSITY = pq.mol / (22.4 * pq.L)
 
 
 class Solution:
+    """
+    A liquid mixture of Compounds and/or other Solutions.
+
+    The chemistry (moles, mole fractions, partial pressures, vapor concentrations) is
+    computed once and memoized. Assigning `components`, or calling invalidate(), clears
+    it; nested Solutions invalidate the Solutions they are part of. The returned dicts
+    are shared with the memo and must not be modified by callers.
+    """
     def __init__(self, components, date_created=None):
-        self.total_volume = 0 * pq.mL
+        self._chemistry = {}
+        self._parents = weakref.WeakSet()
+        self._listeners = []
+        self.components = components
+        self.date_created = date_created if date_created else datetime.now()
+
+    @property
+    def components(self):
+        return self._components
+
+    @components.setter
+    def components(self, components):
+        total_volume = 0 * pq.mL
         assert isinstance(components, dict), "Components must be a dict"
         for component, volume in components.items():
             assert isinstance(component, (Compound, Solution)), \
@@ -26,13 +49,53 @@ class Solution:
                 volume = volume.rescale(pq.mL)
             except ValueError:
                 raise ValueError("Components must be provided with volumes")
-            self.total_volume += volume  # Assume that volume is conserved
-        self.components = components
-        self.date_created = date_created if date_created else datetime.now()
+            total_volume += volume  # Assume that volume is conserved
+            if isinstance(component, Solution):
+                component._parents.add(self)
+        self.total_volume = total_volume
+        self._components = components
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget the memoized chemistry of this Solution and of every Solution containing it."""
+        self._chemistry.clear()
+        for parent in list(self._parents):
+            parent.invalidate()
+        for listener in list(self._listeners):
+            listener(self)
+
+    def __getstate__(self):
+        # The memo is rebuilt on demand and weak references cannot be pickled
+        state = self.__dict__.copy()
+        state['_chemistry'] = {}
+        del state['_parents']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._parents = weakref.WeakSet()
+        for component in self._components:
+            if isinstance(component, Solution):
+                component._parents.add(self)
+
+    def add_listener(self, listener):
+        """Call listener(solution) whenever the chemistry of this Solution is invalidated."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _memo(self, key, compute):
+        try:
+            return self._chemistry[key]
+        except KeyError:
+            value = self._chemistry[key] = compute()
+            return value
 
     @property
     def compounds(self):
-        return self._compounds()
+        return self._memo('compounds', self._compounds)
 
     def _compounds(self, result=None):
         if result is None:
@@ -50,6 +113,9 @@ class Solution:
     @property
     def molecules(self):
         """Returns a dictionary with the moles of each Molecule"""
+        return self._memo('molecules', self._molecules)
+
+    def _molecules(self):
         compounds = self.compounds
         assert all([c.density for c, v in compounds.items() if v
                     and not c.is_solvent]), \
@@ -60,17 +126,20 @@ class Solution:
             ("All non-solvent compounds must have a known molecular weight "
              "in order to compute moles")
         return {c.molecule: (v * c.molarity).rescale(pq.mol)
-                for c, v in self.compounds.items() if v}
+                for c, v in compounds.items() if v}
 
     @property
     def molarities(self):
         """Returns a dictionary with the molarity of each Molecule"""
-        return {m: mol/self.total_volume
-                for m, mol in self.molecules.items() if mol}
+        return self._memo('molarities', lambda: {m: mol/self.total_volume
+                                                 for m, mol in self.molecules.items() if mol})
 
     @property
     def mole_fractions(self):
         """Returns a dictionary with the mole fraction of each Molecule"""
+        return self._memo('mole_fractions', self._mole_fractions)
+
+    def _mole_fractions(self):
         molecules = self.molecules
         assert([moles for molecule, moles in molecules.items()]), \
             ("All compounds must have a known number of moles "
@@ -95,7 +164,11 @@ class Solution:
     def partial_pressures(self):
         """Computes partial pressures for each odorant
         in the mixture using Raoult's law"""
-        return {m: self.mole_fraction(m)*m.vapor_pressure
+        return self._memo('partial_pressures', self._partial_pressures)
+
+    def _partial_pressures(self):
+        mole_fractions = self.mole_fractions
+        return {m: mole_fractions.get(m, 0)*m.vapor_pressure
                 for m in self.molecules if m.vapor_pressure}
 
     def partial_pressure(self, molecule):
@@ -111,6 +184,9 @@ class Solution:
     def vapor_fractions(self):
         """Fractions of each component in the vapor phase at steady state.
         Units are fraction of volume. Air is assumed to make up the balance"""
+        return self._memo('vapor_fractions', self._vapor_fractions)
+
+    def _vapor_fractions(self):
         pp = self.partial_pressures
         result = {}
         for m, _ in pp.items():
@@ -122,8 +198,27 @@ class Solution:
     @property
     def vapor_concentrations(self):
         """Concentrations of each component in the vapor headspace"""
-        return {m: v*GAS_MOLAR_DENSITY for m, v in self.vapor_fractions.items()}
-            
+        return self._memo('vapor_concentrations',
+                          lambda: {m: v*GAS_MOLAR_DENSITY for m, v in self.vapor_fractions.items()})
+
+    @property
+    def vapor_concentrations_molar(self):
+        """Vapor headspace concentrations as plain floats in molar"""
+        return self._memo('vapor_concentrations_molar',
+                          lambda: {m: float(c.rescale(pq.M)) for m, c in self.vapor_concentrations.items()})
+
+    def vapor_concentration_array(self, molecules):
+        """
+        Vapor headspace concentrations as an array, for the optimizer.
+
+        Args:
+            molecules: Molecules giving the order of the entries.
+        Returns:
+            :obj:`numpy.ndarray`: Molar concentration of each molecule, 0 if it is not in this Solution.
+        """
+        concs = self.vapor_concentrations_molar
+        return np.array([concs.get(m, 0.0) for m in molecules])
+
     def vapor_fraction(self, molecule):
         return self.vapor_concentrations[molecule]
     
@@ -132,9 +227,16 @@ class Solution:
 
     @property
     def molar_evaporation_rates(self):
+        return self._memo('molar_evaporation_rates', self._molar_evaporation_rates)
+
+    def _molar_evaporation_rates(self):
+        # One vectorized mackay call for all molecules of the Solution
         mf = self.mole_fractions
-        result = {molecule: mole_fraction*molecule.molar_evaporation_rate
-                  for molecule, mole_fraction in mf.items()}
+        molecules = list(mf)
+        rates = mackay_rates([m.vapor_pressure_pa for m in molecules])
+        units = pq.mol / (pq.m**2 * pq.s)
+        result = {molecule: float(mf[molecule])*rate*units
+                  for molecule, rate in zip(molecules, rates)}
         return result
 
 
@@ -203,20 +305,40 @@ class Molecule:
 
         For details about PubChem's PUG REST API please visit
         https://pubchem.ncbi.nlm.nih.gov/pug_rest/PUG_REST.html
+
+        Properties are looked up in a MoleculeCache first and only fetched from PubChem
+        on a miss (or when refresh=True); fetched properties are written back to the cache.
+        Pass cache=False to always go to the network. A molecule given its vapor pressure
+        and density without fill=True does not use the cache at all.
+        Requests go through client (a pubchem.PubChemClient) if one is given, urllib otherwise.
     """
-    def __init__(self, cid=None, name=None, fill=False, vapor_press=None, dens=None):        
+    def __init__(self, cid=None, name=None, fill=False, vapor_press=None, dens=None, cache=None, refresh=False,
+                 client=None):        
         self.name = name        
+        self.client = client
         if (cid is None):   self.cid = self.get_cid_by_name(name)
         else:               self.cid = cid        
         # Molecular weight (pq.g / pq.mol)
         self.molecular_weight = None
-        if fill:            self.fill_details()
+        if vapor_press is not None and dens is not None and not fill:
+            cache = False       # Nothing to look up or write back
+        elif cache is None:
+            cache = default_cache()
+        record = cache.get(self.cid) if (cache is not False and not refresh) else {}
+        fetched = {}
+        if fill:
+            if record.get('molecular_weight') is not None:  self.load_details(record)
+            else:                                            fetched.update(self.fill_details())
         # Vapor pressure (pq.Pa)    
-        if (vapor_press is None):   self.vapor_pressure = float(self.get_vapor_pressure())
-        else:                       self.vapor_pressure = vapor_press
+        if (vapor_press is not None):                   self.vapor_pressure = vapor_press
+        elif record.get('vapor_pressure') is not None:  self.vapor_pressure = float(record['vapor_pressure'])
+        else:   self.vapor_pressure = fetched['vapor_pressure'] = float(self.get_vapor_pressure())
         # Density (pq.g / pq.ml)
-        if (dens is None):          self.density = float(self.get_density())
-        else:                       self.density = dens
+        if (dens is not None):                          self.density = dens
+        elif record.get('density') is not None:         self.density = float(record['density'])
+        else:   self.density = fetched['density'] = float(self.get_density())
+        if fetched and cache is not False:
+            cache.put(self.cid, fetched)
     
     # Integer Chemical ID number (CID) from PubChem
     # cid = 0
@@ -228,6 +350,10 @@ class Molecule:
     synonyms = ''
     # IUPAC name (long, unique name)
     iupac = ''            
+    # TOCHeading -> Information index of the PUG-View record, see pug_view_index
+    _pug_view_index = None
+    # pubchem.PubChemClient used for requests, None for urllib
+    client = None
 
     @property
     def molarity(self):
@@ -238,13 +364,24 @@ class Molecule:
             result = result.rescale(pq.mol / pq.L)
         return result
 
+    @property
+    def vapor_pressure_pa(self):
+        """Vapor pressure as a plain float in Pa. Unitless values are in mmHg, as PubChem reports them."""
+        vapor_pressure = self.vapor_pressure
+        if not isinstance(vapor_pressure, pq.Quantity):
+            vapor_pressure = (vapor_pressure or 0) * pq.mmHg
+        return float(vapor_pressure.rescale(pq.Pa))
+
     @property
     def molar_evaporation_rate(self):
-        return mackay(self.vapor_pressure)
+        return mackay(self.vapor_pressure_pa * pq.Pa)
 
     def fill_details(self):
         """
         Populate odorant molecule properties to include molecular weight and cid/name.
+
+        Returns:
+            dict: The fetched properties, as stored in the MoleculeCache.
         """
         assert self.cid is not None
         self.cid = int(self.cid) # Fixed duplication error in order dict 
@@ -258,18 +395,37 @@ class Molecule:
         def convert(name):
             s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
             return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
+        record = {}
         for key, value in details.items():
             if key == 'CID':
                 assert value == self.cid, \
                     "REST API CID does not match provided CID"
+                continue
             key = convert(key)
             if key == 'molecular_weight':
                 value = float(value)
-                # print(f"value: {value.dtype}")
-                value *= pq.g / pq.mol
-            setattr(self, key, value)
+            record[key] = value
         if not self.name or self.name == None:
-            self.name = self.get_name_from_api()
+            record['name'] = self.get_name_from_api()
+        self.load_details(record)
+        return record
+
+    def load_details(self, record):
+        """
+        Populate odorant molecule properties from a cached or fetched record.
+
+        Args:
+            record (dict): Properties as stored in the MoleculeCache.
+        """
+        for key, value in record.items():
+            if key in ('cid', 'source', 'vapor_pressure', 'density'):
+                continue
+            if key == 'name':
+                if not self.name:   self.name = value
+                continue
+            if key == 'molecular_weight':
+                value = float(value) * pq.g / pq.mol
+            setattr(self, key, value)
     
 
     def get_name_from_api(self):
@@ -306,6 +462,11 @@ class Molecule:
             to Python dictionary;
             This is just to follow the DRY principle
         """
+        if self.client is not None:
+            fin = self.client.get_json(url)
+            if fin is None:
+                raise Exception("PubChem has no record for '%s'" % url)
+            return fin
         req = urllib.request.Request(url)
         res = urllib.request.urlopen(req).read()
         fin = json.loads(res.decode())
@@ -351,21 +512,41 @@ class Molecule:
         if (density is None or len(density) == 0):   # If density is still None after parsing experimental properties, return 1.
             return 1
 
-    def get_addtional_om_props(self, required_properties):
+    @property
+    def pug_view_index(self):
         """
-            Found method as courtesy of Maxim Shevelev (Github: @mawansui)
-            1. Accepts the compound name
-            2. Gets the CID for this compound
-            3. Searches PubChem for data for the specified CID
-            4. Cycles through the fetched data to select required fields
-            5. Returns a dictionary with specified properties of specified compound
+        TOCHeading -> Information of every property in the PUG-View record.
+        The record is downloaded and indexed on first use, then all property queries are answered from the index.
+        """
+        if self._pug_view_index is None:
+            self._pug_view_index = self.index_pug_view_record(self.fetch_pug_view_record())
+        return self._pug_view_index
+
+    def fetch_pug_view_record(self):
+        """
+        Download the full PUG-View record of this molecule.
         """
         # Contsruct the link
         pubchem_all_data_link = "https://pubchem.ncbi.nlm.nih.gov/rest/pug_view/"
         pubchem_all_data_link += "data/compound/%s/JSON" % self.cid
         # Get the JSON from the constructed link and convert it to Python Dictionary
-        all_the_data = self.pubchem_parsing(pubchem_all_data_link)
+        return self.pubchem_parsing(pubchem_all_data_link)
+
+    def get_addtional_om_props(self, required_properties):
+        """
+            Found method as courtesy of Maxim Shevelev (Github: @mawansui)
+            1. Accepts the list of required properties
+            2. Looks them up in the indexed PUG-View record of this compound
+            3. Returns a dictionary with specified properties of specified compound
+        """
+        index = self.pug_view_index
+        return {prop: index[prop] for prop in required_properties if prop in index}
 
+    def index_pug_view_record(self, all_the_data):
+        """
+            Cycles through the fetched PUG-View record and indexes the property sections by TOCHeading.
+            If a heading occurs more than once the last occurrence wins.
+        """
         # Get to the data sections, get rid of References
         data_sections = all_the_data['Record']['Section']
 
@@ -446,21 +627,17 @@ class Molecule:
                                     'Dissociation Constants',
                                     'Other Experimental Properties']
 
-        # this array will later store the data about requested parameters
-        # in the PubChem format
-        required_data_in_pubchem_format = []
-        for molecule_desc_object in all_pubchem_data_array_for_section:
-            sample_list = list(
-                filter(lambda section: section['TOCHeading'] in required_properties, molecule_desc_object['Section']))
-            required_data_in_pubchem_format = required_data_in_pubchem_format + sample_list
-
-        # Final dictionary of compound properties that will be returned in the end
+        # Index every property section by its heading, so the required
+        # parameters can be looked up without walking the record again
         compound_properties_dictionary = {}
-        for property_object in required_data_in_pubchem_format:
-            compound_properties_dictionary[property_object['TOCHeading']] = property_object['Information']
+        for molecule_desc_object in all_pubchem_data_array_for_section:
+            for property_object in molecule_desc_object.get('Section', []):
+                compound_properties_dictionary[property_object['TOCHeading']] = property_object['Information']
         return compound_properties_dictionary
 
     def url_to_json(self, url):
+        if self.client is not None:
+            return self.client.get_json(url)
         json_data = None
         msgs = []
         try:
@@ -1,8 +1,18 @@
-from math import log as ln, exp
-
+import numpy as np
 import quantities as pq
-from sympy.solvers import solve
-from sympy import Symbol
+
+G = 9.8*pq.m/(pq.s)**2
+
+# log(er) = MACKAY_SLOPE*log(vp) + MACKAY_INTERCEPT, vp in Pa and er in mol/(m**2 s)
+MACKAY_SLOPE = 1.0243
+MACKAY_INTERCEPT = -15.08
+EVAPORATION_UNITS = pq.mol / (pq.m**2 * pq.s)
+
+# Units every quantity is reduced to before the closed-form solutions are evaluated
+VELOCITY_UNITS = pq.m/pq.s
+PRESSURE_UNITS = pq.Pa
+DENSITY_UNITS = pq.kg/(pq.m**3)
+HEAD_UNITS = (pq.m/pq.s)**2
 
 
 def mackay(vp):
@@ -11,84 +21,184 @@ def mackay(vp):
     Environmental Science & Technology, 48(17), 10259–10263.
     doi:10.1021/es5029074
     Note typo in intercept parameter in Figure 1.
+
+    vp may be a single vapor pressure or an array Quantity of them.
+    """
+    # Units of Pascals, stripped for the logarithm
+    vp = vp.rescale(pq.Pa).magnitude
+    # Attach units to the evaporation rate
+    return mackay_rates(vp) * EVAPORATION_UNITS
+
+
+def mackay_rates(vp):
+    """
+    Unit-free mackay for arrays of vapor pressures.
+
+    Args:
+        vp: Vapor pressures in Pa.
+    Returns:
+        :obj:`numpy.ndarray`: Evaporation rates in mol/(m**2 s), 0 where vp is not positive.
+    """
+    vp = np.asarray(vp, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        er = np.exp(MACKAY_SLOPE*np.log(vp) + MACKAY_INTERCEPT)
+    return np.where(vp > 0, er, 0.0)
+
+
+def _magnitude(x, units):
+    """Strip units from a Quantity (or a plain number already in SI units) as a float array."""
+    if isinstance(x, pq.Quantity):
+        x = x.rescale(units).magnitude
+    return np.asarray(x, dtype=float)
+
+
+def _sqrt(x):
+    # Negative radicands have no real, positive solution
+    with np.errstate(invalid='ignore'):
+        return np.sqrt(x)
+
+
+# Bernoulli's equation v**2/2 + g*z + p/rho = k, solved for each unknown.
+# Arguments are SI magnitudes, so every solution broadcasts over numpy arrays.
+BERNOULLI_SOLUTIONS = {
+    'v': (lambda v, p, rho, k, g, z: _sqrt(2*(k - g*z - p/rho)), VELOCITY_UNITS),
+    'p': (lambda v, p, rho, k, g, z: rho*(k - g*z - v**2/2), PRESSURE_UNITS),
+    'rho': (lambda v, p, rho, k, g, z: p/(k - g*z - v**2/2), DENSITY_UNITS),
+    'k': (lambda v, p, rho, k, g, z: v**2/2 + g*z + p/rho, HEAD_UNITS),
+}
+
+# The venturi relation rho*(v2**2 - v1**2)/2 = p1 - p2, solved for each unknown.
+VENTURI_SOLUTIONS = {
+    'v1': (lambda rho, p1, p2, v1, v2: _sqrt(v2**2 - 2*(p1 - p2)/rho), VELOCITY_UNITS),
+    'v2': (lambda rho, p1, p2, v1, v2: _sqrt(v1**2 + 2*(p1 - p2)/rho), VELOCITY_UNITS),
+    'p1': (lambda rho, p1, p2, v1, v2: p2 + rho*(v2**2 - v1**2)/2, PRESSURE_UNITS),
+    'p2': (lambda rho, p1, p2, v1, v2: p1 - rho*(v2**2 - v1**2)/2, PRESSURE_UNITS),
+}
+
+
+def _unknown(knowns):
+    missing = [name for name, value in knowns.items() if value is None]
+    if len(missing) != 1:
+        raise ValueError("Expected exactly one unknown, got %s; pass symbolic=True to solve for several"
+                         % (missing or 'none'))
+    return missing[0]
+
+
+def bernoulli(v=None, p=None, rho=None, g=G, z=0, k=None, symbolic=False):
     """
-    # Units of Pascals
-    vp = vp.rescale(pq.Pa)
-    # Strip units for logarithm
-    vp /= vp.units
-    # # Evaporation rate
-    if vp > 0:
-        er = exp(1.0243*ln(vp) - 15.08)
-    else:
-        er = 0
-    # Attach units
-    er *= pq.mol / (pq.m**2 * pq.s)
-    return er
-
-    
-def bernoulli(v=None, p=None, rho=None, g=9.8*pq.m/(pq.s)**2, z=0, k=None):
+    Solve Bernoulli's equation v**2/2 + g*z + p/rho = k for the one quantity left as None.
+    Any argument may be an array Quantity, e.g. to sweep pressures across many tube configurations.
+
+    This used to return the list of sympy solution dicts and accepted several unknowns.
+    It now returns a Quantity and requires exactly one unknown; pass symbolic=True for
+    the old behavior.
+
+    Args:
+        v: Flow velocity.
+        p: Pressure.
+        rho: Fluid density.
+        g: Gravitational acceleration.
+        z: Elevation, in meters if not a Quantity.
+        k: Bernoulli constant (energy per unit mass).
+        symbolic (bool): Return the sympy solutions instead, as a list of dicts,
+            which leaves every argument given as None as a symbol.
+    Returns:
+        Quantity: The unknown, NaN where no real positive solution exists.
+    Raises:
+        ValueError: Unless exactly one of v, p, rho and k is None (without symbolic).
+    """
+    if symbolic:
+        return _bernoulli_symbolic(v, p, rho, g, z, k)
+    knowns = {'v': v, 'p': p, 'rho': rho, 'k': k}
+    unknown = _unknown(knowns)
+    solution, units = BERNOULLI_SOLUTIONS[unknown]
+    result = solution(v=_magnitude(v, VELOCITY_UNITS) if v is not None else None,
+                      p=_magnitude(p, PRESSURE_UNITS) if p is not None else None,
+                      rho=_magnitude(rho, DENSITY_UNITS) if rho is not None else None,
+                      k=_magnitude(k, HEAD_UNITS) if k is not None else None,
+                      g=_magnitude(g, G.units), z=_magnitude(z, pq.m))
+    return result*units
+
+
+def venturi(rho=None, p1=None, p2=None, v1=None, v2=None, symbolic=False):
+    """
+    Solve the venturi relation rho*(v2**2 - v1**2)/2 = p1 - p2 for the one quantity left as None.
+    Any argument may be an array Quantity.
+
+    Like bernoulli, this used to return the list of sympy solution dicts and now returns a
+    Quantity for exactly one unknown; pass symbolic=True for the old behavior.
+
+    Args:
+        rho: Fluid density.
+        p1, p2: Pressures upstream and in the constriction.
+        v1, v2: Velocities upstream and in the constriction.
+        symbolic (bool): Return the sympy solutions instead, as a list of dicts.
+    Returns:
+        Quantity: The unknown, NaN where no real positive solution exists.
+    Raises:
+        ValueError: Unless exactly one of p1, p2, v1 and v2 is None (without symbolic).
+    """
+    assert rho is not None
+    if symbolic:
+        return _venturi_symbolic(rho, p1, p2, v1, v2)
+    knowns = {'v1': v1, 'v2': v2, 'p1': p1, 'p2': p2}
+    unknown = _unknown(knowns)
+    solution, units = VENTURI_SOLUTIONS[unknown]
+    result = solution(rho=_magnitude(rho, DENSITY_UNITS),
+                      p1=_magnitude(p1, PRESSURE_UNITS) if p1 is not None else None,
+                      p2=_magnitude(p2, PRESSURE_UNITS) if p2 is not None else None,
+                      v1=_magnitude(v1, VELOCITY_UNITS) if v1 is not None else None,
+                      v2=_magnitude(v2, VELOCITY_UNITS) if v2 is not None else None)
+    return result*units
+
+
+def _symbol_or_float(name, x, units):
+    from sympy import Symbol
+    if x is None:
+        return Symbol(name, real=True, positive=True)
+    return float(x.rescale(units).simplified)
+
+
+def _symbols(*values):
+    # Only the symbols are solved for, floats in the list would be treated as unknowns
+    from sympy import Symbol
+    return [value for value in values if isinstance(value, Symbol)]
+
+
+def _bernoulli_symbolic(v, p, rho, g, z, k):
+    from sympy.solvers import solve
     g = float(g.simplified)
-    if v is None:
-        v = Symbol('v', real=True, positive=True)
-    else:
-        v = v.rescale(pq.m/pq.s)
-        v = float(v.simplified)
-    if p is None:
-        p = Symbol('p', real=True, positive=True)
-    else:
-        p = p.rescale(pq.Pa)
-        p = float(p.simplified)
-    if rho is None:
-        rho = Symbol('rho', real=True, positive=True)
-    else:
-        rho = rho.rescale(pq.kg/(pq.m**3))
-        rho = float(rho.simplified)
-    if k is None:
-        k = Symbol('k', real=True, positive=True)
-    else:
-        k = k.rescale((pq.m/pq.s)**2)
-        k = float(k.simplified)
+    v = _symbol_or_float('v', v, VELOCITY_UNITS)
+    p = _symbol_or_float('p', p, PRESSURE_UNITS)
+    rho = _symbol_or_float('rho', rho, DENSITY_UNITS)
+    k = _symbol_or_float('k', k, HEAD_UNITS)
     result = solve((v**2)/2 + g*z + p/rho - k,
-                   [v, p, rho],
+                   _symbols(v, p, rho),
                    dict=True)
     return result
 
 
-def venturi(rho=None, p1=None, p2=None, v1=None, v2=None):
-    assert rho is not None
-    rho = rho.rescale(pq.kg/(pq.m**3))
-    rho = float(rho.simplified)
-    
-    if v1 is None:
-        v1 = Symbol('v1', real=True, positive=True)
-    else:
-        v1 = v1.rescale(pq.m/pq.s)
-        v1 = float(v1.simplified)
-    if v2 is None:
-        v2 = Symbol('v2', real=True, positive=True)
-    else:
-        v2 = v2.rescale(pq.m/pq.s)
-        v2 = float(v2.simplified)
-    if p1 is None:
-        p1 = Symbol('p1', real=True, positive=True)
-    else:
-        p1 = p1.rescale(pq.Pa)
-        p1 = float(p1.simplified)
-    if p2 is None:
-        p2 = Symbol('p2', real=True, positive=True)
-    else:
-        p2 = p2.rescale(pq.Pa)
-        p2 = float(p2.simplified)
-
+def _venturi_symbolic(rho, p1, p2, v1, v2):
+    from sympy.solvers import solve
+    rho = float(rho.rescale(DENSITY_UNITS).simplified)
+    v1 = _symbol_or_float('v1', v1, VELOCITY_UNITS)
+    v2 = _symbol_or_float('v2', v2, VELOCITY_UNITS)
+    p1 = _symbol_or_float('p1', p1, PRESSURE_UNITS)
+    p2 = _symbol_or_float('p2', p2, PRESSURE_UNITS)
     result = solve(rho*(v2**2 - v1**2)/2 - p1 + p2,
-                   [v1, v2, p1, p2],
+                   _symbols(v1, v2, p1, p2),
                    dict=True)
     return result
 
 
 if __name__ == '__main__':
-    #print(bernoulli(None, 10*pq.psi, 1.225*pq.kg/(pq.m**3)))
+    #print(bernoulli(None, 10*pq.psi, 1.225*pq.kg/(pq.m**3), symbolic=True))
     print(venturi(rho=1.225*pq.kg/(pq.m**3),
                   p1=10*pq.psi,
                   p2=1*pq.psi,
                   v1=10*pq.m/pq.s))
+    # A sweep over many upstream pressures is a single vectorized evaluation
+    print(venturi(rho=1.225*pq.kg/(pq.m**3),
+                  p1=np.linspace(1, 10, 10)*pq.psi,
+                  p2=1*pq.psi,
+                  v1=10*pq.m/pq.s))
@@ -0,0 +1,157 @@
+"""Simulated photoionization detector (PID) reading the olfactometer output from the simulated DAQ streams."""
+
+import numpy as np
+from scipy.signal import lfilter, lfilter_zi
+
+from olfactometer.jar_simulator import mfc_flows
+
+PID_SAMPLE_RATE = 50.0      # Hz, samples per second of the analog input
+PID_SENSITIVITY = 1000.0    # V/M, response of the detector per molar of odorant
+PID_TIME_CONSTANT = 0.5     # s, first order response lag of the detector and tubing
+PID_NOISE = 1e-4            # V, standard deviation of the sensor noise
+PID_BASELINE = 0.0          # V, output in clean air
+
+
+def vapor_matrix(olfactometer):
+    """(n_loaded_molecules, n_jars) equilibrium headspace concentrations in molar, as SmellController.get_vapor_concs_dense."""
+    rows = olfactometer.molecule_rows
+    J = np.zeros((len(rows), len(olfactometer.jars)))
+    for j, jar in olfactometer.jars.items():
+        for m, c in jar.vapor_concs_molar.items():
+            J[rows[m], j-1] = float(c)
+    return J
+
+
+class SimulatedPID:
+    """
+    Analog input channel of a PID placed at the olfactometer outlet, for debug mode.
+
+    Samples are derived from what ValveDriver wrote to the simulated DAQ: at each sample time the
+    valve and MFC outputs last generated on the Digital and Analog streams are decoded, and the
+    forward concentration model (as calc_conc_jit) gives the outflow concentration of every
+    loaded molecule. The detector adds a first order response lag and Gaussian noise.
+    Reads are generated in vectorized blocks and continue where the previous read stopped,
+    blocking on the backend's clock until the requested samples have been acquired, like an
+    analog input task does. It stands in for the 'Analog_In' task of ValveDriver.
+
+    Attributes:
+        olfactometer: Olfactometer whose jars and MFCs are simulated.
+        backend: nidaqmx.simulation.SimulatedBackend the valve driver writes to.
+        channels: ao_channel of each analog row, i.e. ValveDriver.DAQ_analog_channels.
+        vapor_matrix: (n_loaded_molecules, n_jars) headspace concentrations in molar,
+            e.g. JarSimulator.vapor_matrix to include depletion.
+        sensitivities: Response of the detector to each loaded molecule, V/M.
+        time_constant (float): Response lag in seconds, 0 for none.
+        noise (float): Standard deviation of the noise in V.
+        baseline (float): Output in clean air in V.
+        rate (float): Samples per second.
+        read_time (float): Time of the next sample to be read, None before the first read.
+    """
+    def __init__(self, olfactometer, backend, channels, rate=PID_SAMPLE_RATE, sensitivities=PID_SENSITIVITY,
+                 time_constant=PID_TIME_CONSTANT, noise=PID_NOISE, baseline=PID_BASELINE, seed=None,
+                 digital_task='DigitalTask', analog_task='AnalogTask'):
+        self.olfactometer = olfactometer
+        self.backend = backend
+        self.channels = list(channels)
+        self.rate = float(rate)
+        self.vapor_matrix = vapor_matrix(olfactometer)
+        self.sensitivities = np.broadcast_to(np.asarray(sensitivities, dtype=float),
+                                             (self.vapor_matrix.shape[0],)).copy()
+        self.time_constant = time_constant
+        self.noise = noise
+        self.baseline = baseline
+        self.digital_task = digital_task
+        self.analog_task = analog_task
+        self.rng = np.random.default_rng(seed)
+        self.read_time = None
+        self.samples_read = 0
+        self._zi = None
+
+    def __repr__(self):
+        return 'SimulatedPID(rate=%r)' % self.rate
+
+    def concentrations(self, times):
+        """
+        Outflow concentration of each loaded molecule at the given times, from the commanded valve and MFC states.
+
+        Args:
+            times: Sample times on the backend's clock.
+        Returns:
+            :obj:`numpy.ndarray`: (n_loaded_molecules, n_samples) concentrations in molar.
+        """
+        times = np.asarray(times, dtype=float)
+        n_jars = self.vapor_matrix.shape[1]
+        digital = self._held(self.digital_task, times, 1)[0].astype(np.uint32)
+        a = ((digital[None, :] >> (16 + np.arange(n_jars, dtype=np.uint32))[:, None]) & 1).astype(float)
+        b = ((digital[None, :] >> np.arange(n_jars, dtype=np.uint32)[:, None]) & 1).astype(float)
+        analog = self._held(self.analog_task, times, len(self.channels))
+        mixing = self.olfactometer.mfcs[0]
+        fA, fB = mfc_flows(analog, mixing, self.channels)
+        total = mfc_flows(analog, self.olfactometer.mfc_flat_list(), self.channels).sum(axis=0)
+        # Flow through each jar, split between the jars open to each mixing MFC as in calc_conc_jit
+        n_A = np.maximum(a.sum(axis=0), 1)
+        n_B = np.maximum(b.sum(axis=0), 1)
+        flux = fA*a/n_A + fB*b/n_B
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, (self.vapor_matrix @ flux) / total, 0.0)
+
+    def _held(self, task_name, times, n_channels):
+        # Outputs hold the last generated sample; nothing is output before the first one
+        stream = self.backend.streams.get(task_name)
+        if stream is None or not len(stream.times):
+            return np.zeros((n_channels, len(times)))
+        index = np.searchsorted(stream.times, times, side='right') - 1
+        held = stream.samples[:, np.maximum(index, 0)].astype(float)
+        held[:, index < 0] = 0
+        return held
+
+    def response(self, concentrations):
+        """
+        Detector output for a block of concentrations, carrying the lag filter state over from the previous block.
+
+        Args:
+            concentrations: (n_loaded_molecules, n_samples) concentrations in molar.
+        Returns:
+            :obj:`numpy.ndarray`: (n_samples,) voltages.
+        """
+        signal = self.baseline + self.sensitivities @ concentrations
+        if self.time_constant > 0:
+            alpha = -np.expm1(-1 / (self.rate * self.time_constant))
+            b, a = [alpha], [1, alpha - 1]
+            if self._zi is None:
+                self._zi = lfilter_zi(b, a) * self.baseline
+            signal, self._zi = lfilter(b, a, signal, zi=self._zi)
+        if self.noise > 0:
+            signal = signal + self.rng.normal(0.0, self.noise, len(signal))
+        return signal
+
+    def read(self, number_of_samples_per_channel=1, timeout=10.0):
+        """
+        Acquire the next samples, waiting on the clock until they are due.
+
+        Args:
+            number_of_samples_per_channel (int): Samples to read.
+            timeout (float): Unused, for compatibility with nidaqmx.Task.read.
+        Returns:
+            list: Voltages, like a single channel nidaqmx read.
+        """
+        n = int(number_of_samples_per_channel)
+        if self.read_time is None:
+            self.read_time = self.backend.now()
+        times = self.read_time + np.arange(n) / self.rate
+        wait = times[-1] - self.backend.now() if n else 0
+        if wait > 0:
+            self.backend.sleep(wait)
+        self.read_time += n / self.rate
+        self.samples_read += n
+        return self.response(self.concentrations(times)).tolist()
+
+    def is_task_done(self):
+        return False
+
+    def stop(self):
+        """Forget the read position, the next read starts at the current time."""
+        self.read_time = None
+
+    def close(self):
+        self.stop()
@@ -0,0 +1,179 @@
+"""Connection-reusing PubChem client and concurrent molecule resolution."""
+
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from olfactometer.molecule_cache import default_cache
+from olfactometer.odorants import Molecule
+
+PUBCHEM_URL = 'https://pubchem.ncbi.nlm.nih.gov'
+# PubChem asks clients to stay below 5 requests per second
+MAX_WORKERS = 4
+
+
+class PubChemClient:
+    """
+    Minimal PubChem HTTP client. Every thread keeps its own keep-alive connection,
+    so concurrent lookups do not pay a TCP/TLS handshake per request.
+
+    Attributes:
+        base_url: Scheme and host requests are sent to. Absolute PubChem URLs are
+            rewritten onto it, which lets tests point Molecule at a local stand-in server.
+        timeout: Socket timeout in seconds.
+        requests_made: Number of HTTP requests issued.
+        connections_opened: Number of connections opened.
+    """
+    def __init__(self, base_url=PUBCHEM_URL, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.requests_made = 0
+        self.connections_opened = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        parts = urlsplit(self.base_url)
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == 'https' \
+                                 else http.client.HTTPConnection
+        self._netloc = parts.netloc
+
+    def _connection(self, fresh=False):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            conn = self._connection_class(self._netloc, timeout=self.timeout)
+            self._local.conn = conn
+            with self._counter_lock:
+                self.connections_opened += 1
+        return conn
+
+    def _path(self, url):
+        if url.startswith(PUBCHEM_URL):
+            url = url[len(PUBCHEM_URL):]
+        elif url.startswith(self.base_url):
+            url = url[len(self.base_url):]
+        return url
+
+    def get_json(self, url):
+        """
+        GET a PubChem URL (absolute or a path) and decode the JSON response.
+
+        Returns:
+            dict: Decoded response, None if PubChem reports the resource as not found.
+        Raises:
+            Exception: Any other non-200 response.
+        """
+        path = self._path(url)
+        for attempt in range(2):
+            conn = self._connection(fresh=attempt > 0)
+            try:
+                conn.request('GET', path, headers={'Connection': 'keep-alive'})
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed the kept-alive connection, retry once on a new one
+                if attempt:
+                    raise
+        with self._counter_lock:
+            self.requests_made += 1
+        if response.status == 404:
+            print("HTTPError for query '%s'" % path)
+            return None
+        if response.status != 200:
+            raise Exception("PubChem returned %d for '%s'" % (response.status, path))
+        return json.loads(body.decode('utf-8'))
+
+    def properties(self, cids, property_list=('MolecularWeight', 'IsomericSMILES')):
+        """
+        Fetch properties of many compounds with a single batch request.
+
+        Returns:
+            dict: CID -> {PubChem property name: value}.
+        """
+        if not cids:
+            return {}
+        url = "/rest/pug/compound/cid/%s/property/%s/JSON" % (
+            ','.join(str(int(cid)) for cid in cids), ','.join(property_list))
+        json_data = self.get_json(url)
+        if json_data is None:
+            return {}
+        return {int(p['CID']): p for p in json_data['PropertyTable']['Properties']}
+
+    def names(self, cids):
+        """
+        Fetch the preferred (first) synonym of many compounds with a single batch request.
+
+        Returns:
+            dict: CID -> lower case name.
+        """
+        if not cids:
+            return {}
+        url = "/rest/pug/compound/cid/%s/synonyms/JSON" % ','.join(str(int(cid)) for cid in cids)
+        json_data = self.get_json(url)
+        if json_data is None:
+            return {}
+        return {int(info['CID']): info['Synonym'][0].lower()
+                for info in json_data['InformationList']['Information'] if info.get('Synonym')}
+
+    def __getstate__(self):
+        # Connections and locks stay with the process, e.g. when Molecules are pickled
+        state = self.__dict__.copy()
+        del state['_local'], state['_counter_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+    def close(self):
+        """Close the connection of the calling thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def resolve_molecules(cids, names=None, cache=None, client=None, max_workers=MAX_WORKERS, refresh=False):
+    """
+    Build Molecules for many CIDs at once.
+    Molecular weights (and names, if not given) of the CIDs missing from the cache are fetched
+    with one batch request each; the PUG-View records needed for vapor pressure and density
+    are then fetched concurrently over kept-alive connections.
+
+    Args:
+        cids (list): PubChem CIDs.
+        names (list, optional): Names to give the molecules, in the order of cids.
+        cache (MoleculeCache, optional): Defaults to the shared cache, False disables caching.
+        client (PubChemClient, optional): Defaults to a client for pubchem.ncbi.nlm.nih.gov.
+        max_workers (int): Number of concurrent lookups.
+        refresh (bool): Ignore cached properties and fetch everything again.
+    Returns:
+        list: Molecules, in the order of cids.
+    """
+    cids = [int(cid) for cid in cids]
+    names = list(names) if names is not None else [None] * len(cids)
+    if cache is None:   cache = default_cache()
+    if client is None:  client = PubChemClient()
+
+    if cache is not False and not refresh:
+        missing = [cid for cid in cids if cache.get(cid).get('molecular_weight') is None]
+        details = client.properties(missing)
+        unnamed = [cid for cid, name in zip(cids, names) if cid in details and not name
+                   and not cache.get(cid).get('name')]
+        fetched_names = client.names(unnamed)
+        for cid, props in details.items():
+            record = {'molecular_weight': float(props['MolecularWeight'])}
+            if 'IsomericSMILES' in props:   record['isomeric_smiles'] = props['IsomericSMILES']
+            if cid in fetched_names:        record['name'] = fetched_names[cid]
+            cache.put(cid, record)
+
+    def resolve(cid_name):
+        cid, name = cid_name
+        return Molecule(cid, name, fill=True, cache=cache, refresh=refresh, client=client)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(resolve, zip(cids, names)))
@@ -1,39 +1,46 @@
-from olfactometer.contour_plot_generator import plotterDim 
 import numpy as np
 import time
-import pandas as pd
 from collections import OrderedDict
 import quantities as pq
-from numba import jit
 from olfactometer.equipment import MFC
-from scipy.optimize import minimize, least_squares
+from olfactometer.lazy import lazy_jit
+from olfactometer.tracing import Tracer
 
 class SmellController:
     def __init__(self, olfactometer, data_container=None,                 
-                 valve_driver=None,kdtree_flag=False,kdtree=None,smell_data_frame = None):
+                 valve_driver=None,kdtree_flag=False,kdtree=None,smell_data_frame = None,
+                 tracer=None):
         # Exclude solvent from most calculations        
         self.olfactometer = olfactometer
         self.data_container = data_container
         self._target_outflow_concs = {}
+        self._target_vector = None
         self._target_outflow_rate = self.max_outflow_rate
+        self.vapor_matrix = None
         self._olfactometer_schedule = {}
-        self._loaded_cids = {}
         self.vapor_phase_concentration_achieved = None
         self.valve_driver = valve_driver  
         self.vapor_phase_concentrations = []
         self.kdtree=kdtree
         self.kdtree_flag = kdtree_flag
         self.smell_data_frame = smell_data_frame 
+        self.tracer = tracer if tracer is not None else Tracer()
+        # matplotlib is only imported once a controller is created
+        from olfactometer.contour_plot_generator import plotterDim
         self.mutlidim_plotting = plotterDim(True, "./graphs")
 
     @property
     def target_outflow_concs(self):
+        if self._target_vector is not None:    # Set through optimize_vector, build the dict on demand
+            self._target_outflow_concs = OrderedDict(zip(self.olfactometer.loaded_molecules, self._target_vector*pq.M))
+            self._target_vector = None
         if not len(self._target_outflow_concs):
             self._target_outflow_concs = {m: 0*pq.M for m in self.olfactometer.loaded_molecules}
         return self._target_outflow_concs
     
     @target_outflow_concs.setter
     def target_outflow_concs(self, concs):
+        self._target_vector = None
         self._target_outflow_concs = concs
     
     @property
@@ -51,6 +58,7 @@ class SmellController:
     @target_outflow.setter
     def target_outflow(self, concs_rate):
         concs, rate = concs_rate
+        self._target_vector = None
         self._target_outflow_concs = concs
         self._target_outflow_rate = rate
         self.update_target()
@@ -126,9 +134,12 @@ class SmellController:
                       self.target_outflow_rate,
                       report=report)    
 
+    def cid_to_molecule(self, cid):
+        return self.olfactometer.cid_to_molecule(cid)
+
     # Search through manifold jars by odorant id.
     def find_odorant_id_by_index(self, m_index):
-        return self.olfactometer.loaded_molecules[m_index]
+        return self.olfactometer.find_odorant_id_by_index(m_index)
             
     @property
     def max_outflow_rate(self):
@@ -147,15 +158,24 @@ class SmellController:
     def get_vapor_concs_dense(self, target_odorants):
         # Make a matrix containing the vapor phase concentrations of each
         # odorant in each jar
-        n_odorants = len(self.olfactometer.loaded_molecules)
+        if self.vapor_matrix is not None:
+            return self.vapor_matrix*pq.M
+        rows = self.olfactometer.molecule_rows
         n_jars = len(self.olfactometer.jars)
-        J = np.zeros((n_odorants, n_jars))*pq.M
+        J = np.zeros((len(rows), n_jars))
         for j, jar in self.olfactometer.jars.items():
-            for m, c in jar.vapor_concs.items():
-                c_ = c.rescale(pq.M)
-                i = self.olfactometer.loaded_molecules.index(m)
-                J[i, j-1] = c_
-        return J
+            for m, c in jar.vapor_concs_molar.items():
+                J[rows[m], j-1] = c
+        return J*pq.M
+
+    def set_vapor_matrix(self, J):
+        """
+        Replace the equilibrium vapor concentrations of the jars, e.g. with the headspace state of a JarSimulator.
+
+        Args:
+            J (:obj:`numpy.ndarray`): Molar concentrations, loaded_molecules x jars. None reverts to the jars.
+        """
+        self.vapor_matrix = J
 
     def get_max_flow_rates(self):
         mixing_mfcs = self.olfactometer.mfcs[0] # Th
@@ -215,9 +235,8 @@ class SmellController:
         """Find the valve duty cycles and MFC settings that bring this route 
         closest to target. This will be done by varying actual valve positions 
         and flow rates, so it should only be done on a virtual olfactometer"""
-        millis = int(round(time.time() * 1000))        
         if target_outflow_concs is None:    target_outflow_concs = self.target_outflow_concs
-        else:                               self._target_outflow_concs = target_outflow_concs
+        else:                               self.target_outflow_concs = target_outflow_concs
         if target_outflow_rate is None:     target_outflow_rate = self.target_outflow_rate
         else:                               self._target_outflow_rate = target_outflow_rate
         
@@ -228,17 +247,9 @@ class SmellController:
         # and their desired outflow concentrations (including zeros)
         target_dense = OrderedDict([(m,(target_outflow_concs[m] if m in target_outflow_concs else 0*pq.M))
                                      for m in self.olfactometer.loaded_molecules])        
-        mixing_mfcs = self.olfactometer.mfcs[0] # The other one (at index 1) is the carrier MFC
-        mfc_names = [mfc.label for mfc in mixing_mfcs]
-        n_mfcs = len(mfc_names)
-        n_jars = len(self.olfactometer.jars)
-        # Make this a self property other
-        vapor_concs_dense = self.get_vapor_concs_dense(target_molecules)        
-        # Make the matrix `A` in the least-squares minimization `argmin(|Ax - b|)`
-        target_outflow_rate_ccm = target_outflow_rate.rescale(pq.cc/pq.min)
-        self.vapor_phase_concentrations = vapor_concs_dense/target_outflow_rate_ccm
-        if(self.kdtree_flag):   self.kdtree_lookup(target_dense, mfc_names, target_outflow_rate_ccm)
-        else:                   self.lls_olfactometer_scheduler(vapor_concs_dense, target_outflow_rate_ccm, target_dense)
+        # Make the target vector `b` of vapor-phase concentrations
+        b = np.array([float(c.rescale(pq.M)) for m,c in target_dense.items()])
+        self.schedule(b, target_outflow_rate.rescale(pq.cc/pq.min))
         # if (self.data_container != None):
         #     diff_time = int(round(time.time() * 1000)) - millis                
         #     print("Diff time to run optimizer:\t" + str(diff_time/1000))
@@ -246,13 +257,59 @@ class SmellController:
         #     self.data_container.append_value(datetime.datetime.now().strftime("%m/%d/%Y %H:%M:%S"), optimizer_results)
         self.optimization_report()                
 
-    def lls_olfactometer_scheduler(self, vapor_concs_dense, target_outflow_rate_ccm, target_dense):
+    def optimize_vector(self, concentrations, target_outflow_rate=None, report=False):
+        """
+        Unit-free variant of optimize() for the per-frame path.
+        The target is handed to the scheduler as a float array, the Quantities dict
+        in target_outflow_concs is only built if something asks for it.
+
+        Args:
+            concentrations (:obj:`numpy.ndarray`): Molar concentrations, in loaded_molecules order.
+                Molecules past the end of the array are targeted at 0.
+            target_outflow_rate (float): Total outflow in cc/min, defaults to the current target rate.
+            report (bool): Print the optimization report.
+        """
+        n_molecules = len(self.olfactometer.loaded_molecules)
+        if len(concentrations) > n_molecules:
+            raise Exception("%d concentrations for %d loaded molecules" % (len(concentrations), n_molecules))
+        b = np.zeros(n_molecules)
+        b[:len(concentrations)] = concentrations
+        if target_outflow_rate is None:     target_outflow_rate_ccm = self.target_outflow_rate.rescale(pq.cc/pq.min)
+        else:                               target_outflow_rate_ccm = target_outflow_rate * pq.cc/pq.min
+        self._target_outflow_concs = {}
+        self._target_vector = b
+        self._target_outflow_rate = target_outflow_rate_ccm
+        self.schedule(b, target_outflow_rate_ccm)
+        if report:  self.optimization_report()
+
+    def schedule(self, b, target_outflow_rate_ccm):
+        """
+        Solve for the olfactometer schedule reaching the target vector `b`.
+        Traced as the 'optimize' stage, see olfactometer.tracing.
+
+        Args:
+            b (:obj:`numpy.ndarray`): Molar concentrations, in loaded_molecules order.
+            target_outflow_rate_ccm: Total outflow as a Quantity in cc/min.
+        """
+        mixing_mfcs = self.olfactometer.mfcs[0] # The other one (at index 1) is the carrier MFC
+        mfc_names = [mfc.label for mfc in mixing_mfcs]
+        vapor_concs_dense = self.get_vapor_concs_dense(None)
+        # Make the matrix `A` in the least-squares minimization `argmin(|Ax - b|)`
+        self.vapor_phase_concentrations = vapor_concs_dense/target_outflow_rate_ccm
+        with self.tracer.span('optimize'):
+            if(self.kdtree_flag):
+                with self.tracer.span('optimize.lookup'):
+                    self.kdtree_lookup(b, mfc_names, target_outflow_rate_ccm)
+            else:
+                self.lls_olfactometer_scheduler(vapor_concs_dense, target_outflow_rate_ccm, b)
+
+    def lls_olfactometer_scheduler(self, vapor_concs_dense, target_outflow_rate_ccm, b):
+        from scipy.optimize import least_squares
         self.vapor_phase_concentrations = vapor_concs_dense/target_outflow_rate_ccm
         np.set_printoptions(precision=12)
-        # Make the target vector `b` of vapor-phase concentrations
-        b = np.array([float(c.rescale(pq.M)) for m,c in target_dense.items()])
         # Obtain the vector of state variables `x` that minimizes `|Ax - b|`            
-        x, _residuals, _rank, _s = np.linalg.lstsq(self.vapor_phase_concentrations, b, rcond=None)
+        with self.tracer.span('optimize.lls'):
+            x, _residuals, _rank, _s = np.linalg.lstsq(self.vapor_phase_concentrations, b, rcond=None)
         self.lls_ = x                        
 
         # List of variables is all the jar-to-manifold times (all combinations)
@@ -308,9 +365,10 @@ class SmellController:
         # Set high bounds to 100% of the time for valves, 100% of max flow rate for MFCs            
         bounds_high = [1]*((n_jars)*n_mfcs) + [1]*n_mfcs            
         # Obtain variables of interest from linear least squares result using non-linear least squares                                            
-        least_squares_result= least_squares(residuals_in, initial_guesses, method='dogbox',
-                                                args=(x,), verbose=0, loss='linear',
-                                                bounds=(bounds_low, bounds_high))            
+        with self.tracer.span('optimize.nlls'):
+            least_squares_result= least_squares(residuals_in, initial_guesses, method='dogbox',
+                                                    args=(x,), verbose=0, loss='linear',
+                                                    bounds=(bounds_low, bounds_high))            
 
 
         # Extract resulting solution into a dictionary of variable names and values
@@ -346,8 +404,7 @@ class SmellController:
         self.least_squares_result = least_squares_result                    
 
 
-    def kdtree_lookup(self, target_dense, mfc_names, F):
-        concentration_list = np.array([float(c.rescale(pq.M)) for m,c in target_dense.items()])
+    def kdtree_lookup(self, concentration_list, mfc_names, F):
         print("CONC LIST" + str(concentration_list))
         distance,index = self.kdtree.query(list(concentration_list))
         machine_config = self.smell_data_frame.index[index]
@@ -359,10 +416,11 @@ class SmellController:
         entry_results = list(machine_config)[2:]
         entry_results += list(machine_config)[0:2]
         # NOTE: Check for empty usage of MFC when generating Dataframe
-        if (entry_results[20] == 0):    # For A
-            for i in range(10):     entry_results[i] = 0
-        if (entry_results[21] == 0):    # For B 
-            for i in range(10):     entry_results[i+10] = 0   
+        n_jars = len(self.olfactometer.jars)
+        if (entry_results[2*n_jars] == 0):      # For A
+            for i in range(n_jars):     entry_results[i] = 0
+        if (entry_results[2*n_jars+1] == 0):    # For B 
+            for i in range(n_jars):     entry_results[i+n_jars] = 0   
 
         values = {self.variables[i]: value
                 for i, value in enumerate(entry_results)} 
@@ -407,7 +465,8 @@ class SmellController:
         # and their desired outflow concentrations (including zeros)
         target_dense = OrderedDict([(m,(self.target_outflow_concs[m] if m in self.target_outflow_concs else 0*pq.M))
                                      for m in self.olfactometer.loaded_molecules])
-        report = pd.DataFrame(index=target_molecules, columns=['Target', 'Achieved', '% Error'])
+        import pandas as pd
+        report = pd.DataFrame(index=list(target_molecules), columns=['Target', 'Achieved', '% Error'])
         for i, m in enumerate(target_molecules):
             a = target_dense[m] * pq.M 
             b = self.vapor_phase_concentrationschieved[i]
@@ -429,19 +488,19 @@ class SmellController:
         return x/x.sum()
 
     def update_target_from_logical(self):
-        if (self.valve_driver.mixtures is None):
+        if (self.valve_driver.mixtures is None or not len(self.valve_driver.mixtures)):
             print("Error, mixture dequeue not initialized")
         else:
-            self.target_outflow_concs = {self.cid_to_molecule(\
-                                            self.valve_driver.cids[i]): conc
-                                        for i, conc
-                                        in enumerate(self.valve_driver.mixtures[-1])}
+            cid_to_molecule = self.olfactometer.cid_to_molecule
+            self.target_outflow_concs = {cid_to_molecule(cid): conc*pq.M
+                                         for cid, conc
+                                         in zip(self.valve_driver.cids, self.valve_driver.mixtures[-1])}
                 
 
-@jit
+@lazy_jit
 def calc_conc_jit(variables, n_jars, max_flow_rates, A):
-    wA = variables[2:12]        # first 2 are MFCs, proceeding 10 are wAs
-    wB = variables[12:22]
+    wA = variables[2:2+n_jars]  # first 2 are MFCs, proceeding n_jars are wAs
+    wB = variables[2+n_jars:2+2*n_jars]
     fA = variables[0]
     fB = variables[1]
     fA = fA * max_flow_rates[0]
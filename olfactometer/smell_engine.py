@@ -2,22 +2,21 @@ import json
 import sys
 import pickle
 import datetime
-import pandas as pd
 import sys
 from collections import OrderedDict
 from collections import deque 
-from scipy.spatial import KDTree
 from olfactometer.smell_controller import SmellController
 import quantities as pq
 import numpy as np
 np.set_printoptions(precision=4)
-from olfactometer.equipment import Olfactometer
-from olfactometer.my_equipment import MyValve, MyJar, MyLowMFC, \
-                                      MyMediumMFC, MyHighMFC
+from olfactometer.my_equipment import MyValve, MyOlfactometer
 from olfactometer.odorants import Solution, Compound, ChemicalOrder, \
                                   Vendor, Molecule
+from olfactometer.pubchem import resolve_molecules
 from pprint import pprint
-from olfactometer.valve_driver import ValveDriver
+from olfactometer.valve_driver import ValveDriver, MAX_VALVES
+from olfactometer.clock import SystemClock
+from olfactometer.tracing import Tracer
 
 class SmellEngine:
 
@@ -25,14 +24,20 @@ class SmellEngine:
     _om_dilutions = []
 
     def __init__(self, total_flow_rate=4000, n_odorants= 3, data_container = None, debug_mode=True, 
-                write_flag=False, PID_mode=False, look_up_table_path = None, oms=None):    
+                write_flag=False, PID_mode=False, look_up_table_path = None, oms=None, n_jars=None, clock=None,
+                tracer=None):    
         self.N_ODORANTS = n_odorants
+        if n_jars is not None and n_jars > MAX_VALVES:
+            raise Exception("%d jars requested, the valve driver supports at most %d" % (n_jars, MAX_VALVES))
+        self.n_jars = n_jars    # None: as many as MyOlfactometer describes
         print("Initializing")       
         self.odorant_molecules = oms        
         self.write_flag = write_flag
         self.PID_mode = PID_mode
         self.total_flow_rate = total_flow_rate
         self.debug_mode = debug_mode
+        self.clock = clock if clock is not None else SystemClock()
+        self.tracer = tracer if tracer is not None else Tracer()
         self.data_container = data_container
         self.starting_concentration_vector = None
         self.target_concentration = []        
@@ -94,8 +99,9 @@ class SmellEngine:
         """
         # Instantiate two molecules by CID number
         # self.molecules = [Molecule(om_id, fill=True) for om_id in self.om_ids]
-        if (self.odorant_molecules == None):    self.molecules = [Molecule(om_id, fill=True) for om_id in self.om_ids]
-        else:                                   self.molecules = [Molecule(om, self.odorant_molecules[om], fill=True) for om in self.odorant_molecules]
+        if (self.odorant_molecules == None):    self.molecules = resolve_molecules(self.om_ids)
+        else:                                   self.molecules = resolve_molecules(list(self.odorant_molecules),
+                                                                                   names=list(self.odorant_molecules.values()))
         # Light mineral oil, an odorless solvent
         self.molecules.append(Molecule(347911206, 'Light Mineral Oil', fill=True, vapor_press=0, dens=0.85))
         light_mineral_oil = self.molecules[-1]
@@ -130,8 +136,15 @@ class SmellEngine:
                            for dilution in self.om_dilutions]
         self.solute_volumes = [self.solution_volume/dilution
                           for dilution in self.om_dilutions]        
-        # Jars [10]
-        for i in range(10):
+        # The jars and MFCs in use are described by MyOlfactometer
+        self.olfactometer = MyOlfactometer(self.n_jars)
+        self.n_jars = len(self.olfactometer.jars)
+        if self.n_jars > MAX_VALVES:
+            raise Exception("%d jars described, the valve driver supports at most %d" % (self.n_jars, MAX_VALVES))
+        # Odorants go in the first half of the jars, the second half supplies the paired clean air
+        if len(self.compounds) > self.n_jars // 2:
+            raise Exception("%d odorants do not fit in %d jars" % (len(self.compounds), self.n_jars))
+        for i in range(self.n_jars):
             if (i < len(self.compounds)):
                 self.solutions.append(
                     Solution({self.compounds[i]: self.solute_volumes[i],
@@ -144,32 +157,31 @@ class SmellEngine:
         # Create `n_odorants` valves of the type that we use
         self.valves = [MyValve('Valve #%d' % (i+1))
                        for i in range(self.n_solutions)]        
-        self.jars = [MyJar('Jar #%d' % (i+1))
-                     for i in range(self.n_solutions)]
+        self.jars = list(self.olfactometer.jars.values())
         # Fill each of those jars with one of our odorants        
         for i, jar in enumerate(self.jars):
             jar.fill(self.solutions[i], 25*pq.mL)
-        # Add two MFCs (one for low flow and one for high flow),
+        # Two mixing MFCs (one for high flow and one for low flow) and the carrier,
         # set their setpoints
-        self.mfc_high = MyMediumMFC('MFC_A_High')
-        self.mfc_low = MyLowMFC('MFC_B_Low')
-        self.mfc_carrier = MyHighMFC('MFC_Carrier')
+        (self.mfc_high, self.mfc_low), self.mfc_carrier = self.olfactometer.mfcs
         self.mfc_high.curr_flow_rate = 0.2 * pq.L / pq.min
         self.mfc_low.curr_flow_rate = 1.0 * pq.cc / pq.min
         self.mfc_carrier.curr_flow_rate = 1.8 * pq.L / pq.min
-        self.mfcs = [(self.mfc_high, self.mfc_low), self.mfc_carrier]
+        self.mfcs = self.olfactometer.mfcs
         #Load KD-Tree
         if(self.look_up_table_path != None):
             print("Initialzing KD-Tree")
+            import pandas as pd
+            from scipy.spatial import KDTree
             df = pd.read_pickle(self.look_up_table_path)
             sys.setrecursionlimit(1000000)
             kdtree = KDTree(df.values)
-            self.olfactometer = Olfactometer(self.jars, self.mfcs)
-            self.smell_controller = SmellController(self.olfactometer, self.data_container, kdtree_flag=True,kdtree=kdtree, smell_data_frame=df)
+            self.smell_controller = SmellController(self.olfactometer, self.data_container, kdtree_flag=True,kdtree=kdtree, smell_data_frame=df,
+                                                    tracer=self.tracer)
 
         else: 
-            self.olfactometer = Olfactometer(self.jars, self.mfcs)
-            self.smell_controller = SmellController(self.olfactometer, self.data_container, kdtree_flag=False)
+            self.smell_controller = SmellController(self.olfactometer, self.data_container, kdtree_flag=False,
+                                                    tracer=self.tracer)
                 
         self.desired = {molecule: (10**-i)*1e-7*pq.M
                         for i, molecule in enumerate(self.molecules[:-1])}
@@ -190,13 +202,20 @@ class SmellEngine:
 
         Attributes:
             debug_mode: Flag denoting physical vs simulated hardware.
+            clock: Time source of the ValveDriver. The timer thread is only started on a
+                realtime clock, a VirtualClock is driven with ValveDriver.run_for instead.
+            tracer: Latency tracer the ValveDriver records frame builds and hardware writes on.
         """        
         self.smell_controller.valve_driver = ValveDriver(self.olfactometer,
                                                data_container=self.data_container,                                               
                                                PID_mode=self.PID_mode,
-                                               debug_mode=self.debug_mode)        
+                                               debug_mode=self.debug_mode,
+                                               clock=self.clock,
+                                               tracer=self.tracer)        
+        self.smell_controller.valve_driver.cids = [m.cid for m in self.olfactometer.loaded_molecules]
         self.smell_controller.valve_driver.timer_setup(interval=0.5)
-        self.smell_controller.valve_driver.timer_start()
+        if self.clock.realtime:
+            self.smell_controller.valve_driver.timer_start()
 
 
     def set_odorant_molecule_ids(self, ids):
@@ -231,10 +250,9 @@ class SmellEngine:
         self.smell_controller.valve_driver.issue_odorants(self.smell_controller.clean_valve_mfc_values())
 
     def get_valve_duty_cycles(self):
-        # TODO: Dynamically determine # of valves
         valve_states = self.print_data_binary(self.smell_controller.valve_driver.valve_durations)  
         valve_duty_cycles = []
-        for x in range(5):
+        for x in range(len(valve_states) // 2):     # Odorant valves, their clean air pairs are omitted
             digital_data = [valve_states[x][i] for i in range(3)]
             valve_duty_cycles.append(digital_data)
         return valve_duty_cycles
@@ -339,13 +357,30 @@ class SmellEngine:
             concentrations: List containing concentration values
         """
         
+        if len(concentrations) != self.N_ODORANTS:
+            raise Exception("Expected %d concentrations, got %d" % (self.N_ODORANTS, len(concentrations)))
         self.target_concentration = concentrations        
+        molecules = self.olfactometer.loaded_molecules
         self.desired = OrderedDict([
-            (self.olfactometer.find_odorant_id_by_index(i), concentrations[i]*pq.M) for i in range(self.N_ODORANTS)])
+            (molecules[i], concentrations[i]*pq.M) for i in range(self.N_ODORANTS)])
         # Run optimizer and receive optimization results by setting concentrations and flow rate                
         self.smell_controller.target_outflow = (self.desired, self.total_flow_rate*pq.cc/pq.min) #change to 4000 when operating
         self.smell_controller.valve_driver.mixtures.append(concentrations)        
     
+    def set_desired_concentration_vector(self, concentrations):
+        """
+        Per-frame variant of set_desired_concentrations: the float array goes straight
+        to the unit-free optimizer path, without building Quantities.
+
+        Attributes:
+            concentrations: :obj:`numpy.ndarray` of molar concentrations, one per odorant
+        """
+        if len(concentrations) != self.N_ODORANTS:
+            raise Exception("Expected %d concentrations, got %d" % (self.N_ODORANTS, len(concentrations)))
+        self.target_concentration = concentrations
+        self.smell_controller.optimize_vector(concentrations, self.total_flow_rate)
+        self.smell_controller.valve_driver.mixtures.append(concentrations)
+
     def get_desired_concentrations(self):
         return self.target_concentration
     
@@ -1,13 +1,11 @@
+import asyncio
 import struct
-import select
-import socket
-import sys
 import binascii
-import getopt
-import time
+import traceback
+import json
 import quantities as pq
 
-from collections import deque 
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import datetime
 import typer
@@ -15,159 +13,386 @@ from typing import Optional
 from pprint import pprint
 from olfactometer.smell_engine import SmellEngine
 from olfactometer.data_container import DataContainer
+from olfactometer.frame_coalescer import FrameCoalescer
+from olfactometer.frame_gate import FrameGate
+from olfactometer.frame_codec import decode_frame, frame_size, antilog
+from olfactometer.clock import SystemClock
+from olfactometer.tracing import Tracer
+
+HOST = 'localhost'
+PORT = 12345
+STATS_QUERY = -1     # Odorant count a client sends instead of a handshake to query the latency stats
+
+
+class ClientSession:
+    """
+    Connection state of a single client (VR app, dashboard, experiment script)
+    attached to the SmellEngineCommunicator.
+
+    Attributes:
+        reader: asyncio.StreamReader the client's bytes are read from.
+        writer: asyncio.StreamWriter used to close the connection.
+        address: (host, port) of the remote end.
+        num_odorants: Number of odorants announced in the client's handshake.
+        cids: PubChemIDs received from the client.
+        rows: Optimizer row of each of the client's odorants, None if the client
+            sends them in the Smell Engine's own order.
+        dilutions: Dilutions received from the client.
+        frames_ignored: Frames received while another client held control.
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.address = writer.get_extra_info('peername')
+        self.num_odorants = 0
+        self.cids = []
+        self.rows = None
+        self.dilutions = []
+        self.frame_size = 0
+        self.frames_ignored = 0
+
+    def __repr__(self):
+        return 'ClientSession(%s)' % str(self.address)
+
+    def to_rows(self, frame, n_rows):
+        """
+        Reorder a frame from the client's CID order into optimizer rows.
+        Odorants the client does not send are NaN, i.e. off ('latest') or unchanged ('merge').
+
+        Args:
+            frame (:obj:`numpy.ndarray`): Log10 concentrations in the client's order.
+            n_rows (int): Number of odorants loaded in the olfactometer.
+        """
+        if self.rows is None:
+            return frame
+        ordered = np.full(n_rows, np.nan)
+        ordered[self.rows] = frame
+        return ordered
+
 
 class SmellEngineCommunicator:
     """
     SmellEngineCommunicator establishes a network comm line between Unity and Smell Engine.
-    First the equipment is configured, then the socket waits for a connection (client devices)
-    Once client connection is established, PubChemID's are assigned, ValveDriver is instantiated,
-    then socket loops continuously listening for sets of data.
+    An asyncio server accepts any number of clients. Each client performs the handshake
+    (# of odorants, PubChemID's, dilutions); the first completed handshake configures the
+    equipment and instantiates the ValveDriver, then every client loops listening for sets of data.
+
+    Control is arbitrated first-come, first-served: the oldest connected client drives the
+    olfactometer, frames from the other clients are read and discarded, and control passes
+    to the next oldest client when the controller disconnects.
+    A client that sends STATS_QUERY as its number of odorants is answered with the
+    pipeline statistics instead (see send_stats) and disconnected.
+    Blocking work (PubChem lookups, optimization) runs in a single-worker executor so
+    solves never overlap and the event loop keeps servicing sockets. Frames from the
+    controller go through a FrameCoalescer, so the optimizer always solves for the
+    freshest target instead of working through a backlog, and a FrameGate rate-limits
+    solves and skips frames that stay within the concentration dead-band.
 
     Attributes:
         debug_mode: flag for physical vs simulated hardware specified via command-line.
+        coalesce_policy: 'latest' or 'merge', see FrameCoalescer.
+        min_interval: Minimum time between two solves in seconds, see FrameGate.
+        deadband: Per-odorant log10 concentration change required to re-solve, see FrameGate.
+        clock: Time source shared with the FrameGate and the Smell Engine, see olfactometer.clock.
+        tracer: Per-stage latency tracer shared with the Smell Engine, see olfactometer.tracing.
     """
-    def __init__(self, debug_mode=False, odor_table=None, write_flag=False):    
+    def __init__(self, debug_mode=False, odor_table=None, write_flag=False, host=HOST, port=PORT,
+                 coalesce_policy='latest', min_interval=0.0, deadband=0.0, clock=None, tracer=None):
         print("Initializing")    
         self.write_flag = write_flag
         self.debug_mode = debug_mode
+        self.clock = clock if clock is not None else SystemClock()
+        self.tracer = tracer if tracer is not None else Tracer()
         self.odor_table = odor_table
+        self.host = host
+        self.port = port
         self.data_container = DataContainer()                     
-        # CREATE TCP/IP SOCKET
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server.setblocking(0)
-        self.server.settimeout(1)
-        self.server.bind(('localhost', 12345))
         self.num_odorants = 0
-        self.last_concentrations = []
-        print("Listening for clients..")
-        self.server.listen(1)
-        # Sockets from which we expect to read
-        self.inputs = [ self.server ]
-        # Sockets to which we expect to write
-        self.outputs = [ ]
+        self.clients = []       # Connected clients, oldest first. clients[0] holds control.
         self.smell_engine = None
         self.initialized = False
-        self.init_main_loop()
-
-    def init_main_loop(self):
-        while self.inputs:
-            readable, writable, exceptional = select.select(self.inputs, self.outputs, self.inputs, 1)
-            if not readable:
-                print("Skip")
-                time.sleep(1)
-            else:
-                # Handle inputs
-                for select_readables in readable:
-                    if select_readables is self.server:
-                        # A "readable" server socket is ready to accept a connection
-                        self.client, self.client_adr = self.server.accept()
-                        print("Client connected at:\t" + str(self.client_adr))        
-                        self.inputs.append(self.client)
-                        self.client.setblocking(0)
-                        self.inputs.append(self.client)
-                    else:
-                        if (self.num_odorants == 0):    self.receive_quantity_odorants()
-                        else:
-                            if not self.smell_engine:                                
-                                self.smell_engine = SmellEngine(data_container=self.data_container, debug_mode=self.debug_mode, 
-                                                            write_flag=self.write_flag,PID_mode=False, look_up_table_path=self.odor_table)
-                            elif not len(self.smell_engine.om_ids) > 0:
-                                self.smell_engine.set_odorant_molecule_ids(self.receive_pub_chemIDs())
-
-                            elif (self.smell_engine.om_dilutions != None) and not len(self.smell_engine.om_dilutions) > 0:
-                                self.smell_engine.set_odorant_molecule_dilutions(self.recieve_dilutions())
-                            elif not self.initialized:                              
-                                #NEED TO SET smell_engine.set_odorant_molecule_dilutions([10, 10])  
-                                #I am not sure whats the best way to do this should we do this in unity editor and then send over a socket connection. 
-                                self.smell_engine.set_odorant_molecule_dilutions([10, 10,10])
-                                self.smell_engine.initialize_smell_engine_system()  
-                                self.initialized = True      
-                            else:
-                                self.main_thread_loop()        
-                  
-    def receive_quantity_odorants(self):
+        self.server = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.coalescer = FrameCoalescer(coalesce_policy)
+        self.gate = FrameGate(min_interval, deadband, self.clock)
+        self._engine_lock = None
+
+    @property
+    def controller(self):
+        """The client currently driving the olfactometer, if any."""
+        return self.clients[0] if self.clients else None
+
+    def run(self):
         """
-        Assign PubChemID's on startup to the LogicalOlfactomete cid's.
-        Method is called from LogicalOlfactometer instantiation, so it waits 
-        until the first set of values are transmitted from Unity (which are the PubChemIDs)
+        Serve clients until interrupted, then shut the Smell Engine down.
         """
-        print('\nwaiting for a connection')
-        self.unpacker = struct.Struct('i')      # Receive list of ints
-        data = self.client.recv(self.unpacker.size)
-        if data:
-            # print('received # of PubChemIDs:\t{!r}'.format(binascii.hexlify(data)))
-            unpacked_data = list(self.unpacker.unpack(data))
-            print('Received  # of PubChem IDs:\t', unpacked_data)
-            self.num_odorants = unpacked_data[0]
-        
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
 
-    def receive_pub_chemIDs(self):
+    async def serve(self):
         """
-        Assign PubChemID's on startup to the LogicalOlfactomete cid's.
-        Method is called from LogicalOlfactometer instantiation, so it waits 
-        until the first set of values are transmitted from Unity (which are the PubChemIDs)
+        Bind the server socket and accept clients forever.
         """
-        print('\nreceiving pub chem IDS')
-        self.unpacker = struct.Struct(self.num_odorants * 'i')      # Receive list of ints
-        data = self.client.recv(self.unpacker.size)
-        if (data):
-            print('received PubChemIDs:\t{!r}'.format(binascii.hexlify(data)))
-            unpacked_data = list(self.unpacker.unpack(data))
-            print('unpacked PubChem IDs:\t', unpacked_data)
-            return unpacked_data            # This data is assigned to the PID's prop of Valve Driver.
+        self._engine_lock = asyncio.Lock()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        print("Listening for clients..")
+        solver = asyncio.create_task(self.solve_loop())
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            solver.cancel()
+
+    async def solve_loop(self):
+        """
+        Consumer side of the coalescer: solve for the freshest target whenever the executor is free.
+        If the gate is closed the loop waits it out, picking up any newer frame that arrived meanwhile.
+        Frames left over once no client holds control are dropped.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            concentration_mixtures = await self.coalescer.get()
+            wait = self.gate.defer()
+            if wait > 0:
+                await self.wait_until_open(wait)
+                concentration_mixtures = self.coalescer.take(concentration_mixtures)
+            if not self.controller:
+                continue
+            with self.tracer.span('gate'):
+                admitted = self.gate.admit(concentration_mixtures)
+            if not admitted:
+                continue
+            try:
+                with self.tracer.span('dispatch'):
+                    await loop.run_in_executor(self.executor, self.load_concentrations, concentration_mixtures)
+            except Exception:
+                traceback.print_exc()
 
+    async def wait_until_open(self, wait):
+        """
+        Wait out the FrameGate's rate limit. On a VirtualClock nothing else drives the valve driver
+        (SmellEngine only starts its timer thread on a realtime clock), so the valve driver is
+        stepped across the wait instead, keeping the simulated DAQ fed while the clock advances.
 
-    def recieve_dilutions(self):
+        Args:
+            wait (float): Seconds of clock time until the gate opens.
         """
-        Recieve Dilutions values for self.smell_engine.set_odorant_molecule_dilutions([10, 10,10])
+        if self.clock.realtime or not self.initialized:
+            await self.clock.sleep_async(wait)
+            return
+        valve_driver = self.smell_engine.smell_controller.valve_driver
+        await asyncio.get_running_loop().run_in_executor(self.executor, valve_driver.run_for, wait)
+
+    async def handle_client(self, reader, writer):
+        """
+        Connection callback, runs once per client for the lifetime of the connection.
+        """
+        client = ClientSession(reader, writer)
+        self.clients.append(client)
+        print("Client connected at:\t" + str(client.address))
+        try:
+            if not await self.receive_handshake(client):
+                return
+            await self.initialize_smell_engine(client)
+            if not self.map_client_rows(client):
+                return
+            while True:
+                concentration_mixtures = await self.main_thread_loop(client)
+                if client is not self.controller:
+                    client.frames_ignored += 1
+                    continue
+                self.coalescer.put(client.to_rows(concentration_mixtures, self.num_odorants))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            print("Connection with %s ended: %s" % (str(client.address), e))
+        finally:
+            await self.disconnect(client)
+
+    async def receive_handshake(self, client):
+        """
+        Read the handshake of a newly connected client.
+
+        Returns:
+            bool: False if the client was rejected or only queried the stats.
+        """
+        await self.receive_quantity_odorants(client)
+        if client.num_odorants == STATS_QUERY:
+            await self.send_stats(client)
+            return False
+        if self.num_odorants and client.num_odorants > self.num_odorants:
+            print("Rejecting %s: sent %d odorants, Smell Engine is configured for %d"
+                  % (str(client.address), client.num_odorants, self.num_odorants))
+            return False
+        client.cids = await self.receive_pub_chemIDs(client)
+        client.dilutions = await self.recieve_dilutions(client)
+        return True
+
+    async def initialize_smell_engine(self, client):
+        """
+        Configure the equipment from the first client's handshake.
+        Later clients share the already initialized Smell Engine.
+        """
+        async with self._engine_lock:
+            if self.initialized:
+                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self._initialize_smell_engine, client)
+
+    def _initialize_smell_engine(self, client):
+        self.num_odorants = client.num_odorants
+        self.smell_engine = SmellEngine(n_odorants=self.num_odorants, data_container=self.data_container,
+                                        debug_mode=self.debug_mode, write_flag=self.write_flag, PID_mode=False,
+                                        look_up_table_path=self.odor_table, clock=self.clock, tracer=self.tracer)
+        self.smell_engine.set_odorant_molecule_ids(client.cids)
+        self.smell_engine.set_odorant_molecule_dilutions(client.dilutions)
+        self.smell_engine.initialize_smell_engine_system()
+        self.initialized = True
+
+    def map_client_rows(self, client):
+        """
+        Look up the optimizer row of every CID in the client's handshake once, so its frames
+        can be reordered with a single fancy-indexing assignment.
+
+        Returns:
+            bool: False if the client was rejected.
         """
-        print('\nreceiving Dilutions')
-        self.unpacker = struct.Struct(self.num_odorants * 'i')      # Receive list of ints
         try:
-            data = self.client.recv(self.unpacker.size)
-            if (data):
-                print('received Dilutions:\t{!r}'.format(binascii.hexlify(data)))
-                unpacked_data = list(self.unpacker.unpack(data))
-                print('unpacked Dilutions:\t', unpacked_data)
-                return unpacked_data            # This data is assigned to the PID's prop of Valve Driver.
-        except socket.error as e:
-                if str(e) == "[Errno 35] Resource temporarily unavailable":
-                    time.sleep(0.1)
-    
-    def main_thread_loop(self):
-        """
-        LoopConnection continuously listens for a list of doubles, converts the bytes,
-        then issues them to the Smell Composer and Valve Driver via the method load_concentrations()
-        """
-        self.client.setblocking(1)
-        self.unpacker = struct.Struct((self.num_odorants) * 'd')
-        try:            
-            millis = int(round(time.time() * 1000))            
-            data = self.client.recv(self.unpacker.size)                    
-            if data:                                            
-                unpacked_data = list(self.unpacker.unpack(data))                    
-                print("Received:\t" + str(unpacked_data))  
-                self.load_concentrations(unpacked_data)                                                                       
-            diff_time = int(round(time.time() * 1000)) - millis
-            if (self.write_flag):
-                print("Diff time to receive values:\t" + str(diff_time))
-                target_conc = {'target_concentration' : unpacked_data, 'receive_target_conc_latency' : diff_time/1000}
-                self.data_container.append_value(datetime.datetime.now().strftime("%m/%d/%Y %H:%M:%S"), target_conc)                           
-        except socket.error as e:
-            print(("Couldnt connect with the socket-server: "
-                "%s\n terminating program") % e)
-            print("struct error, aborting connection")
-            print("connection aborted")
+            rows = [self.smell_engine.olfactometer.cid_index(cid) for cid in client.cids]
+        except Exception as e:
+            print("Rejecting %s: %s" % (str(client.address), e))
+            return False
+        if len(set(rows)) != len(rows):
+            print("Rejecting %s: duplicate PubChem IDs %s" % (str(client.address), client.cids))
+            return False
+        if rows != list(range(self.num_odorants)):
+            client.rows = np.array(rows, dtype=np.intp)
+        return True
+
+    async def disconnect(self, client):
+        """
+        Drop a client. If it held control, control passes to the next oldest client.
+        Once no clients remain the valves are closed until somebody reconnects; the DAQ writes
+        that close them run on the executor, after any solve already in flight.
+        """
+        was_controller = client is self.controller
+        if client in self.clients:
+            self.clients.remove(client)
+        client.writer.close()
+        print("Client disconnected:\t" + str(client.address))
+        if was_controller:
+            # Frames still waiting to be solved were sent by the client that just left
+            self.coalescer.clear()
+            if self.controller:
+                print("Control passed to:\t" + str(self.controller.address))
+        if not self.clients and self.initialized and client.num_odorants != STATS_QUERY:
+            self.gate.reset()
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.close_valves)
             if (self.write_flag):   self.data_container.create_json()
+
+    def close_valves(self):
+        """
+        Pause the valve driver's timer and zero its outputs, unless a client reconnected meanwhile.
+        """
+        if self.controller:
+            return
+        valve_driver = self.smell_engine.smell_controller.valve_driver
+        valve_driver.timer_pause()
+        if valve_driver.has_written:
+            valve_driver.write_zeroes()
+
+    def stats(self):
+        """
+        Statistics of the pipeline: per-stage latencies, frames coalesced and solves gated.
+        """
+        return {'stages': self.tracer.stats(),
+                'frames': self.coalescer.stats(),
+                'solves': self.gate.stats()}
+
+    async def send_stats(self, client):
+        """
+        Answer a stats query with stats() as UTF-8 JSON, preceded by its length in bytes ('i').
+        """
+        payload = json.dumps(self.stats()).encode('utf-8')
+        client.writer.write(struct.pack('i', len(payload)) + payload)
+        await client.writer.drain()
+        print("Sent stats to:\t" + str(client.address))
+
+    def close(self):
+        """
+        Stop serving and release the hardware.
+        """
+        if self.initialized:
             self.smell_engine.close_smell_engine()
-            self.client.close()
-            print("Client disconnected, server shutting down.")                            
-            sys.exit(1)            
-        except struct.error:
-            print("Skipping odor frame")
-            
-
-    
+            self.initialized = False
+        self.executor.shutdown(wait=False)
+        print("Frames:\t" + str(self.coalescer.stats()))
+        print("Solves:\t" + str(self.gate.stats()))
+        print("Latency:\n" + self.tracer.summary())
+        print("Server shut down.")
+
+    async def receive_quantity_odorants(self, client):
+        """
+        Read the number of odorants the client is going to transmit.
+        This is the first value transmitted from Unity on connection.
+        """
+        print('\nwaiting for a connection')
+        unpacker = struct.Struct('i')      # Receive list of ints
+        data = await client.reader.readexactly(unpacker.size)
+        unpacked_data = list(unpacker.unpack(data))
+        print('Received  # of PubChem IDs:\t', unpacked_data)
+        client.num_odorants = unpacked_data[0]
+
+    async def receive_pub_chemIDs(self, client):
+        """
+        Assign PubChemID's on startup to the LogicalOlfactomete cid's.
+        Waits until the set of PubChemIDs following the # of odorants is transmitted from Unity.
+        """
+        print('\nreceiving pub chem IDS')
+        unpacker = struct.Struct(client.num_odorants * 'i')      # Receive list of ints
+        data = await client.reader.readexactly(unpacker.size)
+        print('received PubChemIDs:\t{!r}'.format(binascii.hexlify(data)))
+        unpacked_data = list(unpacker.unpack(data))
+        print('unpacked PubChem IDs:\t', unpacked_data)
+        return unpacked_data            # This data is assigned to the PID's prop of Valve Driver.
+
+    async def recieve_dilutions(self, client):
+        """
+        Recieve the dilution of each odorant, passed to self.smell_engine.set_odorant_molecule_dilutions.
+        """
+        print('\nreceiving Dilutions')
+        unpacker = struct.Struct(client.num_odorants * 'i')      # Receive list of ints
+        data = await client.reader.readexactly(unpacker.size)
+        print('received Dilutions:\t{!r}'.format(binascii.hexlify(data)))
+        unpacked_data = list(unpacker.unpack(data))
+        print('unpacked Dilutions:\t', unpacked_data)
+        return unpacked_data
+
+    async def main_thread_loop(self, client):
+        """
+        Waits for the next list of doubles from the client and views the received bytes as an array.
+        The event loop is free to serve other clients while waiting, so there is
+        no polling delay before a frame that arrives after a pause.
+
+        Returns:
+            :obj:`numpy.ndarray`: Log10 concentrations, read-only view of the received frame.
+        """
+        if not client.frame_size:
+            client.frame_size = frame_size(client.num_odorants)
+        # Waiting for the client to start sending is idle time, the receive span starts at its first byte
+        data = await client.reader.readexactly(1)
+        with self.tracer.span('receive') as receive:
+            data += await client.reader.readexactly(client.frame_size - 1)
+        with self.tracer.span('decode'):
+            unpacked_data = decode_frame(data, client.num_odorants)
+        if (self.write_flag):
+            print("Diff time to receive values:\t" + str(receive.duration_ns // 1000000))
+            target_conc = {'target_concentration' : unpacked_data.tolist(), 'receive_target_conc_latency' : receive.duration}
+            self.data_container.append_value(datetime.datetime.now().strftime("%m/%d/%Y %H:%M:%S"), target_conc)
+        return unpacked_data
+
     def load_concentrations(self, concentration_mixtures):
         """
         Append list of concentrations to mixtures deque within Smell Composer,
@@ -176,40 +401,32 @@ class SmellEngineCommunicator:
         Smell Engine pipeline.         
 
         Attributes:
-            concentration_mixtures: List of desired odorant concentrations
+            concentration_mixtures: Desired log10 odorant concentrations, one per odorant in handshake order
         """
-        try:
-            antilog_concentration_mixtures = [] 
-            for concentration in concentration_mixtures:
-                if abs(10**concentration)==float('inf'):    # If overflow
-                    antilog_concentration_mixtures.append(0)    
-                else:
-                    antilog_concentration_mixtures.append(10**concentration)
-            if (self.smell_engine.smell_controller.valve_driver.timer_paused):    self.smell_engine.smell_controller.valve_driver.timer_pause()
-            # Match the odorant concentration value to its odorant ID via index
-            self.desired = {self.smell_engine.olfactometer.find_odorant_id_by_index(0): antilog_concentration_mixtures[0]*pq.M, \
-                            self.smell_engine.olfactometer.find_odorant_id_by_index(1): antilog_concentration_mixtures[1]*pq.M, \
-                            self.smell_engine.olfactometer.find_odorant_id_by_index(2): antilog_concentration_mixtures[2]*pq.M}
-            # Run optimizer and receive optimization results by setting concentrations and flow rate
-            if (self.last_concentrations is not concentration_mixtures):            
-                self.smell_engine.set_desired_concentrations(antilog_concentration_mixtures)
-                self.last_concentrations = concentration_mixtures
-            else:   # skip every other repeated instance
-                self.last_concentrations = []   
-        except OverflowError as err:
-            print('Hit overflow, skipping this odor frame')
-
-    
+        if not self.controller:     # The last client left while this solve was queued
+            return
+        antilog_concentration_mixtures = antilog(concentration_mixtures)
+        if (self.smell_engine.smell_controller.valve_driver.timer_paused):    self.smell_engine.smell_controller.valve_driver.timer_resume()
+        # Run optimizer and receive optimization results by setting concentrations and flow rate.
+        # Repeated and near-identical frames were already filtered out by the FrameGate.
+        self.smell_engine.set_desired_concentration_vector(antilog_concentration_mixtures)
+
+
 
 def main(debug_mode: bool, 
         odor_table_mode: Optional[str] = typer.Argument(None, help="Can specify odor table pkl file."),  
-        write_data: Optional[bool] = typer.Argument(False, help="Can specift if data should be saved in session.")):    
+        write_data: Optional[bool] = typer.Argument(False, help="Can specift if data should be saved in session."),
+        port: int = typer.Option(PORT, help="Port the server listens on."),
+        coalesce: str = typer.Option('latest', help="Frame coalescing policy: 'latest' or 'merge'."),
+        min_interval: float = typer.Option(0.0, help="Minimum time between two solves, in seconds."),
+        deadband: float = typer.Option(0.0, help="Log10 concentration change required to re-solve.")):
     if (debug_mode is None):
         typer.echo("Must specify if running in debug mode")
         return    
-    sc = SmellEngineCommunicator(debug_mode, odor_table_mode, write_data)
-    sc.main_thread_loop()
-    
+    sc = SmellEngineCommunicator(debug_mode, odor_table_mode, write_data, port=port, coalesce_policy=coalesce,
+                                 min_interval=min_interval, deadband=deadband)
+    sc.run()
+
 
 if __name__ == "__main__":
-    typer.run(main)
\ No newline at end of file
+    typer.run(main)
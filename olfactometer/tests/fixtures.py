@@ -0,0 +1,145 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import quantities as pq
+
+from olfactometer.equipment import Olfactometer
+from olfactometer.molecule_cache import MoleculeCache
+from olfactometer.my_equipment import MyJar, MyLowMFC, MyMediumMFC, MyHighMFC
+from olfactometer.odorants import Molecule, Vendor, ChemicalOrder, Compound, Solution
+
+
+# CID: (name, molecular weight, vapor pressure (mmHg), density (g/cc))
+STAND_IN_COMPOUNDS = {
+    702: ('ethanol', 46.07, 40.0, 0.79),
+    7410: ('acetophenone', 120.15, 0.397, 1.0281),
+    7439: ('carvone', 150.22, 0.115, 0.9593),
+    440917: ('d-limonene', 136.23, 1.98, 0.8411),
+    6549: ('linalool', 154.25, 0.16, 0.862),
+}
+
+
+class PubChemStandIn(BaseHTTPRequestHandler):
+    """
+    Serves the subset of PUG REST / PUG-View used by the olfactometer package
+    for the compounds in STAND_IN_COMPOUNDS.
+    """
+    protocol_version = 'HTTP/1.1'   # Keep-alive, like PubChem
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address))
+        match = re.match(r'/rest/pug/compound/cid/([\d,]+)/(property/[\w,]+|synonyms)/JSON$', self.path)
+        if match:
+            cids = [int(cid) for cid in match.group(1).split(',') if int(cid) in self.server.compounds]
+            if match.group(2) == 'synonyms':
+                return self.reply({'InformationList': {'Information': [
+                    {'CID': cid, 'Synonym': [self.server.compounds[cid][0].upper()]} for cid in cids]}})
+            return self.reply({'PropertyTable': {'Properties': [
+                {'CID': cid, 'MolecularWeight': str(self.server.compounds[cid][1]), 'IsomericSMILES': 'C'}
+                for cid in cids]}})
+        match = re.match(r'/rest/pug_view/data/compound/(\d+)/JSON$', self.path)
+        if match:
+            return self.reply(self.pug_view_record(int(match.group(1))))
+        self.reply(None)
+
+    def pug_view_record(self, cid):
+        if cid not in self.server.compounds:
+            return None
+        _, _, vapor_pressure, density = self.server.compounds[cid]
+
+        def information(string):
+            return [{'Value': {'StringWithMarkup': [{'String': string}]}}]
+        return {'Record': {'Section': [
+            {'TOCHeading': 'Names and Identifiers', 'Section': [
+                {'TOCHeading': 'Other Identifiers', 'Section': [
+                    {'TOCHeading': 'CAS', 'Information': information('0-00-0')}]}]},
+            {'TOCHeading': 'Chemical and Physical Properties', 'Section': [
+                {'TOCHeading': 'Experimental Properties', 'Section': [
+                    {'TOCHeading': 'Density', 'Information': information('%s g/cu cm at 20 deg C' % density)},
+                    {'TOCHeading': 'Vapor Pressure', 'Information': information('%s mm Hg at 25 deg C' % vapor_pressure)}]}]}]}}
+
+    def reply(self, payload):
+        body = json.dumps(payload if payload is not None else {'Fault': {'Code': 'PUGREST.NotFound'}}).encode()
+        self.send_response(200 if payload is not None else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def pubchem_server():
+    """A local stand-in for pubchem.ncbi.nlm.nih.gov, see PubChemStandIn."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PubChemStandIn)
+    server.daemon_threads = True
+    server.requests = []
+    server.compounds = dict(STAND_IN_COMPOUNDS)
+    server.url = 'http://127.0.0.1:%d' % server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def molecule_cache(tmp_path):
+    """An empty MoleculeCache, without the bundled seed, in a temporary directory."""
+    return MoleculeCache(str(tmp_path / 'molecule_cache.jsonl'), seed_path=None)
+
+
+@pytest.fixture
+def seeded_molecule_cache(tmp_path, monkeypatch):
+    """
+    The shared MoleculeCache, with the bundled seed, in a temporary directory,
+    so a SmellEngine can resolve the seeded CIDs without PubChem.
+    """
+    from olfactometer import molecule_cache
+    cache = MoleculeCache(str(tmp_path / 'molecule_cache.jsonl'))
+    monkeypatch.setattr(molecule_cache, '_default_cache', cache)
+    return cache
+
+
+def make_molecules(cids=(7410, 7439, 440917)):
+    """Molecules of STAND_IN_COMPOUNDS built without any network or cache access."""
+    molecules = []
+    for cid in cids:
+        name, molecular_weight, vapor_pressure, density = STAND_IN_COMPOUNDS[cid]
+        molecule = Molecule(cid, name, vapor_press=vapor_pressure*pq.mmHg, dens=density*pq.g/pq.cc, cache=False)
+        molecule.molecular_weight = molecular_weight * pq.g / pq.mol
+        molecules.append(molecule)
+    return molecules
+
+
+def make_olfactometer(molecules, n_jars=10, dilution=10):
+    """
+    An olfactometer laid out like SmellEngine.initialize_equipment: one odorant per jar
+    in the first jars, light mineral oil in the rest.
+    """
+    oil = Molecule(347911206, 'Light Mineral Oil', vapor_press=0, dens=0.85*pq.g/pq.cc, cache=False)
+    oil.molecular_weight = 500 * pq.g / pq.mol
+    vendor = Vendor('Sigma Aldrich', 'http://www.sigma.com')
+    solvent = Compound(ChemicalOrder(oil, vendor, ''), is_solvent=True)
+    jars = [MyJar('Jar #%d' % (i+1)) for i in range(n_jars)]
+    for i, jar in enumerate(jars):
+        if i < len(molecules):
+            compound = Compound(ChemicalOrder(molecules[i], vendor, ''))
+            solution = Solution({compound: 100*pq.mL/dilution, solvent: 100*pq.mL*(dilution-1)/dilution})
+        else:
+            solution = Solution({solvent: 100*pq.mL})
+        jar.fill(solution, 25*pq.mL)
+    mfcs = [(MyMediumMFC('MFC_A_High'), MyLowMFC('MFC_B_Low')), MyHighMFC('MFC_Carrier')]
+    return Olfactometer(jars, mfcs)
+
+
+@pytest.fixture
+def olfactometer_rig():
+    """(molecules, olfactometer) with three odorants in a ten jar olfactometer."""
+    molecules = make_molecules()
+    return molecules, make_olfactometer(molecules)
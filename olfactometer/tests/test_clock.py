@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from olfactometer.clock import SystemClock, VirtualClock
+from olfactometer.frame_gate import FrameGate
+from olfactometer.tests.fixtures import olfactometer_rig
+
+
+class TestClock(object):
+    """
+    Contains a collection of pytest tests that validate the system and virtual
+    time sources and their use by the ValveDriver and the FrameGate.
+    """
+
+    def test_virtual_clock_advances_instantly(self):
+        clock = VirtualClock()
+        start = time.monotonic()
+        for _ in range(1000):
+            clock.sleep(3.6)
+        assert clock.time() == pytest.approx(3600.0)
+        assert clock.sleeps == 1000
+        assert time.monotonic() - start < 1.0
+        assert clock.advance(0.5) == pytest.approx(3600.5)
+        with pytest.raises(ValueError):
+            clock.advance(-1)
+
+    def test_async_sleep(self):
+        clock = VirtualClock(10.0)
+        asyncio.run(clock.sleep_async(5.0))
+        assert clock.time() == 15.0
+        assert SystemClock().realtime and not clock.realtime
+
+    def test_frame_gate_uses_clock(self):
+        clock = VirtualClock()
+        gate = FrameGate(min_interval=1.0, clock=clock)
+        assert gate.admit([-6.0])
+        assert gate.time_until_open() == 1.0
+        clock.sleep(0.25)
+        assert gate.time_until_open() == 0.75
+
+    def test_valve_driver_runs_faster_than_real_time(self, olfactometer_rig):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.valve_driver import ValveDriver, SAMPLES_PER_FRAME
+
+        molecules, olfactometer = olfactometer_rig
+        clock = VirtualClock()
+        valve_driver = ValveDriver(olfactometer, debug_mode=True, clock=clock)
+        n_analog = len(valve_driver.DAQ_analog_channels)
+        valve_driver.valve_duty_cycles = np.arange(SAMPLES_PER_FRAME, dtype=np.uint32)
+        valve_driver.mfc_setpoints = np.full((n_analog, SAMPLES_PER_FRAME), 2.5)
+        valve_driver.timer_setup(interval=0.5)
+        assert not valve_driver.has_written
+
+        start = time.monotonic()
+        assert valve_driver.run_for(3600.0) == 7200
+        assert time.monotonic() - start < 60.0
+        assert clock.time() == pytest.approx(3600.0)
+        assert valve_driver.has_written
+
+        # One frame per second of virtual time, back to back on the sample clock
+        digital = valve_driver.backend['DigitalTask']
+        assert digital.samples.shape == (1, 3600*SAMPLES_PER_FRAME)
+        np.testing.assert_allclose(digital.times, np.arange(3600*SAMPLES_PER_FRAME) / 50.0)
+        np.testing.assert_array_equal(digital.samples[0, :SAMPLES_PER_FRAME], valve_driver.valve_duty_cycles)
+        assert valve_driver.backend['AnalogTask'].samples.shape == (n_analog, 3600*SAMPLES_PER_FRAME)
+        assert digital.underflows == []
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import struct
+import threading
+
+import numpy as np
+import pytest
+
+from olfactometer.clock import VirtualClock
+from olfactometer.tests.fixtures import seeded_molecule_cache
+
+CIDS = (7410, 7439, 702)
+DILUTIONS = (10, 10, 10)
+TIMEOUT = 30.0
+
+
+async def until(condition, timeout=TIMEOUT):
+    """Yield to the event loop (and the executor) until condition() holds."""
+    end = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > end:
+            raise Exception("Timed out")
+        await asyncio.sleep(0.01)
+
+
+class Client:
+    """A client playing Unity against the communicator's socket."""
+
+    @classmethod
+    async def connect(cls, communicator):
+        client = cls()
+        client.reader, client.writer = await asyncio.open_connection(*communicator.server.sockets[0].getsockname()[:2])
+        client.address = client.writer.get_extra_info('sockname')
+        return client
+
+    def handshake(self, cids=CIDS, dilutions=DILUTIONS):
+        n = len(cids)
+        self.writer.write(struct.pack('i', n) + struct.pack(n * 'i', *cids) + struct.pack(n * 'i', *dilutions))
+
+    def send(self, frame):
+        self.writer.write(np.asarray(frame, dtype='<f8').tobytes())
+
+    def session(self, communicator):
+        """The server's ClientSession of this client."""
+        for session in communicator.clients:
+            if session.address[:2] == self.address[:2]:
+                return session
+
+    async def closed(self):
+        return await asyncio.wait_for(self.reader.read(), TIMEOUT) == b''
+
+
+def run_server(communicator, scenario):
+    """Serve with communicator while scenario(communicator) runs, then release the Smell Engine."""
+    async def main():
+        server = asyncio.ensure_future(communicator.serve())
+        await until(lambda: communicator.server is not None and communicator.server.sockets)
+        try:
+            return await scenario(communicator)
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+    try:
+        return asyncio.run(main())
+    finally:
+        if communicator.initialized:
+            communicator.smell_engine.smell_controller.valve_driver.close_tasks()
+        communicator.executor.shutdown()
+
+
+@pytest.fixture
+def communicator(seeded_molecule_cache):
+    pytest.importorskip('nidaqmx.simulation')
+    from olfactometer.smell_engine_communicator import SmellEngineCommunicator
+    return SmellEngineCommunicator(debug_mode=True, port=0, clock=VirtualClock())
+
+
+class TestCommunicator(object):
+    """
+    Contains a collection of pytest tests that drive the SmellEngineCommunicator
+    through its socket with a debug mode Smell Engine.
+    """
+
+    def test_control_passes_on_disconnect(self, communicator):
+        async def scenario(communicator):
+            first = await Client.connect(communicator)
+            first.handshake()
+            await until(lambda: communicator.initialized)
+            second = await Client.connect(communicator)
+            second.handshake(CIDS[::-1], DILUTIONS)
+            await until(lambda: len(communicator.clients) == 2 and second.session(communicator).rows is not None)
+            assert communicator.controller is first.session(communicator)
+
+            # Frames from a client without control are read and dropped
+            second.send([-8.0, -8.0, -8.0])
+            await until(lambda: second.session(communicator).frames_ignored == 1)
+            assert communicator.coalescer.frames_received == 0
+
+            first.send([-9.0, -8.0, -7.0])
+            await until(lambda: communicator.gate.solves_admitted == 1)
+
+            first.writer.close()
+            await until(lambda: len(communicator.clients) == 1)
+            assert communicator.controller is second.session(communicator)
+            second.send([-6.0, -8.0, -9.0])
+            await until(lambda: communicator.gate.solves_admitted == 2)
+            # The second client sends its odorants in reverse order
+            np.testing.assert_array_equal(communicator.gate.last_frame, [-9.0, -8.0, -6.0])
+            second.writer.close()
+            # The valves are closed on the executor once the last client has left
+            await until(lambda: not communicator.clients
+                        and communicator.smell_engine.smell_controller.valve_driver.timer_paused)
+
+        run_server(communicator, scenario)
+
+    def test_disconnect_during_solve(self, communicator):
+        async def scenario(communicator):
+            first = await Client.connect(communicator)
+            first.handshake()
+            await until(lambda: communicator.initialized)
+            first.send([-9.0, -8.0, -7.0])
+            await until(lambda: communicator.gate.solves_admitted == 1)
+            valve_driver = communicator.smell_engine.smell_controller.valve_driver
+            assert not valve_driver.timer_paused
+            solved = []
+            set_desired = communicator.smell_engine.set_desired_concentration_vector
+            communicator.smell_engine.set_desired_concentration_vector = lambda c: (solved.append(c), set_desired(c))
+
+            # Keep the executor busy, so one solve is queued and a newer frame waits in the coalescer
+            busy = threading.Event()
+            blocked = asyncio.wrap_future(communicator.executor.submit(busy.wait))
+            try:
+                first.send([-8.0, -8.0, -8.0])
+                await until(lambda: communicator.gate.solves_admitted == 2)
+                first.send([-7.0, -7.0, -7.0])
+                await until(lambda: communicator.coalescer.pending)
+
+                first.writer.close()
+                await until(lambda: not communicator.clients)
+                assert not communicator.coalescer.pending
+            finally:
+                busy.set()
+            await blocked
+            await asyncio.wrap_future(communicator.executor.submit(lambda: None))
+            await asyncio.sleep(0.05)
+            # Neither the queued solve nor the stale frame reopened the valves
+            assert valve_driver.timer_paused
+            assert communicator.gate.solves_admitted == 2
+            assert solved == []
+
+        run_server(communicator, scenario)
+
+    def test_rejects_too_many_odorants(self, communicator):
+        async def scenario(communicator):
+            first = await Client.connect(communicator)
+            first.handshake()
+            await until(lambda: communicator.initialized)
+            rejected = await Client.connect(communicator)
+            rejected.handshake(CIDS + (440917,), DILUTIONS + (10,))
+            assert await rejected.closed()
+            await until(lambda: len(communicator.clients) == 1)
+            assert communicator.controller is first.session(communicator)
+            first.writer.close()
+
+        run_server(communicator, scenario)
+
+    def test_receive_excludes_idle_time(self, communicator):
+        async def scenario(communicator):
+            first = await Client.connect(communicator)
+            first.handshake()
+            await until(lambda: communicator.initialized)
+            await asyncio.sleep(0.5)        # The client is idle before sending its frame
+            first.send([-9.0, -8.0, -7.0])
+            await until(lambda: communicator.gate.solves_admitted == 1)
+            first.writer.close()
+
+        run_server(communicator, scenario)
+        receive = communicator.tracer.stats()['receive']
+        assert receive['count'] == 1
+        assert receive['max_ms'] < 250.0
+
+    def test_rate_limit_on_virtual_clock(self, seeded_molecule_cache):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.smell_engine_communicator import SmellEngineCommunicator
+
+        clock = VirtualClock()
+        communicator = SmellEngineCommunicator(debug_mode=True, port=0, clock=clock, min_interval=5.0)
+
+        async def scenario(communicator):
+            first = await Client.connect(communicator)
+            first.handshake()
+            await until(lambda: communicator.initialized)
+            first.send([-9.0, -8.0, -7.0])
+            await until(lambda: communicator.gate.solves_admitted == 1)
+            start = clock.time()
+            first.send([-8.0, -8.0, -8.0])
+            await until(lambda: communicator.gate.solves_admitted == 2)
+            assert communicator.gate.deferred_rate_limit == 1
+            assert clock.time() - start >= 5.0
+            first.writer.close()
+            valve_driver = communicator.smell_engine.smell_controller.valve_driver
+            await until(lambda: not communicator.clients and valve_driver.timer_paused)
+
+        run_server(communicator, scenario)
+        # The valves were driven across the wait, so the simulated DAQ never ran dry
+        valve_driver = communicator.smell_engine.smell_controller.valve_driver
+        assert valve_driver.backend['DigitalTask'].underflows == []
+        assert valve_driver.backend['DigitalTask'].samples.shape[1] > 0
+        # Once the client left, the executor paused the timer and zeroed the frames it had written
+        assert valve_driver.timer_paused and valve_driver.has_written
+        assert not np.any(valve_driver._last_digital_values)
+        assert not np.any(valve_driver._last_analog_values)
+
+    def test_stats_query(self, communicator):
+        from olfactometer.smell_engine_communicator import STATS_QUERY
+
+        async def scenario(communicator):
+            first = await Client.connect(communicator)
+            first.handshake()
+            await until(lambda: communicator.initialized)
+            first.send([-9.0, -8.0, -7.0])
+            await until(lambda: communicator.gate.solves_admitted == 1)
+
+            query = await Client.connect(communicator)
+            query.writer.write(struct.pack('i', STATS_QUERY))
+            size, = struct.unpack('i', await query.reader.readexactly(4))
+            stats = json.loads((await query.reader.readexactly(size)).decode('utf-8'))
+            assert await query.closed()
+            # The query does not take control or pause the valves
+            assert communicator.controller is first.session(communicator)
+            first.writer.close()
+            return stats
+
+        stats = run_server(communicator, scenario)
+        assert stats['frames']['frames_received'] == 1
+        assert stats['solves']['solves_admitted'] == 1
+        assert stats['stages']['optimize']['count'] >= 1
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+import quantities as pq
+
+from olfactometer.odorants import Solution
+from olfactometer.smell_controller import SmellController
+from olfactometer.tests.fixtures import olfactometer_rig
+
+
+def dense_reference(olfactometer):
+    """Vapor concentration matrix computed straight from the Solutions, bypassing every cache."""
+    molecules = olfactometer.loaded_molecules
+    J = np.zeros((len(molecules), len(olfactometer.jars)))
+    for j, jar in olfactometer.jars.items():
+        jar.contents.invalidate()
+        for m, c in jar.contents.vapor_concentrations.items():
+            J[molecules.index(m), j-1] = float(c.rescale(pq.M))
+    return J
+
+
+class TestJarVaporCache(object):
+    """
+    Contains a collection of pytest tests that validate the per-jar cached
+    vapor state and its invalidation.
+    """
+
+    def test_jars_cache_their_own_vapor(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        jar1, jar2 = olfactometer.jars[1], olfactometer.jars[2]
+
+        assert set(jar1.vapor_concs) == {molecules[0]}
+        assert set(jar2.vapor_concs) == {molecules[1]}
+        assert jar1.vapor_concs is jar1.vapor_concs
+
+    def test_contents_setter_invalidates(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        jar1, jar2 = olfactometer.jars[1], olfactometer.jars[2]
+        before = jar1.vapor_concs_molar[molecules[0]]
+
+        jar1.contents = jar2.contents
+        assert set(jar1.vapor_concs) == {molecules[1]}
+        assert jar1.vapor_concs_molar == jar2.vapor_concs_molar
+        assert molecules[0] not in jar1.vapor_concs_molar
+        assert before > 0
+
+    def test_solution_change_invalidates(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        jar = olfactometer.jars[1]
+        before = jar.vapor_concs_molar[molecules[0]]
+
+        components = dict(jar.contents.components)
+        odorant = [c for c in components if not c.is_solvent][0]
+        components[odorant] = components[odorant] * 2
+        jar.contents.components = components
+        assert jar.vapor_concs_molar[molecules[0]] > before
+
+    def test_nested_solution_change_invalidates(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        jar = olfactometer.jars[1]
+        stock = jar.contents
+        jar.contents = Solution({stock: 10*pq.mL})
+        before = jar.vapor_concs_molar[molecules[0]]
+
+        components = dict(stock.components)
+        odorant = [c for c in components if not c.is_solvent][0]
+        components[odorant] = components[odorant] / 2
+        stock.components = components
+        assert jar.vapor_concs_molar[molecules[0]] < before
+
+    def test_vapor_concs_dense_matches_reference(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        controller = SmellController(olfactometer)
+
+        J = controller.get_vapor_concs_dense(None)
+        assert J.units == pq.M
+        np.testing.assert_allclose(J.magnitude, dense_reference(olfactometer))
+
+        jar = olfactometer.jars[3]
+        jar.contents = olfactometer.jars[1].contents
+        J = controller.get_vapor_concs_dense(None)
+        np.testing.assert_allclose(J.magnitude, dense_reference(olfactometer))
+        assert J[0, 2] == J[0, 0]
+
+
+class TestMoleculeRegistry(object):
+    """
+    Contains a collection of pytest tests that validate the olfactometer's
+    indexed registry of loaded molecules.
+    """
+
+    def test_registry_order_and_rows(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+
+        assert olfactometer.loaded_molecules == tuple(molecules)
+        assert olfactometer.molecule_rows == {m: i for i, m in enumerate(molecules)}
+        assert olfactometer.cid_rows == {m.cid: i for i, m in enumerate(molecules)}
+        assert olfactometer.find_odorant_id_by_index(2) is molecules[2]
+
+    def test_refilled_jar_updates_registry(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+
+        olfactometer.jars[2].contents = olfactometer.jars[4].contents
+        assert olfactometer.loaded_molecules == (molecules[0], molecules[2])
+        assert olfactometer.molecule_index(molecules[2]) == 1
+
+        olfactometer.jars[5].contents = olfactometer.jars[3].contents
+        olfactometer.jars[4].contents = olfactometer.jars[1].contents
+        olfactometer.jars[3].contents = olfactometer.jars[6].contents
+        olfactometer.jars[2].contents = olfactometer.jars[4].contents
+        assert olfactometer.loaded_molecules == (molecules[0], molecules[2])
+        assert olfactometer.cid_rows[molecules[2].cid] == 1
+
+    def test_unchanged_molecules_keep_registry(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        rows = olfactometer.molecule_rows
+
+        olfactometer.jars[1].contents.invalidate()
+        assert olfactometer.molecule_rows is rows
+
+    def test_cid_lookups(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        controller = SmellController(olfactometer)
+
+        for i, m in enumerate(molecules):
+            assert olfactometer.cid_to_molecule(m.cid) is m
+            assert controller.cid_to_molecule(m.cid) is m
+            assert olfactometer.cid_index(m.cid) == i
+        with pytest.raises(Exception, match='CID 702 not in loaded molecules'):
+            olfactometer.cid_to_molecule(702)
+        with pytest.raises(Exception, match='CID 702 not in loaded molecules'):
+            olfactometer.cid_index(702)
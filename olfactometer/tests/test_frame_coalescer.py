@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from olfactometer.frame_coalescer import FrameCoalescer
+
+
+class TestFrameCoalescer(object):
+    """
+    Contains a collection of pytest tests that validate the coalescing of inbound
+    concentration frames between the socket readers and the optimizer.
+    """
+
+    def test_latest_keeps_newest_frame(self):
+        coalescer = FrameCoalescer('latest')
+        for value in (-9.0, -8.0, -7.0):
+            coalescer.put(np.array([value, value]))
+        assert coalescer.frames_coalesced == 2
+        np.testing.assert_array_equal(coalescer.take(), [-7.0, -7.0])
+        assert not coalescer.pending
+
+    def test_merge_keeps_newest_finite_value(self):
+        coalescer = FrameCoalescer('merge')
+        coalescer.put(np.array([-9.0, -9.0, -9.0]))
+        coalescer.put(np.array([-8.0, np.nan, -8.0]))
+        coalescer.put(np.array([np.nan, np.nan, -7.0]))
+        np.testing.assert_array_equal(coalescer.take(), [-8.0, -9.0, -7.0])
+        # NaN leaves an odorant unchanged across consumed frames as well
+        coalescer.put(np.array([np.nan, -6.0, np.nan]))
+        np.testing.assert_array_equal(coalescer.take(), [-8.0, -6.0, -7.0])
+
+    def test_take_when_empty(self):
+        coalescer = FrameCoalescer()
+        default = np.array([-6.0])
+        assert coalescer.take() is None
+        assert coalescer.take(default) is default
+        assert coalescer.frames_consumed == 0
+
+    def test_clear(self):
+        coalescer = FrameCoalescer('merge')
+        coalescer.put(np.array([-9.0, -9.0]))
+        coalescer.clear()
+        assert not coalescer.pending
+        assert coalescer.take() is None
+        # The merged target is forgotten too, NaN no longer fills in from the cleared frame
+        coalescer.put(np.array([np.nan, -8.0]))
+        np.testing.assert_array_equal(coalescer.take(), [np.nan, -8.0])
+
+    def test_get_wakes_on_put(self):
+        coalescer = FrameCoalescer()
+
+        async def consume_then_put():
+            consumer = asyncio.ensure_future(coalescer.get())
+            await asyncio.sleep(0)
+            assert not consumer.done()
+            coalescer.put(np.array([-6.0]))
+            return await asyncio.wait_for(consumer, 1.0)
+
+        np.testing.assert_array_equal(asyncio.run(consume_then_put()), [-6.0])
+
+    def test_stats(self):
+        coalescer = FrameCoalescer()
+        coalescer.put(np.array([-9.0]))
+        coalescer.put(np.array([-8.0]))
+        coalescer.take()
+        coalescer.put(np.array([-7.0]))
+        coalescer.take()
+        assert coalescer.stats() == {'policy': 'latest', 'frames_received': 3,
+                                     'frames_coalesced': 1, 'frames_consumed': 2}
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            FrameCoalescer('oldest')
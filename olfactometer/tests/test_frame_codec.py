@@ -0,0 +1,52 @@
+import struct
+
+import numpy as np
+import pytest
+
+from olfactometer.frame_codec import decode_frame, antilog, frame_size
+
+
+class TestFrameCodec(object):
+    """
+    Contains a collection of pytest tests that validate the decoding of the
+    concentration frames sent by Unity.
+    """
+
+    @pytest.mark.parametrize('n_odorants', [1, 3, 16])
+    def test_decode_matches_struct(self, n_odorants):
+        values = np.random.default_rng(n_odorants).uniform(-12, -3, n_odorants)
+        data = struct.pack('<%dd' % n_odorants, *values)
+        assert frame_size(n_odorants) == len(data)
+        frame = decode_frame(data, n_odorants)
+        assert frame.tolist() == list(struct.unpack('<%dd' % n_odorants, data))
+        assert not frame.flags.writeable
+
+    def test_short_buffer_raises(self):
+        data = struct.pack('<2d', -9.0, -8.0)
+        with pytest.raises(ValueError):
+            decode_frame(data, 3)
+        with pytest.raises(ValueError):
+            decode_frame(data[:-1], 2)
+
+    def test_antilog_masks_overflow_and_non_finite(self):
+        concentrations = antilog(np.array([-9.0, 400.0, np.nan, np.inf, -np.inf]))
+        np.testing.assert_array_equal(concentrations, [1e-9, 0.0, 0.0, 0.0, 0.0])
+
+    @pytest.mark.parametrize('n_odorants', [4, 16, 17, 64])
+    def test_antilog_paths_agree(self, n_odorants):
+        # Small frames are converted value by value, larger ones with numpy
+        values = np.random.default_rng(n_odorants).uniform(-12, -3, n_odorants)
+        values[:4] = [400.0, np.nan, -np.inf, np.log10(np.finfo(float).max)]
+        with np.errstate(over='ignore'):
+            expected = np.where(np.isfinite(values) & (values < 308.25), 10.0 ** np.nan_to_num(values), 0.0)
+        np.testing.assert_allclose(antilog(values), expected, rtol=1e-15)
+        np.testing.assert_allclose(antilog(list(values)), expected, rtol=1e-15)
+
+    def test_antilog_fills_out(self):
+        out = np.full(3, -1.0)
+        concentrations = antilog(decode_frame(struct.pack('<3d', -9.0, 400.0, -6.0), 3), out=out)
+        assert concentrations is out
+        np.testing.assert_allclose(out, [1e-9, 0.0, 1e-6])
+        out = np.full(32, -1.0)
+        assert antilog(np.full(32, -9.0), out=out) is out
+        np.testing.assert_allclose(out, 1e-9)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from olfactometer.frame_gate import FrameGate
+
+
+class TestFrameGate(object):
+    """
+    Contains a collection of pytest tests that validate the dead-band and rate limit
+    the FrameGate puts in front of the optimizer.
+    """
+
+    def test_repeats_skipped_by_default(self):
+        gate = FrameGate()
+        assert gate.admit([-9.0, -8.0])
+        assert not gate.admit([-9.0, -8.0])
+        assert not gate.admit(np.array([-9.0, -8.0]))
+        assert gate.admit([-9.0, -7.9])
+        assert gate.skipped_deadband == 2
+
+    def test_deadband_threshold(self):
+        gate = FrameGate(deadband=0.1)
+        assert gate.admit([-9.0, -8.0])
+        assert not gate.admit([-9.099, -8.0])    # Just below the dead-band
+        assert not gate.admit([-9.0, -7.901])
+        assert gate.admit([-9.0, -7.899])        # Just above it
+        # The dead-band is measured from the last admitted frame, not the last offered one
+        assert not gate.admit([-9.0, -7.81])
+        assert gate.admit([-9.0, -7.79])
+
+    def test_nan_and_inf_entries(self):
+        gate = FrameGate(deadband=0.1)
+        assert gate.admit([np.nan, -np.inf])
+        assert not gate.admit([np.nan, -np.inf])
+        assert gate.admit([-9.0, -np.inf])
+
+    def test_reset_forgets_last_frame(self):
+        gate = FrameGate(min_interval=1.0)
+        assert gate.admit([-9.0], now=0.0)
+        assert gate.time_until_open(now=0.25) == 0.75
+        gate.reset()
+        assert gate.last_frame is None
+        assert gate.time_until_open(now=0.25) == 0.0
+        assert gate.admit([-9.0], now=0.25)
+
+    def test_defer_counts_rate_limited_frames(self):
+        gate = FrameGate(min_interval=1.0)
+        assert gate.defer(now=0.0) == 0.0
+        assert gate.admit([-9.0], now=0.0)
+        assert gate.defer(now=0.25) == 0.75
+        assert gate.time_until_open(now=0.5) == 0.5     # Only defer counts
+        assert gate.defer(now=1.0) == 0.0
+        assert gate.stats()['deferred_rate_limit'] == 1
+
+    def test_stats(self):
+        gate = FrameGate(deadband=0.5)
+        for frame in ([-9.0], [-9.2], [-8.0], [-8.0], [-7.0]):
+            gate.admit(frame)
+        stats = gate.stats()
+        assert stats['frames_checked'] == 5
+        assert stats['solves_admitted'] == 3
+        assert stats['solves_avoided'] == stats['skipped_deadband'] == 2
+        assert stats['deferred_rate_limit'] == 0
+
+    def test_negative_settings(self):
+        with pytest.raises(ValueError):
+            FrameGate(min_interval=-1.0)
+        with pytest.raises(ValueError):
+            FrameGate(deadband=-0.1)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from olfactometer.clock import VirtualClock
+
+
+@pytest.fixture
+def debug_tasks():
+    pytest.importorskip('nidaqmx.simulation')
+    import nidaqmx
+    from nidaqmx.constants import AcquisitionType, LineGrouping
+    from nidaqmx.simulation import SimulatedBackend
+
+    backend = SimulatedBackend(VirtualClock())
+    digital = nidaqmx.task.Task('DigitalTask', backend)
+    digital.add_task_channel(digital.do_channels.add_do_chan(
+        'Dev1/port0', name_to_assign_to_lines='digital_channel',
+        line_grouping=LineGrouping.CHAN_FOR_ALL_LINES))
+    analog = nidaqmx.task.Task('AnalogTask', backend)
+    for i in range(3):
+        analog.add_task_channel(analog.ao_channels.add_ao_voltage_chan('Dev1/ao%d' % i, 'analog_channel%d' % i))
+    for task in (digital, analog):
+        task.timing.cfg_samp_clk_timing(50, sample_mode=AcquisitionType.CONTINUOUS, samps_per_chan=50)
+    yield backend, digital, analog
+    digital.close()
+    analog.close()
+
+
+class TestFrameWriter(object):
+    """
+    Contains a collection of pytest tests that validate the preconfigured frame
+    writers the ValveDriver writes its digital and analog frames with.
+    """
+
+    def test_writes_frames(self, debug_tasks):
+        from olfactometer.frame_writer import FrameWriter
+
+        backend, digital, analog = debug_tasks
+        digital_writer = FrameWriter(digital, (50,), np.uint32)
+        analog_writer = FrameWriter(analog, (3, 50), np.float64)
+        digital_values = np.arange(50, dtype=np.uint32)
+        analog_values = np.tile([[1.0], [2.0], [3.0]], 50)
+
+        assert digital_writer.write(digital_values) == 50
+        assert analog_writer.write(analog_values) == 50
+        backend.sleep(0.99)
+        np.testing.assert_array_equal(backend['DigitalTask'].samples, digital_values[np.newaxis])
+        np.testing.assert_array_equal(backend['AnalogTask'].samples, analog_values)
+        assert digital_writer.writes == analog_writer.writes == 1
+
+    def test_frames_are_not_copied(self, debug_tasks):
+        from olfactometer.frame_writer import FrameWriter
+
+        backend, digital, analog = debug_tasks
+        analog_writer = FrameWriter(analog, (3, 50), np.float64)
+        analog_values = np.zeros((3, 50))
+        assert analog_writer.frame(analog_values) is analog_values
+        # Other dtypes, lists and non-contiguous arrays are converted
+        assert analog_writer.frame(np.zeros((3, 50), dtype=np.float32)).dtype == np.float64
+        assert analog_writer.frame(np.zeros((50, 3)).T).flags.c_contiguous
+        assert analog_writer.frame([[0.0] * 50] * 3).shape == (3, 50)
+
+    def test_shape_checked_against_task(self, debug_tasks):
+        from olfactometer.frame_writer import FrameWriter
+
+        backend, digital, analog = debug_tasks
+        with pytest.raises(ValueError, match='3'):
+            FrameWriter(analog, (2, 50), np.float64)
+        with pytest.raises(ValueError, match='sample'):
+            FrameWriter(analog, (3, 0), np.float64)
+        with pytest.raises(TypeError):
+            FrameWriter(digital, (50,), np.float64)
+        with pytest.raises(TypeError):
+            FrameWriter(analog, (3, 50), np.uint32)
+
+    def test_driver_verification_disabled(self, debug_tasks):
+        from olfactometer.frame_writer import FrameWriter
+
+        backend, digital, analog = debug_tasks
+        writer = FrameWriter(analog, (3, 50), np.float64)
+        assert writer.writer.verify_array_shape is False
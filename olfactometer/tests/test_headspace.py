@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import quantities as pq
+
+from olfactometer.headspace import HeadspaceModel
+from olfactometer.tests.fixtures import olfactometer_rig
+
+
+class TestHeadspaceModel(object):
+    """
+    Contains a collection of pytest tests that validate the array-native
+    headspace model against the per-jar Quantities model.
+    """
+
+    def test_evaporation_rates_match_jars(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        model = HeadspaceModel.from_olfactometer(olfactometer)
+        rates = model.evaporation_rates()
+        flows = model.vapor_flow_rates()
+
+        for j, station in enumerate(sorted(olfactometer.jars)):
+            jar = olfactometer.jars[station]
+            for m, rate in jar.max_evaporation_rates.items():
+                i = model.molecules.index(m)
+                assert rates[i, j] == pytest.approx(float(rate.rescale(pq.mol/pq.s)))
+            for m, flow in jar.max_vapor_flow_rates.items():
+                i = model.molecules.index(m)
+                assert flows[i, j] == pytest.approx(float(flow.rescale(pq.L/pq.s)))
+
+    def test_vapor_concentrations_match_jars(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        model = HeadspaceModel.from_olfactometer(olfactometer, molecules)
+        concs = model.vapor_concentrations()
+
+        for j, station in enumerate(sorted(olfactometer.jars)):
+            expected = olfactometer.jars[station].contents.vapor_concentration_array(molecules)
+            np.testing.assert_allclose(concs[:len(molecules), j], expected)
+
+    def test_depletion(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        model = HeadspaceModel.from_olfactometer(olfactometer)
+        start = model.moles.copy()
+        rates = model.evaporation_rates()
+
+        evaporated = model.deplete(10.0)
+        np.testing.assert_allclose(evaporated, rates * 10.0, rtol=1e-6)
+        assert model.elapsed == 10.0
+        np.testing.assert_allclose(model.moles, start - evaporated)
+        assert (model.moles >= 0).all()
+
+    def test_simulate_clearances(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        model = HeadspaceModel.from_olfactometer(olfactometer)
+        clearances = np.zeros((3, len(olfactometer.jars)))
+        clearances[1, 0] = 1.0
+
+        history = model.simulate([60.0, 60.0, 60.0], clearances)
+        assert history.shape == (4,) + model.moles.shape
+        np.testing.assert_array_equal(history[1], history[0])
+        assert (history[2][:, 0] <= history[1][:, 0]).all()
+        assert (history[2][:, 0] < history[1][:, 0]).any()
+        np.testing.assert_array_equal(history[2][:, 1:], history[0][:, 1:])
+        np.testing.assert_array_equal(history[3], history[2])
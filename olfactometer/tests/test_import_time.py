@@ -0,0 +1,50 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+import olfactometer
+
+SERVER_MODULE = 'olfactometer.smell_engine_communicator'
+# Imported when first needed, never by importing the server
+DEFERRED_MODULES = ['matplotlib', 'pandas', 'numba', 'sympy', 'scipy.optimize', 'scipy.spatial', 'scipy.signal',
+                    'nidaqmx.task', 'nidaqmx._task_modules.channel_collection',
+                    'nidaqmx._task_modules.out_stream', 'nidaqmx._task_modules.timing',
+                    'nidaqmx._task_modules.channels.ai_channel',
+                    'nidaqmx._task_modules.channels.ci_channel']
+
+
+def run_python(*args):
+    root = os.path.dirname(os.path.dirname(olfactometer.__file__))
+    # The child imports the same packages as this run, e.g. the vendored nidaqmx under nidaqmx/
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    result = subprocess.run([sys.executable] + list(args), cwd=root, env=env, capture_output=True, text=True,
+                            timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+class TestImportTime(object):
+    """
+    Contains a collection of pytest tests that keep the heavy dependencies out of
+    the import of the Smell Engine server.
+    """
+
+    def test_heavy_modules_are_deferred(self):
+        pytest.importorskip('nidaqmx.simulation')
+        result = run_python('-c', 'import json, sys, %s; print(json.dumps(sorted(sys.modules)))' % SERVER_MODULE)
+        modules = set(json.loads(result.stdout.splitlines()[-1]))
+        assert [m for m in DEFERRED_MODULES if m in modules] == []
+
+    def test_import_time(self):
+        # Machine dependent, so only reported (pytest -s); test_heavy_modules_are_deferred is the check
+        pytest.importorskip('nidaqmx.simulation')
+        run_python('-c', 'import %s' % SERVER_MODULE)      # Compile the bytecode first
+        result = run_python('-X', 'importtime', '-c', 'import %s' % SERVER_MODULE)
+        match = re.search(r'import time:\s+\d+ \|\s+(\d+) \| %s$' % re.escape(SERVER_MODULE),
+                          result.stderr, re.MULTILINE)
+        assert match is not None
+        print("Import time of %s:\t%.1f ms" % (SERVER_MODULE, int(match.group(1)) / 1e3))
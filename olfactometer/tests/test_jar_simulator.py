@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+import pytest
+
+from olfactometer.jar_simulator import JarSimulator, decode_valve_frame, jar_flows
+from olfactometer.smell_controller import SmellController
+from olfactometer.tests.fixtures import olfactometer_rig
+
+
+def valve_frame(wA, wB, samples_per_frame=50):
+    """Digital frame with each valve in state A, then B, for the given fractions (ValveDriver.format_bits layout)."""
+    frame = np.zeros(samples_per_frame, dtype=np.uint32)
+    for valve, (a, b) in enumerate(zip(wA, wB)):
+        n_a, n_b = int(round(a*samples_per_frame)), int(round(b*samples_per_frame))
+        frame[:n_a] += 2**(valve+16)
+        frame[n_a:n_a+n_b] += 2**valve
+    return frame
+
+
+class TestJarSimulator(object):
+    """
+    Contains a collection of pytest tests that validate the headspace dynamics
+    and jar depletion simulator.
+    """
+
+    def test_decode_valve_frame(self):
+        wA, wB = [0.5, 0.0, 0.2], [0.3, 1.0, 0.0]
+        decoded_A, decoded_B = decode_valve_frame(valve_frame(wA, wB), 3)
+        np.testing.assert_allclose(decoded_A, wA)
+        np.testing.assert_allclose(decoded_B, wB)
+
+    def test_closed_jars_stay_at_equilibrium(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        simulator = JarSimulator(olfactometer)
+        start = simulator.vapor_matrix.copy()
+
+        simulator.step(3600.0, 0.0)
+        np.testing.assert_allclose(simulator.vapor_matrix, start, rtol=1e-9)
+        np.testing.assert_allclose(simulator.evaporated, 0, atol=1e-15)
+
+    def test_flushing_and_mass_balance(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        simulator = JarSimulator(olfactometer, max_step=1.0)
+        start = simulator.vapor_matrix.copy()
+        moles = simulator.model.moles.copy()
+        headspace_moles = simulator.headspace * simulator.headspace_volumes
+
+        flows = jar_flows([1, 0, 0] + [0]*7, [0]*10, 1000/60000, 0)     # 1 L/min through jar 1
+        simulator.step(60.0, flows)
+        assert simulator.vapor_matrix[0, 0] < start[0, 0]
+        np.testing.assert_allclose(simulator.vapor_matrix[:, 1:], start[:, 1:], rtol=1e-9)
+        np.testing.assert_allclose(moles - simulator.model.moles, simulator.evaporated)
+        # Whatever evaporated was either flushed out or is still in the headspace
+        headspace_gain = simulator.headspace * simulator.headspace_volumes - headspace_moles
+        np.testing.assert_allclose(simulator.evaporated, simulator.delivered + headspace_gain, rtol=1e-6, atol=1e-18)
+        assert simulator.liquid_volumes[0] < simulator.liquid_volumes[1]
+
+    def test_sync_feeds_optimizer(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        controller = SmellController(olfactometer)
+        simulator = JarSimulator(olfactometer)
+
+        assert simulator.sync(controller)
+        np.testing.assert_allclose(controller.get_vapor_concs_dense(None).magnitude,
+                                   SmellController(olfactometer).get_vapor_concs_dense(None).magnitude)
+        assert not simulator.sync(controller)
+        simulator.step(600.0, jar_flows([1, 1, 1] + [0]*7, [0]*10, 0.05, 0))
+        assert simulator.sync(controller)
+        np.testing.assert_allclose(controller.get_vapor_concs_dense(None).magnitude, simulator.vapor_matrix)
+
+    def test_multi_hour_session(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        simulator = JarSimulator(olfactometer)
+        n_frames = 3 * 3600
+        wA = np.random.uniform(0, 0.5, (n_frames, 10))
+        wB = np.random.uniform(0, 0.5, (n_frames, 10))
+
+        start = time.perf_counter()
+        history = simulator.simulate(wA, wB, 1/60, 1e-4)
+        assert time.perf_counter() - start < 10
+        assert history.shape == (n_frames + 1, 3, 10)
+        assert simulator.elapsed == pytest.approx(n_frames)
+        assert (simulator.evaporated >= 0).all()
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import olfactometer.molecule_cache as cache_module
+from olfactometer.molecule_cache import MoleculeCache, SEED_PATH, CACHE_PATH_VARIABLE
+from olfactometer.odorants import Molecule
+from olfactometer.tests.fixtures import molecule_cache
+
+
+class TestMoleculeCache(object):
+    """
+    Contains a collection of pytest tests that validate the JSON-lines molecule
+    cache and how Molecules use the shared one.
+    """
+
+    def test_round_trip(self, molecule_cache):
+        molecule_cache.put(7410, {'name': 'acetophenone', 'molecular_weight': 120.15})
+        molecule_cache.put('7439', {'name': 'carvone', 'vapor_pressure': 0.115})
+
+        reloaded = MoleculeCache(molecule_cache.path, seed_path=None)
+        assert len(reloaded) == 2
+        assert reloaded.get(7410) == {'cid': 7410, 'name': 'acetophenone', 'molecular_weight': 120.15}
+        assert reloaded.get(7439)['vapor_pressure'] == 0.115
+        assert 7439 in reloaded and 702 not in reloaded
+
+    def test_last_line_wins(self, molecule_cache):
+        molecule_cache.put(702, {'name': 'ethanol', 'vapor_pressure': 40.0, 'density': 0.79})
+        molecule_cache.put(702, {'vapor_pressure': 44.6})
+
+        reloaded = MoleculeCache(molecule_cache.path, seed_path=None)
+        assert reloaded.get(702) == {'cid': 702, 'name': 'ethanol', 'vapor_pressure': 44.6, 'density': 0.79}
+        with open(molecule_cache.path) as f:
+            assert len(f.readlines()) == 2      # A refresh is appended, not rewritten
+
+    def test_unreadable_line_skipped(self, tmp_path):
+        path = tmp_path / 'molecule_cache.jsonl'
+        path.write_text(json.dumps({'cid': 702, 'name': 'ethanol'}) + '\n{"cid": 74\n\n')
+        cache = MoleculeCache(str(path), seed_path=None)
+        assert len(cache) == 1
+        assert cache.get(702)['name'] == 'ethanol'
+
+    def test_seed_loading(self, tmp_path):
+        with open(SEED_PATH) as f:
+            seed = [json.loads(line) for line in f if line.strip()]
+        path = tmp_path / 'molecule_cache.jsonl'
+        path.write_text(json.dumps({'cid': 702, 'vapor_pressure': 44.6}) + '\n')
+
+        cache = MoleculeCache(str(path))
+        assert len(cache) == len({record['cid'] for record in seed})
+        assert cache.get(7410)['name'] == 'acetophenone'
+        # The user cache is read after the seed and overrides it
+        assert cache.get(702)['vapor_pressure'] == 44.6
+        assert cache.get(702)['density'] == 0.79
+
+    def test_default_path_from_environment(self, tmp_path, monkeypatch):
+        path = str(tmp_path / 'redirected.jsonl')
+        monkeypatch.setenv(CACHE_PATH_VARIABLE, path)
+        monkeypatch.setattr(cache_module, '_default_cache', None)
+        assert cache_module.default_cache().path == path
+        assert cache_module.default_cache() is cache_module.default_cache()
+
+    def test_explicit_properties_skip_cache(self, monkeypatch):
+        def no_cache():
+            raise AssertionError("The shared cache was used")
+        monkeypatch.setattr(cache_module, '_default_cache', None)
+        monkeypatch.setattr('olfactometer.odorants.default_cache', no_cache)
+
+        molecule = Molecule(702, 'ethanol', vapor_press=40.0, dens=0.79)
+        assert molecule.vapor_pressure == pytest.approx(40.0)
+        assert molecule.density == pytest.approx(0.79)
+        assert cache_module._default_cache is None
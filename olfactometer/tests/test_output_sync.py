@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from olfactometer.clock import VirtualClock
+from olfactometer.tests.fixtures import olfactometer_rig
+
+
+class TestOutputSync(object):
+    """
+    Contains a collection of pytest tests that validate the synchronized start of
+    the digital (valve) and analog (MFC) outputs of the ValveDriver.
+    """
+
+    def test_outputs_start_on_the_same_edge(self, olfactometer_rig):
+        pytest.importorskip('nidaqmx.simulation')
+        from nidaqmx.constants import TriggerType
+        from olfactometer.valve_driver import ValveDriver, SAMPLES_PER_FRAME
+
+        molecules, olfactometer = olfactometer_rig
+        valve_driver = ValveDriver(olfactometer, debug_mode=True, clock=VirtualClock(), synchronized=True)
+        assert valve_driver.tasks['Analog'].triggers.start_trigger.trig_type == TriggerType.DIGITAL_EDGE
+        valve_driver.valve_duty_cycles = np.arange(SAMPLES_PER_FRAME, dtype=np.uint32)
+        valve_driver.mfc_setpoints = np.full((len(valve_driver.DAQ_analog_channels), SAMPLES_PER_FRAME), 2.5)
+        valve_driver.timer_setup(interval=0.5)
+
+        assert valve_driver.run_for(10.0) == 20
+        backend = valve_driver.backend
+        skew = backend.start_skew('DigitalTask', 'AnalogTask')
+        assert len(skew) == 10
+        np.testing.assert_array_equal(skew, 0.0)
+        np.testing.assert_array_equal(backend['AnalogTask'].times, backend['DigitalTask'].times)
+
+    def test_synchronization_can_be_turned_off(self, olfactometer_rig):
+        pytest.importorskip('nidaqmx.simulation')
+        from nidaqmx.constants import TriggerType
+        from olfactometer.valve_driver import ValveDriver
+
+        molecules, olfactometer = olfactometer_rig
+        valve_driver = ValveDriver(olfactometer, debug_mode=True, clock=VirtualClock(), synchronized=True)
+        valve_driver.synchronize_outputs(False)
+        assert not valve_driver.synchronized
+        assert valve_driver.tasks['Analog'].triggers.start_trigger.trig_type == TriggerType.NONE
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import quantities as pq
+
+from olfactometer import physics
+
+RHO = 1.225*pq.kg/(pq.m**3)
+
+
+class TestClosedFormPhysics(object):
+    """
+    Contains a collection of pytest tests that validate the closed-form
+    Bernoulli and venturi solutions against sympy.
+    """
+
+    bernoulli_knowns = {'v': 10*pq.m/pq.s, 'p': 10*pq.psi, 'rho': RHO, 'k': 1e5*pq.m**2/pq.s**2}
+    venturi_knowns = {'p1': 10*pq.psi, 'p2': 1*pq.psi, 'v1': 10*pq.m/pq.s, 'v2': 320*pq.m/pq.s}
+
+    @pytest.mark.parametrize('unknown', ['v', 'p', 'rho'])
+    def test_bernoulli_matches_sympy(self, unknown):
+        knowns = dict(self.bernoulli_knowns, **{unknown: None})
+        expected = physics.bernoulli(symbolic=True, **knowns)
+        assert len(expected) == 1
+        result = physics.bernoulli(**knowns)
+        assert float(result.simplified) == pytest.approx(float(list(expected[0].values())[0]))
+
+    @pytest.mark.parametrize('unknown', ['v1', 'v2', 'p1', 'p2'])
+    def test_venturi_matches_sympy(self, unknown):
+        knowns = dict(self.venturi_knowns, **{unknown: None})
+        expected = physics.venturi(rho=RHO, symbolic=True, **knowns)
+        assert len(expected) == 1
+        result = physics.venturi(rho=RHO, **knowns)
+        assert float(result.simplified) == pytest.approx(float(list(expected[0].values())[0]))
+
+    def test_array_sweep(self):
+        p1 = np.linspace(1, 10, 10)*pq.psi
+        v2 = physics.venturi(rho=RHO, p1=p1, p2=1*pq.psi, v1=10*pq.m/pq.s)
+        assert v2.shape == p1.shape
+        assert v2.units == pq.m/pq.s
+        for p, v in zip(p1, v2):
+            assert float(v) == pytest.approx(float(physics.venturi(rho=RHO, p1=p, p2=1*pq.psi, v1=10*pq.m/pq.s)))
+
+    def test_no_real_solution(self):
+        v = physics.bernoulli(p=10*pq.psi, rho=RHO, k=np.array([1e4, 1e5])*pq.m**2/pq.s**2)
+        assert np.isnan(v[0]) and v[1] > 0
+
+    def test_exactly_one_unknown(self):
+        with pytest.raises(ValueError, match='exactly one unknown'):
+            physics.venturi(rho=RHO, p1=10*pq.psi)
+        with pytest.raises(ValueError, match='symbolic=True'):
+            physics.bernoulli(None, 10*pq.psi, RHO)
+        # The sympy solutions still leave several unknowns as symbols
+        solutions = physics.bernoulli(None, 10*pq.psi, RHO, symbolic=True)
+        assert isinstance(solutions, list) and all(isinstance(s, dict) for s in solutions)
+
+    def test_sympy_not_imported(self):
+        code = "import sys, olfactometer.odorants; assert 'sympy' not in sys.modules"
+        subprocess.check_call([sys.executable, '-c', code])
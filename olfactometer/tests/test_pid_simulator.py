@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from olfactometer.clock import VirtualClock
+from olfactometer.jar_simulator import decode_mfc_frame
+from olfactometer.pid_simulator import SimulatedPID, vapor_matrix
+from olfactometer.tests.fixtures import olfactometer_rig
+
+
+class TestSimulatedPID(object):
+    """
+    Contains a collection of pytest tests that validate the simulated PID sensor
+    used in place of the analog input task in debug mode.
+    """
+
+    def test_first_order_lag(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        pid = SimulatedPID(olfactometer, None, [1, 0, 2], sensitivities=1.0, time_constant=0.5, noise=0.0)
+        concentrations = np.zeros((len(olfactometer.loaded_molecules), 100))
+        concentrations[0] = 1.0
+
+        signal = pid.response(concentrations)
+        t = np.arange(1, 101) / pid.rate
+        np.testing.assert_allclose(signal, 1 - np.exp(-t / 0.5))
+
+    def test_blocks_continue_the_lag(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        concentrations = np.random.default_rng(0).random((len(olfactometer.loaded_molecules), 100))
+        whole = SimulatedPID(olfactometer, None, [1, 0, 2], noise=0.0, baseline=0.1)
+        blocks = SimulatedPID(olfactometer, None, [1, 0, 2], noise=0.0, baseline=0.1)
+
+        expected = whole.response(concentrations)
+        np.testing.assert_allclose(np.concatenate([blocks.response(concentrations[:, :30]),
+                                                   blocks.response(concentrations[:, 30:])]), expected)
+        # Clean air stays at the baseline
+        clean = SimulatedPID(olfactometer, None, [1, 0, 2], noise=0.0, baseline=0.1)
+        np.testing.assert_allclose(clean.response(concentrations * 0), 0.1)
+
+    def test_noise(self, olfactometer_rig):
+        molecules, olfactometer = olfactometer_rig
+        zeros = np.zeros((len(olfactometer.loaded_molecules), 10000))
+        pid = SimulatedPID(olfactometer, None, [1, 0, 2], noise=1e-3, seed=1)
+        signal = pid.response(zeros)
+        assert np.std(signal) == pytest.approx(1e-3, rel=0.05)
+        np.testing.assert_array_equal(signal, SimulatedPID(olfactometer, None, [1, 0, 2], noise=1e-3, seed=1).response(zeros))
+
+    def test_valve_driver_readings(self, olfactometer_rig):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.valve_driver import ValveDriver, SAMPLES_PER_FRAME
+
+        molecules, olfactometer = olfactometer_rig
+        clock = VirtualClock()
+        valve_driver = ValveDriver(olfactometer, debug_mode=True, PID_mode=True, clock=clock)
+        valve_driver.init_simulated_pid(olfactometer, noise=0.0, time_constant=0.2)
+        # Valve 1 in state A for the whole frame, all MFCs at half scale
+        valve_driver.valve_duty_cycles = np.full(SAMPLES_PER_FRAME, 2**16, dtype=np.uint32)
+        valve_driver.mfc_setpoints = np.full((len(valve_driver.DAQ_analog_channels), SAMPLES_PER_FRAME), 2.5)
+        valve_driver.timer_setup(interval=0.5)
+
+        # Each read waits for a frame of samples, so the loop runs at the acquisition rate
+        assert valve_driver.run_for(10.0) == 10
+        readings = np.array(valve_driver.PID_sensor_readings)
+        assert readings.shape == (SAMPLES_PER_FRAME,)
+        assert valve_driver.tasks['Analog_In'].samples_read == 10*SAMPLES_PER_FRAME
+
+        flows = decode_mfc_frame(valve_driver.mfc_setpoints, olfactometer.mfc_flat_list(),
+                                 valve_driver.DAQ_analog_channels)
+        fA = decode_mfc_frame(valve_driver.mfc_setpoints, olfactometer.mfcs[0], valve_driver.DAQ_analog_channels)[0]
+        expected = 1000.0 * vapor_matrix(olfactometer)[:, 0].sum() * fA / flows.sum()
+        np.testing.assert_allclose(readings, expected, rtol=1e-6)
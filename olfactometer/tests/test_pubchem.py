@@ -0,0 +1,65 @@
+import pytest
+
+from olfactometer.molecule_cache import MoleculeCache
+from olfactometer.odorants import Molecule
+from olfactometer.pubchem import PubChemClient, resolve_molecules
+from olfactometer.tests.fixtures import pubchem_server, molecule_cache, STAND_IN_COMPOUNDS
+
+
+class TestResolveMolecules(object):
+    """
+    Contains a collection of pytest tests that validate concurrent molecule
+    resolution against a local stand-in for PubChem.
+    """
+
+    cids = [7410, 7439, 440917, 702, 6549]
+
+    def test_properties_and_order(self, pubchem_server, molecule_cache):
+        client = PubChemClient(pubchem_server.url)
+        molecules = resolve_molecules(self.cids, cache=molecule_cache, client=client)
+
+        assert [m.cid for m in molecules] == self.cids
+        for m in molecules:
+            name, molecular_weight, vapor_pressure, density = STAND_IN_COMPOUNDS[m.cid]
+            assert m.name == name
+            assert float(m.molecular_weight) == pytest.approx(molecular_weight)
+            assert m.vapor_pressure == pytest.approx(vapor_pressure)
+            assert m.density == pytest.approx(density)
+
+    def test_batch_requests(self, pubchem_server, molecule_cache):
+        client = PubChemClient(pubchem_server.url)
+        resolve_molecules(self.cids, cache=molecule_cache, client=client)
+
+        paths = [path for path, _ in pubchem_server.requests]
+        assert len([p for p in paths if '/property/' in p]) == 1
+        assert len([p for p in paths if '/synonyms/' in p]) == 1
+        # One PUG-View record per molecule, shared by vapor pressure and density
+        assert len([p for p in paths if '/pug_view/' in p]) == len(self.cids)
+        assert client.requests_made == len(paths)
+
+    def test_connections_are_reused(self, pubchem_server, molecule_cache):
+        client = PubChemClient(pubchem_server.url)
+        resolve_molecules(self.cids, cache=molecule_cache, client=client, max_workers=2)
+
+        assert client.connections_opened <= 3     # Caller thread + one per worker
+        assert len(set(address for _, address in pubchem_server.requests)) == client.connections_opened
+
+    def test_cache_hits_skip_network(self, pubchem_server, molecule_cache):
+        client = PubChemClient(pubchem_server.url)
+        resolve_molecules(self.cids, cache=molecule_cache, client=client)
+        n_requests = len(pubchem_server.requests)
+
+        reloaded = MoleculeCache(molecule_cache.path, seed_path=None)
+        molecules = resolve_molecules(self.cids, cache=reloaded, client=client)
+        assert len(pubchem_server.requests) == n_requests
+        assert [m.density for m in molecules] == [STAND_IN_COMPOUNDS[cid][3] for cid in self.cids]
+
+    def test_refresh(self, pubchem_server, molecule_cache):
+        client = PubChemClient(pubchem_server.url)
+        resolve_molecules([702], cache=molecule_cache, client=client)
+        pubchem_server.compounds[702] = ('ethanol', 46.07, 59.3, 0.7893)
+
+        assert Molecule(702, fill=True, cache=molecule_cache, client=client).vapor_pressure == 40.0
+        molecule = resolve_molecules([702], cache=molecule_cache, client=client, refresh=True)[0]
+        assert molecule.vapor_pressure == 59.3
+        assert Molecule(702, fill=True, cache=molecule_cache, client=client).vapor_pressure == 59.3
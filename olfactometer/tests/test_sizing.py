@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from olfactometer.smell_controller import SmellController
+from olfactometer.tests.fixtures import make_molecules, make_olfactometer, seeded_molecule_cache
+
+CIDS = (7410, 7439, 440917, 702)    # Four odorants, the original pipeline was fixed to three
+
+
+class TestSizing(object):
+    """
+    Contains a collection of pytest tests that validate that the Smell Engine is sized
+    from the handshake's odorant count and the equipment description.
+    """
+
+    def test_optimizer_sized_from_handshake(self, seeded_molecule_cache):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.my_equipment import MyOlfactometer
+        from olfactometer.smell_engine import SmellEngine
+
+        smell_engine = SmellEngine(n_odorants=len(CIDS))
+        smell_engine.set_odorant_molecule_ids(list(CIDS))
+        smell_engine.set_odorant_molecule_dilutions([10] * len(CIDS))
+        smell_engine.initialize_smell_engine_system(with_nidaq=False)
+
+        n_jars = MyOlfactometer.n_jars
+        assert isinstance(smell_engine.olfactometer, MyOlfactometer)
+        assert smell_engine.n_jars == len(smell_engine.olfactometer.jars) == n_jars
+        controller = smell_engine.smell_controller
+        controller.optimize_vector(np.full(len(CIDS), 1e-9), 4000)
+        assert controller.vapor_phase_concentrations.shape == (len(CIDS), n_jars)
+        assert len(controller.variables) == 2 * n_jars + 2
+        assert len(controller.nlls_) == 2 * n_jars + 2
+        assert [m.cid for m in smell_engine.olfactometer.loaded_molecules] == list(CIDS)
+
+    def test_jar_count_from_engine(self, seeded_molecule_cache):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.smell_engine import SmellEngine
+
+        smell_engine = SmellEngine(n_odorants=len(CIDS), n_jars=12)
+        smell_engine.set_odorant_molecule_ids(list(CIDS))
+        smell_engine.set_odorant_molecule_dilutions([10] * len(CIDS))
+        smell_engine.initialize_smell_engine_system(with_nidaq=False)
+        assert len(smell_engine.olfactometer.jars) == 12
+        assert smell_engine.smell_controller.get_vapor_concs_dense(None).shape == (len(CIDS), 12)
+
+    def test_jar_count_capped(self):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.smell_engine import SmellEngine
+        from olfactometer.valve_driver import MAX_VALVES
+
+        SmellEngine(n_jars=MAX_VALVES)
+        with pytest.raises(Exception):
+            SmellEngine(n_jars=MAX_VALVES + 1)
+
+    def test_too_many_odorants(self, seeded_molecule_cache):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.smell_engine import SmellEngine
+
+        smell_engine = SmellEngine(n_odorants=len(CIDS), n_jars=6)
+        smell_engine.set_odorant_molecule_ids(list(CIDS))
+        smell_engine.set_odorant_molecule_dilutions([10] * len(CIDS))
+        with pytest.raises(Exception, match='do not fit'):
+            smell_engine.initialize_smell_engine_system(with_nidaq=False)
+
+    def test_kdtree_lookup(self):
+        pd = pytest.importorskip('pandas')
+        from scipy.spatial import KDTree
+
+        molecules = make_molecules([7410, 7439, 440917, 702])
+        olfactometer = make_olfactometer(molecules, n_jars=12)
+        n_jars = len(olfactometer.jars)
+        rng = np.random.default_rng(0)
+        configurations = rng.uniform(0.1, 1, (50, 2 + 2 * n_jars))
+        table = pd.DataFrame(rng.uniform(0, 1e-6, (50, len(molecules))),
+                             index=pd.MultiIndex.from_arrays(configurations.T))
+        controller = SmellController(olfactometer, kdtree_flag=True, kdtree=KDTree(table.values),
+                                     smell_data_frame=table)
+
+        controller.optimize_vector(table.values[7], 4000)
+        schedule = controller.olfactometer_schedule
+        assert len(controller.variables) == 2 * n_jars + 2
+        # The row's configuration is (fA, fB, wA of every jar, wB of every jar)
+        np.testing.assert_allclose([schedule['w%dMFC_A_High' % j] for j in range(1, n_jars + 1)],
+                                   configurations[7, 2:2 + n_jars])
+        assert float(schedule['fMFC_A_High']) == pytest.approx(configurations[7, 0] * 1000)
+        assert float(schedule['fMFC_B_Low']) == pytest.approx(configurations[7, 1] * 10)
+
+    def test_calc_conc_jit(self):
+        from olfactometer.equipment import calc_conc_jit
+
+        n_jars, n_odorants = 12, 4
+        rng = np.random.default_rng(1)
+        variables = rng.uniform(0.1, 1, 2 + 2 * n_jars)
+        max_flow_rates = np.array([1000.0, 10.0])
+        A = rng.uniform(0, 1e-6, (n_odorants, n_jars))
+
+        fA, fB = variables[:2] * max_flow_rates
+        wA, wB = variables[2:2 + n_jars], variables[2 + n_jars:]
+        flux = fA * wA / n_jars + fB * wB / n_jars   # Every valve is open in both states
+        np.testing.assert_allclose(calc_conc_jit(variables, n_jars, max_flow_rates, A), A * flux)
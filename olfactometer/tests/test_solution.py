@@ -0,0 +1,87 @@
+import pickle
+
+import quantities as pq
+
+from olfactometer.odorants import Vendor, ChemicalOrder, Compound, Solution
+from olfactometer.tests.fixtures import make_molecules
+
+
+def make_compounds():
+    """(acetophenone, carvone, solvent) Compounds of the stand-in molecules."""
+    vendor = Vendor('Sigma Aldrich', 'http://www.sigma.com')
+    acetophenone, carvone, oil = make_molecules((7410, 7439, 702))
+    return (Compound(ChemicalOrder(acetophenone, vendor, '')),
+            Compound(ChemicalOrder(carvone, vendor, '')),
+            Compound(ChemicalOrder(oil, vendor, ''), is_solvent=True))
+
+
+class TestSolution(object):
+    """
+    Contains a collection of pytest tests that validate the memoized chemistry of
+    Solutions and its invalidation.
+    """
+
+    def test_memo_reused(self):
+        acetophenone, _, solvent = make_compounds()
+        solution = Solution({acetophenone: 10*pq.mL, solvent: 90*pq.mL})
+        assert solution.mole_fractions is solution.mole_fractions
+        assert 'mole_fractions' in solution._chemistry
+
+    def test_assigning_components_clears_memo(self):
+        acetophenone, carvone, solvent = make_compounds()
+        solution = Solution({acetophenone: 10*pq.mL, solvent: 90*pq.mL})
+        before = solution.molecules
+        solution.components = {carvone: 10*pq.mL, solvent: 90*pq.mL}
+        assert not solution._chemistry
+        after = solution.molecules
+        assert after is not before
+        assert carvone.molecule in after and acetophenone.molecule not in after
+
+    def test_child_invalidates_parent(self):
+        acetophenone, carvone, solvent = make_compounds()
+        child = Solution({acetophenone: 10*pq.mL, solvent: 90*pq.mL})
+        parent = Solution({child: 50*pq.mL, solvent: 50*pq.mL})
+        assert parent in child._parents
+        before = parent.molecules
+        assert carvone.molecule not in before
+
+        child.components = {carvone: 10*pq.mL, solvent: 90*pq.mL}
+        assert not parent._chemistry
+        assert carvone.molecule in parent.molecules
+
+    def test_parents_are_weak(self):
+        acetophenone, _, solvent = make_compounds()
+        child = Solution({acetophenone: 10*pq.mL, solvent: 90*pq.mL})
+        Solution({child: 50*pq.mL})
+        assert len(child._parents) == 0     # Nothing else holds the parent
+        child.invalidate()
+
+    def test_listeners(self):
+        acetophenone, _, solvent = make_compounds()
+        child = Solution({acetophenone: 10*pq.mL, solvent: 90*pq.mL})
+        parent = Solution({child: 50*pq.mL, solvent: 50*pq.mL})
+        calls = []
+        parent.add_listener(calls.append)
+        child.invalidate()
+        assert calls == [parent]
+        parent.remove_listener(calls.append)
+        child.invalidate()
+        assert calls == [parent]
+
+    def test_pickle_round_trip(self):
+        acetophenone, carvone, solvent = make_compounds()
+        child = Solution({acetophenone: 10*pq.mL, solvent: 90*pq.mL})
+        parent = Solution({child: 50*pq.mL, solvent: 50*pq.mL})
+        parent.mole_fractions
+        assert parent._chemistry
+
+        restored = pickle.loads(pickle.dumps(parent))
+        assert not restored._chemistry
+        restored_child, = [c for c in restored.components if isinstance(c, Solution)]
+        assert restored_child is not child
+        assert restored in restored_child._parents
+        # The restored links still carry invalidation to the restored parent
+        restored.mole_fractions
+        restored_child.components = {carvone: 10*pq.mL, solvent: 90*pq.mL}
+        assert not restored._chemistry
+        assert carvone.molecule in restored.molecules
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from olfactometer.tests.fixtures import olfactometer_rig
+from olfactometer.tracing import Tracer
+
+
+class TestTracing(object):
+    """
+    Contains a collection of pytest tests that validate the per-stage latency
+    tracing of the target-to-hardware pipeline.
+    """
+
+    def test_percentiles(self):
+        tracer = Tracer()
+        for ms in range(1, 101):
+            tracer.record('optimize', ms * 1000000)
+        stats = tracer.stats()['optimize']
+        assert stats['count'] == 100
+        assert stats['mean_ms'] == pytest.approx(50.5)
+        assert stats['p50_ms'] == pytest.approx(50.5)
+        assert stats['p95_ms'] == pytest.approx(95.05)
+        assert stats['p99_ms'] == pytest.approx(99.01)
+        assert stats['max_ms'] == pytest.approx(100.0)
+
+    def test_history_is_bounded(self):
+        tracer = Tracer(history=10)
+        for ms in range(1, 101):
+            tracer.record('decode', ms * 1000000)
+        stats = tracer.stats()['decode']
+        assert stats['count'] == 100
+        assert stats['mean_ms'] == pytest.approx(50.5)
+        # Percentiles only cover the last 10 spans
+        assert stats['p50_ms'] == pytest.approx(95.5)
+
+    def test_spans(self):
+        tracer = Tracer()
+        with tracer.span('receive') as span:
+            pass
+        with tracer.span('decode'):
+            pass
+        with pytest.raises(ValueError):
+            with tracer.span('decode'):
+                raise ValueError()
+        assert span.duration_ns > 0
+        assert list(tracer.stats()) == ['receive', 'decode']
+        assert tracer.stats()['decode']['count'] == 2
+        assert 'decode' in tracer.summary()
+
+        tracer.reset()
+        tracer.enabled = False
+        with tracer.span('receive'):
+            pass
+        assert tracer.stats() == {}
+
+    def test_optimizer_stages(self, olfactometer_rig):
+        from olfactometer.smell_controller import SmellController
+
+        molecules, olfactometer = olfactometer_rig
+        tracer = Tracer()
+        controller = SmellController(olfactometer, tracer=tracer)
+        controller.optimize_vector(np.array([1e-9, 1e-9, 1e-9]), 4000)
+        stats = tracer.stats()
+        assert list(stats) == ['optimize.lls', 'optimize.nlls', 'optimize']
+        assert stats['optimize']['mean_ms'] >= stats['optimize.nlls']['mean_ms']
+
+    def test_stats_query(self):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.smell_engine_communicator import SmellEngineCommunicator, STATS_QUERY
+
+        communicator = SmellEngineCommunicator(debug_mode=True)
+        communicator.tracer.record('decode', 2000000)
+
+        async def query():
+            server = await asyncio.start_server(communicator.handle_client, 'localhost', 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write(struct.pack('i', STATS_QUERY))
+                size, = struct.unpack('i', await reader.readexactly(4))
+                payload = await reader.readexactly(size)
+                writer.close()
+                return json.loads(payload.decode('utf-8'))
+
+        stats = asyncio.run(query())
+        communicator.executor.shutdown()
+        assert stats['stages']['decode']['p50_ms'] == pytest.approx(2.0)
+        assert stats['frames']['frames_received'] == 0
+        assert stats['solves']['solves_admitted'] == 0
+        assert communicator.clients == []
+
+    def test_valve_driver_stages(self, olfactometer_rig):
+        pytest.importorskip('nidaqmx.simulation')
+        from olfactometer.clock import VirtualClock
+        from olfactometer.valve_driver import ValveDriver, SAMPLES_PER_FRAME
+
+        molecules, olfactometer = olfactometer_rig
+        tracer = Tracer()
+        valve_driver = ValveDriver(olfactometer, debug_mode=True, clock=VirtualClock(), tracer=tracer)
+        valve_driver.valve_duty_cycles = np.arange(SAMPLES_PER_FRAME, dtype=np.uint32)
+        valve_driver.mfc_setpoints = np.full((len(valve_driver.DAQ_analog_channels), SAMPLES_PER_FRAME), 2.5)
+        valve_driver.timer_setup(interval=0.5)
+        iterations = valve_driver.run_for(2.0)
+        assert tracer.stats()['hardware_write']['count'] == iterations
@@ -0,0 +1,139 @@
+"""Per-stage latency tracing of the target-to-hardware pipeline."""
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+TRACE_HISTORY = 4096    # Most recent spans kept per stage for the percentiles
+PERCENTILES = (50, 95, 99)
+
+
+class Span:
+    """
+    Times one pass through a stage with time.perf_counter_ns, recorded on the tracer on exit.
+
+    Attributes:
+        tracer: Tracer the duration is recorded on.
+        stage (str): Name of the stage.
+        duration_ns (int): Duration of the span, set on exit.
+    """
+    __slots__ = ('tracer', 'stage', 'start_ns', 'duration_ns')
+
+    def __init__(self, tracer, stage):
+        self.tracer = tracer
+        self.stage = stage
+        self.start_ns = 0
+        self.duration_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        self.tracer.record(self.stage, self.duration_ns)
+        return False
+
+    @property
+    def duration(self):
+        """Duration of the span in seconds."""
+        return self.duration_ns / 1e9
+
+
+class Tracer:
+    """
+    Collects how long each stage of the pipeline takes, from a target frame arriving on the socket
+    to the valve and MFC frames being written to the DAQ:
+
+        receive, decode, gate, dispatch, optimize (optimize.lls, optimize.nlls, optimize.lookup),
+        frame_build, hardware_write
+
+    Stages nest: dispatch covers the executor job that optimizes and builds the frames.
+    receive starts once the first byte of a frame is available, so time spent waiting for the
+    client to send is not counted.
+    Each stage keeps a ring buffer of its most recent durations, so memory stays bounded on
+    long sessions and the percentiles describe recent behaviour. Spans may be recorded from
+    the event loop, the executor and the valve driver's timer thread.
+
+    Attributes:
+        history (int): Durations kept per stage.
+        enabled (bool): Record spans. A disabled tracer still times them, but keeps nothing.
+    """
+    def __init__(self, history=TRACE_HISTORY, enabled=True):
+        self.history = history
+        self.enabled = enabled
+        self._durations = collections.OrderedDict()    # stage -> deque of ns
+        self._counts = collections.Counter()
+        self._totals = collections.Counter()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'Tracer(%s)' % ', '.join('%s=%d' % item for item in self._counts.items())
+
+    def span(self, stage):
+        """
+        Context manager timing one pass through a stage.
+
+            with tracer.span('decode'):
+                frame = decode_frame(data, n)
+        """
+        return Span(self, stage)
+
+    def record(self, stage, duration_ns):
+        """
+        Record the duration of one pass through a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            duration_ns (int): Duration in nanoseconds.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            durations = self._durations.get(stage)
+            if durations is None:
+                durations = self._durations[stage] = collections.deque(maxlen=self.history)
+            durations.append(duration_ns)
+            self._counts[stage] += 1
+            self._totals[stage] += duration_ns
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+    def stats(self):
+        """
+        Latency statistics of every stage seen so far, in the order the stages were first recorded.
+
+        Returns:
+            :obj:`dict` of :obj:`(str, dict)`: Per stage, the number of spans recorded and the mean,
+            p50, p95, p99 and max durations in milliseconds. The percentiles and max cover the
+            last `history` spans, count and mean all of them.
+        """
+        with self._lock:
+            stages = [(stage, np.array(durations), self._counts[stage], self._totals[stage])
+                      for stage, durations in self._durations.items()]
+        stats = collections.OrderedDict()
+        for stage, durations, count, total in stages:
+            p50, p95, p99 = np.percentile(durations, PERCENTILES) / 1e6
+            stats[stage] = {'count': count,
+                            'mean_ms': total / count / 1e6,
+                            'p50_ms': float(p50),
+                            'p95_ms': float(p95),
+                            'p99_ms': float(p99),
+                            'max_ms': float(durations.max()) / 1e6}
+        return stats
+
+    def summary(self):
+        """
+        Table of the stage statistics, printed when the communicator shuts down.
+        """
+        lines = ['%-16s %8s %10s %10s %10s %10s %10s' % ('stage (ms)', 'count', 'mean', 'p50', 'p95', 'p99', 'max')]
+        for stage, s in self.stats().items():
+            lines.append('%-16s %8d %10.3f %10.3f %10.3f %10.3f %10.3f'
+                         % (stage, s['count'], s['mean_ms'], s['p50_ms'], s['p95_ms'], s['p99_ms'], s['max_ms']))
+        return '\n'.join(lines)
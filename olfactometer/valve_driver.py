@@ -13,11 +13,17 @@ from nidaqmx.constants import (
 from nidaqmx.error_codes import DAQmxErrors, DAQmxWarnings
 from nidaqmx.errors import (
     check_for_error, is_string_buffer_too_small, DaqError, DaqResourceWarning)
+from nidaqmx.simulation import SimulatedBackend
+from olfactometer.clock import SystemClock
+from olfactometer.frame_writer import FrameWriter
+from olfactometer.tracing import Tracer
 
 # import winsound
 
 SAMPLES_PER_FRAME = 50
 FRAMES_PER_S = 1
+MIXTURE_HISTORY = 64    # Most recent target mixtures kept in ValveDriver.mixtures
+MAX_VALVES = 16         # A and B states each take 16 of the 32 port0 lines, see format_bits
 
 
 class ValveDriver:
@@ -28,14 +34,25 @@ class ValveDriver:
     Attributes:
         olf: List of mfc voltage values indexed accurately.
         cids: A ordered list of concentration ids for each valve.
+        clock: Time source of the timer thread, see olfactometer.clock. In debug mode the
+            simulated DAQ backend runs on the same clock.
+        backend: The nidaqmx.simulation.SimulatedBackend recording the written samples in debug mode.
+        writers: FrameWriter of the 'Digital' and 'Analog' tasks, used for every frame write.
+        synchronized (bool): The analog task is armed on the start trigger of the digital task,
+            see synchronize_outputs.
+        tracer: Latency tracer of the 'frame_build' and 'hardware_write' stages, see olfactometer.tracing.
     """
-    def __init__(self, olfactometer=None, data_container=None, debug_mode=False, PID_mode=False):                 
+    def __init__(self, olfactometer=None, data_container=None, debug_mode=False, PID_mode=False, clock=None,
+                 synchronized=False, tracer=None):                 
         self.digital_device_name = "cDAQ1Mod1"
         self.analog_device_name = "cDAQ1Mod2"
         self.analog_in_device_name = "cDAQ1Mod3"
         self.tasks = {}                
-        self.mixtures = collections.deque([])        
+        self.writers = {}
+        self.cids = []
+        self.mixtures = collections.deque([], maxlen=MIXTURE_HISTORY)
         self.valve_duty_cycles = []
+        self.valve_durations = []
         self.mfc_setpoints = []
         self.PID_sensor_readings = []
         self.DAQ_analog_channels = []
@@ -43,7 +60,16 @@ class ValveDriver:
         self.specified_analog_setpoints = []
         self.override_digital = False
         self.override_analog = False
+        self._last_digital_values = None
+        self._last_analog_values = None
         self.data_container = data_container
+        self.clock = clock if clock is not None else SystemClock()
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.backend = None
+        if debug_mode:
+            # Tasks created with a backend as debug_mode record their samples on it
+            self.backend = debug_mode if isinstance(debug_mode, SimulatedBackend) else SimulatedBackend(self.clock)
+            debug_mode = self.backend
         self.debug_mode = debug_mode
         self.PID_mode = PID_mode
         self.num_pid_samples = SAMPLES_PER_FRAME             
@@ -51,8 +77,13 @@ class ValveDriver:
         self.initialize()
         self.init_digital_task(task_name="DigitalTask")
         self.init_analog_task(olfactometer.mfc_flat_list(), task_name="AnalogTask")
+        self.synchronized = False
+        if synchronized:
+            self.synchronize_outputs()
         if (self.debug_mode is False and self.PID_mode):
-            self.init_analog_in_task()            
+            self.init_analog_in_task()
+        elif self.PID_mode:
+            self.init_simulated_pid(olfactometer)            
 
 
     
@@ -115,6 +146,21 @@ class ValveDriver:
             print(e)
             return -1
 
+    def init_simulated_pid(self, olfactometer, **kwargs):
+        """
+        Debug mode stand-in for init_analog_in_task: the PID readings are simulated from the
+        valve and MFC samples written to the simulated DAQ backend.
+
+        Args:
+            olfactometer: Olfactometer whose outflow the PID measures.
+            kwargs: Detector parameters passed to SimulatedPID (sensitivities, time_constant, noise, ...).
+        Returns:
+            Success status represented with 1.
+        """
+        from olfactometer.pid_simulator import SimulatedPID     # Imports scipy.signal
+        self.tasks['Analog_In'] = SimulatedPID(olfactometer, self.backend, self.DAQ_analog_channels, **kwargs)
+        return 1
+
     def init_analog_task(self, mfc_flat_list, task_name='Analog_Task', channel_name="analog_channel"):
         """
         Initializing an Analog Output Task and Channel communication line.
@@ -147,6 +193,7 @@ class ValveDriver:
                 chann_counter += 1
             self.set_task_clock(task)
             self.tasks['Analog'] = task            
+            self.writers['Analog'] = FrameWriter(task, (len(self.DAQ_analog_channels), SAMPLES_PER_FRAME), np.float64)
             return 1
         except nidaqmx.DaqError as e:
             print(e)
@@ -177,6 +224,7 @@ class ValveDriver:
                 task.add_task_channel(NIDAQMXChannel)
             self.set_task_clock(task)
             self.tasks['Digital'] = task
+            self.writers['Digital'] = FrameWriter(task, (SAMPLES_PER_FRAME,), np.uint32)
             self.channels_initialized = True
             return 1
         except nidaqmx.DaqError as e:
@@ -290,22 +338,22 @@ class ValveDriver:
         Args:
             valve_mfc_values (:obj:`dictionary` of :obj:`(str, float)`): Expected dictionary of mfc voltages and valve state durations.
         """
-        millis = int(round(time.time() * 1000))
-        # Per valve, read the time in each state and convert it to a 32-bit representation of the valve state.
-        valve_mfc_values['valves'] = self.determine_clean_air_pair(valve_mfc_values['valves'])
-        valve_durations = [self.convert_concentration_format(vd)
-                           for vd in valve_mfc_values['valves']]
-        
-        mfc_voltages = valve_mfc_values['mfcs']           
-        if self.override_digital == False:  self.valve_duty_cycles = self.generate_digital_frame_writes(valve_durations)
-        else:                               self.valve_duty_cycles = self.specify_digital_frame_writes(self.specified_valve_states)            
-        
-        if self.override_analog == False:   self.mfc_setpoints = self.generate_analog_frame_writes(mfc_voltages)        
-        else:                               self.mfc_setpoints = self.specify_analog_frame_writes(self.specified_analog_setpoints)
-        
+        with self.tracer.span('frame_build') as frame_build:
+            # Per valve, read the time in each state and convert it to a 32-bit representation of the valve state.
+            valve_mfc_values['valves'] = self.determine_clean_air_pair(valve_mfc_values['valves'])
+            valve_durations = [self.convert_concentration_format(vd)
+                               for vd in valve_mfc_values['valves']]
+            self.valve_durations = valve_durations
+
+            mfc_voltages = valve_mfc_values['mfcs']
+            if self.override_digital == False:  self.valve_duty_cycles = self.generate_digital_frame_writes(valve_durations)
+            else:                               self.valve_duty_cycles = self.specify_digital_frame_writes(self.specified_valve_states)
+
+            if self.override_analog == False:   self.mfc_setpoints = self.generate_analog_frame_writes(mfc_voltages)
+            else:                               self.mfc_setpoints = self.specify_analog_frame_writes(self.specified_analog_setpoints)
+
         if (self.data_container != None):   # Write data into data container
-            diff_time = int(round(time.time() * 1000)) - millis            
-            generate_samples = {'digital_samples' : str(self.valve_duty_cycles), 'analog_samples': str(self.mfc_setpoints), 'generate_samples_latency' : diff_time/1000}
+            generate_samples = {'digital_samples' : str(self.valve_duty_cycles), 'analog_samples': str(self.mfc_setpoints), 'generate_samples_latency' : frame_build.duration}
             self.data_container.append_value(datetime.datetime.now().strftime("%m/%d/%Y %H:%M:%S"), generate_samples)
 
     def close_tasks(self):
@@ -407,6 +455,13 @@ class ValveDriver:
                     digital_cntrl_signals[i] += self.format_bits(valve_num+1, 'None')                        
         return digital_cntrl_signals
 
+    @property
+    def has_written(self):
+        """
+        bool: Digital and analog frames were written, so write_zeroes has frames to zero.
+        """
+        return self._last_digital_values is not None and self._last_analog_values is not None
+
     def write_zeroes(self):
         """
         This method will write a list of valve commands to olfactometer.
@@ -425,7 +480,7 @@ class ValveDriver:
             if (len(digital_values) > 0):       
                 if (self.tasks['Digital'].is_task_done()):
                     self.tasks['Digital'].stop()
-                self.tasks['Digital'].write(digital_values, auto_start=True)
+                self.writers['Digital'].write(digital_values)
             return 0
         except nidaqmx.DaqError as e:
             print(e)
@@ -450,9 +505,14 @@ class ValveDriver:
                 if (self.tasks['Digital'].is_task_done() and self.tasks['Analog'].is_task_done()):
                     self.tasks['Digital'].stop()
                     self.tasks['Analog'].stop()
-                self.tasks['Digital'].write(digital_values, auto_start=True)
-                self.tasks['Analog'].write(analog_values, auto_start=True)
-                if not self.debug_mode and self.PID_mode: # Read values from PID             
+                with self.tracer.span('hardware_write'):
+                    if self.synchronized:   # Arm the analog task, then start both with the digital task
+                        self.writers['Analog'].write(analog_values)
+                        self.writers['Digital'].write(digital_values)
+                    else:
+                        self.writers['Digital'].write(digital_values)
+                        self.writers['Analog'].write(analog_values)
+                if self.PID_mode: # Read values from PID (simulated in debug mode)
                     self.PID_sensor_readings = self.tasks["Analog_In"].read(number_of_samples_per_channel=self.num_pid_samples)
                     if (self.data_container != None):                        
                         samples = self.PID_sensor_readings
@@ -466,6 +526,24 @@ class ValveDriver:
             print(e)
             return -1
 
+    def synchronize_outputs(self, synchronized=True):
+        """
+        Arm the analog task on the start trigger of the digital task, so that each frame of MFC setpoints
+        starts on the same sample clock edge as its frame of valve states. Unsynchronized, each task
+        starts when its own write returns and the two are skewed by the latency between the writes.
+
+        Args:
+            synchronized (bool): False to start the analog task on its own again.
+        Raises:
+            nidaqmx.DaqError: The device cannot route the start trigger.
+        """
+        start_trigger = self.tasks['Analog'].triggers.start_trigger
+        if synchronized:
+            start_trigger.cfg_dig_edge_start_trig(self.tasks['Digital'].triggers.start_trigger.term)
+        else:
+            start_trigger.disable_start_trig()
+        self.synchronized = synchronized
+
     def set_task_clock(self, task, samples_per_frame=SAMPLES_PER_FRAME,
                        frames_per_s=FRAMES_PER_S, repeats=1):
         """
@@ -486,9 +564,8 @@ class ValveDriver:
             sample_mode=AcquisitionType.FINITE,
             samps_per_chan=50)
         # print(f"Clock sampling rate: {self.samples_per_s}, samps per chan: {samples_per_frame}")
-        if not self.debug_mode:
-            # Do not allow NI-DAQmx to generate same data multiple times.
-            task.out_stream.regen_mode = RegenerationMode.DONT_ALLOW_REGENERATION
+        # Do not allow NI-DAQmx to generate same data multiple times.
+        task.out_stream.regen_mode = RegenerationMode.DONT_ALLOW_REGENERATION
 
     ############# THREAD METHODS #############
     def timer_setup(self, interval=None):
@@ -523,12 +600,34 @@ class ValveDriver:
         If writing values is unsuccessfull thread instance halts.
         """
         while self.timer_interval:          # While the timer is valid
-            if not self.timer_paused:       # Try and write the data                                
-                self.write_output(self.valve_duty_cycles, self.mfc_setpoints)
-                time.sleep(self.timer_interval)
-            else:
-                # print("Timer paused")
-                time.sleep(self.timer_interval)
+            self.timer_step()
+
+    def timer_step(self):
+        """
+        One iteration of the timer: write the current frame unless paused, then sleep on the clock.
+        """
+        if not self.timer_paused:       # Try and write the data
+            self.write_output(self.valve_duty_cycles, self.mfc_setpoints)
+        self.clock.sleep(self.timer_interval)
+
+    def run_for(self, duration):
+        """
+        Run the timer loop in the calling thread for duration seconds of clock time, instead of
+        starting the timer thread. With a VirtualClock this returns as soon as the writes are done.
+
+        Args:
+            duration (float): Seconds of clock time to run for.
+        Returns:
+            int: Number of timer iterations.
+        """
+        if getattr(self, 'timer_interval', None) is None:
+            self.timer_setup()
+        end = self.clock.time() + duration
+        steps = 0
+        while self.clock.time() < end:
+            self.timer_step()
+            steps += 1
+        return steps
 
     def timer_pause(self):
         """
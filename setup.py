@@ -19,6 +19,7 @@ setup(
     author='Rick Gerkin, Alireza Bahremand, Mason Manetta',
     author_email='rgerkin@asu.edu',
     packages=find_packages(),
+    package_data={'olfactometer': ['data/*.jsonl']},
     license='MIT',
     description=("A package for controlling an olfactometer."),
     long_description="",